@@ -0,0 +1,27 @@
+import argparse
+import time
+
+from infrastructure.book.polyglot_book_builder import PolyglotBookBuilder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds a Polyglot opening book from PGN files.')
+    parser.add_argument('pgn_paths', nargs='+', help='PGN files')
+    parser.add_argument('-o', '--output', default='book.bin', help='path of the resulting book')
+    parser.add_argument('--max-ply', type=int, default=20, help='number of plies of each game added to the book')
+    parser.add_argument('--min-games', type=int, default=1, help='minimum number of games in which a move was played')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (defaults to the number of cores)')
+    parser.add_argument('--max-records', type=int, default=1_000_000, help='records kept in memory by each worker before writing a sorted run')
+    args = parser.parse_args()
+
+    builder = PolyglotBookBuilder(max_ply=args.max_ply,
+                                  min_games=args.min_games,
+                                  processes=args.processes,
+                                  max_records_in_memory=args.max_records)
+    t_0 = time.time()
+    num_entries = builder.build(args.pgn_paths, args.output)
+    print(f'{num_entries} entries written to {args.output} in {time.time() - t_0:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
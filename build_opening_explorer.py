@@ -0,0 +1,20 @@
+import argparse
+import time
+
+from infrastructure.database.opening_explorer_builder import OpeningExplorerBuilder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds an opening explorer index from a position database.')
+    parser.add_argument('database_path', help='position database, built with build_position_database.py')
+    parser.add_argument('-o', '--output', default='explorer.idx', help='path of the resulting index')
+    args = parser.parse_args()
+
+    builder = OpeningExplorerBuilder()
+    t_0 = time.time()
+    num_records = builder.build(args.database_path, args.output)
+    print(f'{num_records} records written to {args.output} in {time.time() - t_0:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
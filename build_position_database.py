@@ -0,0 +1,25 @@
+import argparse
+import time
+
+from infrastructure.database.position_database_builder import PositionDatabaseBuilder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingests PGN files into a position database.')
+    parser.add_argument('pgn_paths', nargs='+', help='PGN files')
+    parser.add_argument('-o', '--output', default='positions.db', help='path of the resulting database')
+    parser.add_argument('--max-ply', type=int, default=None, help='number of plies of each game added to the database (defaults to the whole game)')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (defaults to the number of cores)')
+    parser.add_argument('--max-records', type=int, default=1_000_000, help='records kept in memory by each worker before writing a sorted run')
+    args = parser.parse_args()
+
+    builder = PositionDatabaseBuilder(max_ply=args.max_ply,
+                                      processes=args.processes,
+                                      max_records_in_memory=args.max_records)
+    t_0 = time.time()
+    num_records = builder.build(args.pgn_paths, args.output)
+    print(f'{num_records} records written to {args.output} in {time.time() - t_0:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
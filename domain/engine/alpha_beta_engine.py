@@ -0,0 +1,406 @@
+import math
+import time
+from typing import Callable
+
+from domain.engine.engine import Engine
+from domain.engine.port.analysis_cache import AnalysisCache
+from domain.engine.port.tablebase import Tablebase
+from domain.engine.search_stats import SearchStats
+from domain.engine.transposition_table import TranspositionTable, Bound
+from domain.evaluator.evaluator import Evaluator
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+from domain.game.model.pieces import PieceType
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class AlphaBetaEngine(Engine):
+    """
+    Iterative deepening negamax search with alpha-beta pruning, a transposition table and quiescence search
+    """
+
+    MATE_SCORE = 100_000.0
+    MATE_THRESHOLD = MATE_SCORE - 1_000
+    MAX_PLY = 128
+    CHECK_LIMITS_INTERVAL = 64
+
+    PIECE_VALUES = {
+        PieceType.PAWN: 1,
+        PieceType.KNIGHT: 3,
+        PieceType.BISHOP: 3,
+        PieceType.ROOK: 5,
+        PieceType.QUEEN: 9,
+        PieceType.KING: 100,
+    }
+
+    def __init__(self,
+                 evaluator: Evaluator,
+                 max_depth: int = 4,
+                 time_limit: float = None,
+                 node_limit: int = None,
+                 tt_size: int = 2 ** 20,
+                 analysis_cache: AnalysisCache = None,
+                 cache_min_depth: int = 2,
+                 tablebase: Tablebase = None,
+                 on_iteration: Callable[[SearchStats], None] = None):
+        """
+        Constructor
+        :param evaluator: the evaluator used to score positions
+        :param max_depth: maximum depth of the iterative deepening
+        :param time_limit: (optional) maximum number of seconds per search. The first iteration is always completed.
+        :param node_limit: (optional) maximum number of nodes (regular plus quiescence) per search. The first iteration is always completed.
+        :param tt_size: number of entries of the transposition table
+        :param analysis_cache: (optional) persistent cache probed and updated alongside the transposition table
+        :param cache_min_depth: minimum remaining depth for a node to use the analysis cache. Shallow nodes are cheaper to search than to look up.
+        :param tablebase: (optional) endgame tablebase that gives the exact score of the positions with few pieces, which are not searched
+        :param on_iteration: (optional) callback invoked with the search statistics every time a depth is completed
+        """
+        super().__init__(evaluator, on_iteration)
+        self._max_depth = max_depth
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+        self._tt = TranspositionTable(tt_size)
+        self._analysis_cache = analysis_cache
+        self._cache_min_depth = cache_min_depth
+        self._tablebase = tablebase
+
+        self._stats = SearchStats()
+        self._deadline = None
+        self._can_abort = False
+        self._next_limits_check = 0
+        self._pv: list[list[Move]] = []
+        self._killers: list[list[Move]] = []
+
+    def set_limits(self, max_depth: int, time_limit: float = None, node_limit: int = None):
+        """
+        Changes the limits of the next searches
+        :param max_depth: maximum depth of the iterative deepening
+        :param time_limit: (optional) maximum number of seconds per search. The first iteration is always completed.
+        :param node_limit: (optional) maximum number of nodes (regular plus quiescence) per search. The first iteration is always completed.
+        """
+        self._max_depth = max_depth
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+
+    def hashfull(self) -> int:
+        """
+        :return: occupation of the transposition table in permille
+        """
+        return self._tt.hashfull()
+
+    def clear(self):
+        """
+        Forgets the results of previous searches (i.e.: before a new game)
+        """
+        self._tt.clear()
+        self._evaluator.clear_cache()
+
+    def calculate_move(self, board_state: BoardState) -> tuple[Move, float, list[Move], SearchStats]:
+        self._stats = SearchStats()
+        self._stop_requested = False
+        self._deadline = time.perf_counter() + self._time_limit if self._time_limit is not None else None
+        self._can_abort = False
+        self._next_limits_check = AlphaBetaEngine.CHECK_LIMITS_INTERVAL
+        self._pv = [[] for _ in range(AlphaBetaEngine.MAX_PLY + 1)]
+        self._killers = [[] for _ in range(AlphaBetaEngine.MAX_PLY + 1)]
+        self._evaluator.prepare(board_state)
+
+        if not board_state.get_legal_moves():
+            self._stats.finish()
+            return None, self._score_to_external(self._relative_score(board_state, 0)), [], self._stats
+
+        best_move = None
+        best_score = 0.0
+        sequence = []
+        for depth in range(1, self._max_depth + 1):
+            try:
+                score = self._negamax(board_state, depth, -math.inf, math.inf, 0)
+            except SearchAborted:
+                break
+
+            sequence = list(self._pv[0])
+            best_move = sequence[0]
+            best_score = score
+            self._stats.finish_iteration(depth, self._score_to_external(score), sequence, self._mate_in(score))
+            self._report_iteration(self._stats)
+            self._can_abort = True
+
+            if abs(score) >= AlphaBetaEngine.MATE_THRESHOLD:
+                # forced mate found, deeper searches can't improve it
+                break
+
+        self._stats.finish()
+        return best_move, self._score_to_external(best_score), sequence, self._stats
+
+    def _negamax(self, board_state: BoardState, depth: int, alpha: float, beta: float, ply: int) -> float:
+        """
+        Searches a position
+        :param board_state: the position
+        :param depth: remaining depth
+        :param alpha: lower bound of the search window
+        :param beta: upper bound of the search window
+        :param ply: distance to the root
+        :return: the score for the active player
+        """
+        stats = self._stats
+        stats.nodes += 1
+        self._check_limits()
+        self._pv[ply] = []
+
+        if ply > 0:
+            if board_state.is_repetition(2) or board_state.is_fifty_move_draw():
+                # a repeated position can be repeated again, so the cycle leads to a draw
+                return Evaluator.SCORE_DRAW
+
+            tablebase_score = self._probe_tablebase(board_state, ply)
+            if tablebase_score is not None:
+                return tablebase_score
+
+        tt_move = None
+        stats.tt_probes += 1
+        entry = self._tt.probe(board_state.hash)
+        if entry:
+            stats.tt_hits += 1
+
+        use_cache = self._analysis_cache is not None and depth >= self._cache_min_depth
+        if use_cache and (entry is None or entry.depth < depth):
+            stats.cache_probes += 1
+            cached_entry = self._analysis_cache.probe(board_state)
+            if cached_entry:
+                stats.cache_hits += 1
+                if entry is None or cached_entry.depth > entry.depth:
+                    entry = cached_entry
+
+        if entry:
+            tt_move = entry.move
+            if ply > 0 and entry.depth >= depth:
+                score = self._score_from_tt(entry.score, ply)
+                if entry.bound == Bound.EXACT \
+                        or (entry.bound == Bound.LOWER and score >= beta) \
+                        or (entry.bound == Bound.UPPER and score <= alpha):
+                    stats.tt_cutoffs += 1
+                    return score
+
+        if depth <= 0 or ply >= AlphaBetaEngine.MAX_PLY:
+            return self._quiescence(board_state, alpha, beta, ply)
+
+        moves = board_state.get_legal_moves()
+        if not moves:
+            return self._relative_score(board_state, ply)
+
+        original_alpha = alpha
+        best_score = -math.inf
+        best_move = None
+        for i, move in enumerate(self._order_moves(board_state, moves, tt_move, ply)):
+            new_board_state = board_state.perform_move(move, update=False)
+            score = -self._negamax(new_board_state, depth - 1, -beta, -alpha, ply + 1)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                self._pv[ply] = [move] + self._pv[ply + 1]
+
+            if score > alpha:
+                alpha = score
+
+            if alpha >= beta:
+                stats.beta_cutoffs += 1
+                if i == 0:
+                    stats.first_move_cutoffs += 1
+                if not self._is_capture(board_state, move):
+                    self._store_killer(move, ply)
+                break
+
+        if best_score <= original_alpha:
+            bound = Bound.UPPER
+        elif best_score >= beta:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self._tt.store(board_state.hash, depth, bound, self._score_to_tt(best_score, ply), best_move)
+        if use_cache:
+            self._analysis_cache.store(board_state, depth, bound, self._score_to_tt(best_score, ply), best_move)
+
+        return best_score
+
+    def _quiescence(self, board_state: BoardState, alpha: float, beta: float, ply: int) -> float:
+        """
+        Searches only captures and promotions until the position is quiet
+        :param board_state: the position
+        :param alpha: lower bound of the search window
+        :param beta: upper bound of the search window
+        :param ply: distance to the root
+        :return: the score for the active player
+        """
+        stats = self._stats
+        stats.quiescence_nodes += 1
+        if ply > stats.seldepth:
+            stats.seldepth = ply
+        self._check_limits()
+        self._pv[ply] = []
+
+        tablebase_score = self._probe_tablebase(board_state, ply)
+        if tablebase_score is not None:
+            return tablebase_score
+
+        stand_pat = self._relative_score(board_state, ply)
+        if stand_pat >= beta or abs(stand_pat) >= AlphaBetaEngine.MATE_THRESHOLD or ply >= AlphaBetaEngine.MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        # captures that lose material in the exchange are not searched
+        moves = [move for move in board_state.get_legal_moves()
+                 if (self._is_capture(board_state, move) or move.promotion_piece) and board_state.see_ge(move)]
+        for move in self._order_moves(board_state, moves, None, ply):
+            new_board_state = board_state.perform_move(move, update=False)
+            score = -self._quiescence(new_board_state, -beta, -alpha, ply + 1)
+
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+                self._pv[ply] = [move] + self._pv[ply + 1]
+
+        return alpha
+
+    def _order_moves(self, board_state: BoardState, moves: list[Move], tt_move: Move | None, ply: int) -> list[Move]:
+        """
+        Sorts the moves: transposition table move first, then captures that don't lose material in the exchange by
+        most valuable victim and least valuable attacker, then killer moves, then losing captures, then the rest
+        :param board_state: the position
+        :param moves: the moves to sort
+        :param tt_move: the best move stored in the transposition table, if any
+        :param ply: distance to the root
+        :return: the sorted moves
+        """
+        killers = self._killers[ply]
+
+        def priority(move: Move) -> int:
+            if tt_move is not None and move == tt_move:
+                return 100_000
+            piece_values = AlphaBetaEngine.PIECE_VALUES
+            priority = 0
+            victim = board_state.get_piece_on_square(move.dest_square)
+            if victim or move.en_passant:
+                victim_value = piece_values[victim.type] if victim else piece_values[PieceType.PAWN]
+                attacker = board_state.get_piece_on_square(move.origin_square)
+                priority += 100 * victim_value - piece_values[attacker.type]
+                priority += 10_000 if board_state.see_ge(move) else 2_000
+            elif move in killers:
+                priority += 5_000
+            if move.promotion_piece:
+                priority += 1_000 * piece_values[move.promotion_piece.type]
+            return priority
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _store_killer(self, move: Move, ply: int):
+        killers = self._killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+    def _check_limits(self):
+        """
+        Aborts the search if it was requested to stop or a time or node limit was exceeded. The limits are only
+        checked every few nodes.
+        """
+        if self._stop_requested and self._can_abort:
+            raise SearchAborted()
+
+        stats = self._stats
+        if stats.nodes + stats.quiescence_nodes < self._next_limits_check:
+            return
+        self._next_limits_check += AlphaBetaEngine.CHECK_LIMITS_INTERVAL
+
+        if not self._can_abort:
+            return
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchAborted()
+        if self._node_limit is not None and stats.nodes + stats.quiescence_nodes >= self._node_limit:
+            raise SearchAborted()
+
+    def _relative_score(self, board_state: BoardState, ply: int) -> float:
+        """
+        Evaluates a position for the active player, replacing the infinite scores of checkmate by scores that prefer shorter mates
+        :param board_state: the position
+        :param ply: distance to the root
+        :return: the score
+        """
+        score = self._evaluator.evaluate(board_state)
+        if not board_state.white_to_move:
+            score = -score
+        if score == Evaluator.SCORE_WIN:
+            return AlphaBetaEngine.MATE_SCORE - ply
+        if score == -Evaluator.SCORE_WIN:
+            return -AlphaBetaEngine.MATE_SCORE + ply
+        return score
+
+    def _probe_tablebase(self, board_state: BoardState, ply: int) -> float | None:
+        """
+        Looks up a position in the endgame tablebase, if any
+        :param board_state: the position
+        :param ply: distance to the root
+        :return: the exact score for the active player, with won and lost positions scored as mates at their distance, or None if the position is not in the tablebase
+        """
+        if self._tablebase is None or board_state.piece_count > self._tablebase.max_pieces:
+            return None
+
+        wdl = self._tablebase.probe_wdl(board_state)
+        if wdl is None:
+            return None
+        self._stats.tablebase_hits += 1
+        if wdl == Tablebase.DRAW:
+            return Evaluator.SCORE_DRAW
+
+        mate_ply = ply + self._tablebase.probe_dtm(board_state)
+        return AlphaBetaEngine.MATE_SCORE - mate_ply if wdl == Tablebase.WIN else -AlphaBetaEngine.MATE_SCORE + mate_ply
+
+    @staticmethod
+    def _is_capture(board_state: BoardState, move: Move) -> bool:
+        return move.en_passant or board_state.get_piece_on_square(move.dest_square) is not None
+
+    @staticmethod
+    def _score_to_tt(score: float, ply: int) -> float:
+        """
+        Makes mate scores relative to the stored position instead of the root
+        """
+        if score >= AlphaBetaEngine.MATE_THRESHOLD:
+            return score + ply
+        if score <= -AlphaBetaEngine.MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score: float, ply: int) -> float:
+        """
+        Makes stored mate scores relative to the root again
+        """
+        if score >= AlphaBetaEngine.MATE_THRESHOLD:
+            return score - ply
+        if score <= -AlphaBetaEngine.MATE_THRESHOLD:
+            return score + ply
+        return score
+
+    @staticmethod
+    def _score_to_external(score: float) -> float:
+        """
+        Maps internal mate scores back to the infinite scores used by the evaluators
+        """
+        if abs(score) >= AlphaBetaEngine.MATE_THRESHOLD:
+            return math.copysign(Evaluator.SCORE_WIN, score)
+        return score
+
+    @staticmethod
+    def _mate_in(score: float) -> int | None:
+        """
+        :return: the number of moves until mate for a mate score (negative if the active player gets mated), None otherwise
+        """
+        if abs(score) < AlphaBetaEngine.MATE_THRESHOLD:
+            return None
+        plies = int(AlphaBetaEngine.MATE_SCORE - abs(score))
+        return int(math.copysign((plies + 1) // 2, score))
@@ -0,0 +1,38 @@
+from domain.engine.engine import Engine
+from domain.engine.port.opening_book import OpeningBook
+from domain.engine.search_stats import SearchStats
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+
+
+class BookEngine(Engine):
+    """
+    Plays moves from an opening book while the position is in it, and delegates to another engine otherwise
+    """
+
+    BOOK_SCORE = 0.0
+
+    def __init__(self, engine: Engine, opening_book: OpeningBook):
+        """
+        Constructor
+        :param engine: the engine used for positions that aren't in the book
+        :param opening_book: the opening book
+        """
+        super().__init__(engine.evaluator, engine.on_iteration)
+        self._engine = engine
+        self._opening_book = opening_book
+
+    def stop(self):
+        self._engine.stop()
+
+    def clear(self):
+        self._engine.clear()
+
+    def calculate_move(self, board_state: BoardState) -> tuple[Move, float, list[Move], SearchStats]:
+        move = self._opening_book.choose_move(board_state)
+        if move is None:
+            return self._engine.calculate_move(board_state)
+
+        stats = SearchStats()
+        stats.finish()
+        return move, BookEngine.BOOK_SCORE, [move], stats
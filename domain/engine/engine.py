@@ -1,6 +1,8 @@
 import abc
 from abc import abstractmethod
+from typing import Callable
 
+from domain.engine.search_stats import SearchStats
 from domain.evaluator.evaluator import Evaluator
 from domain.game.model.board import BoardState
 from domain.game.model.move import Move
@@ -8,14 +10,50 @@ from domain.game.model.move import Move
 
 class Engine(abc.ABC):
 
-    def __init__(self, evaluator: Evaluator):
+    def __init__(self, evaluator: Evaluator, on_iteration: Callable[[SearchStats], None] = None):
+        """
+        Constructor
+        :param evaluator: the evaluator used to score positions
+        :param on_iteration: (optional) callback invoked with the search statistics every time the search completes an iteration
+        """
         self._evaluator = evaluator
+        self._on_iteration = on_iteration
+        self._stop_requested = False
+
+    @property
+    def evaluator(self) -> Evaluator:
+        return self._evaluator
+
+    @property
+    def on_iteration(self) -> Callable[[SearchStats], None] | None:
+        return self._on_iteration
 
     @abstractmethod
-    def calculate_move(self, board_state: BoardState) -> tuple[Move, float, list[Move]]:
+    def calculate_move(self, board_state: BoardState) -> tuple[Move, float, list[Move], SearchStats]:
         """
         Calculates the next best move for the position and its score. Optionally, it may also calculate a list of the next best sequence of moves, starting with the next best move.
         :param board_state: the board state
-        :return: a tuple with the best move, the score for the move, and, optionally, a list of the best moves for the following turns
+        :return: a tuple with the best move, the score for the move, optionally, a list of the best moves for the following turns, and the statistics of the search
+        """
+        raise NotImplemented
+
+    def stop(self):
+        """
+        Requests the search in progress (i.e.: running in another thread) to stop as soon as possible and return the
+        best move found so far. Requests made before a search starts are discarded when it starts.
+        """
+        self._stop_requested = True
+
+    def clear(self):
+        """
+        Forgets the results of previous searches (i.e.: before a new game). Engines that keep nothing between searches
+        don't need to override it.
+        """
+
+    def _report_iteration(self, stats: SearchStats):
+        """
+        Notifies the callback (if any) that an iteration of the search has been completed
+        :param stats: the statistics of the search
         """
-        raise NotImplemented
\ No newline at end of file
+        if self._on_iteration:
+            self._on_iteration(stats)
@@ -0,0 +1,173 @@
+import time
+from typing import Callable
+
+from domain.engine.alpha_beta_engine import SearchAborted
+from domain.engine.engine import Engine
+from domain.engine.search_stats import SearchStats
+from domain.evaluator.evaluator import Evaluator
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+from domain.game.model.pieces import PieceType
+
+
+class MateEngine(Engine):
+    """
+    Searches only for forced checkmates, with an iterative deepening AND/OR search: a position of the attacker is
+    proven if any of its moves proves it, and a position of the defender only if all its replies do. By default the
+    attacker only considers checking moves, tried in order of fewest escapes for the defender. The search stops as soon
+    as a mate is proven, so the first one found is the shortest.
+    """
+
+    def __init__(self,
+                 evaluator: Evaluator = None,
+                 max_moves: int = 5,
+                 checks_only: bool = True,
+                 time_limit: float = None,
+                 fallback_engine: Engine = None,
+                 on_iteration: Callable[[SearchStats], None] = None):
+        """
+        Constructor
+        :param evaluator: (optional) not used by the search, kept for compatibility with the other engines
+        :param max_moves: maximum number of moves of the attacker in the mates searched
+        :param checks_only: if True, the attacker only considers checking moves. Otherwise, all of its moves are considered, which finds mates with quiet moves at a much higher cost.
+        :param time_limit: (optional) maximum number of seconds per search
+        :param fallback_engine: (optional) engine used when no mate is found. Otherwise, no move is returned in that case.
+        :param on_iteration: (optional) callback invoked with the search statistics every time a number of moves is searched
+        """
+        super().__init__(evaluator, on_iteration)
+        self._max_moves = max_moves
+        self._checks_only = checks_only
+        self._time_limit = time_limit
+        self._fallback_engine = fallback_engine
+
+        self._stats = SearchStats()
+        self._deadline = None
+        # mating lines found for attacker positions, by hash
+        self._proven: dict[int, list[Move]] = {}
+        # maximum number of moves for which attacker positions were proven not to be mates, by hash
+        self._disproven: dict[int, int] = {}
+
+    def calculate_move(self, board_state: BoardState) -> tuple[Move, float, list[Move], SearchStats]:
+        self._stats = SearchStats()
+        self._deadline = time.perf_counter() + self._time_limit if self._time_limit is not None else None
+        self._proven = {}
+        self._disproven = {}
+
+        if not board_state.get_legal_moves():
+            self._stats.finish()
+            score = -Evaluator.SCORE_WIN if board_state.is_checkmate() else Evaluator.SCORE_DRAW
+            return None, score, [], self._stats
+
+        for moves in range(1, self._max_moves + 1):
+            try:
+                sequence = self._attack(board_state, moves, 0)
+            except SearchAborted:
+                break
+
+            depth = 2 * moves - 1
+            if sequence:
+                self._stats.finish_iteration(depth, Evaluator.SCORE_WIN, sequence, moves)
+                self._report_iteration(self._stats)
+                self._stats.finish()
+                return sequence[0], Evaluator.SCORE_WIN, sequence, self._stats
+
+            self._stats.finish_iteration(depth, Evaluator.SCORE_DRAW, [])
+            self._report_iteration(self._stats)
+
+        self._stats.finish()
+        if self._fallback_engine is not None:
+            return self._fallback_engine.calculate_move(board_state)
+        return None, Evaluator.SCORE_DRAW, [], self._stats
+
+    def _attack(self, board_state: BoardState, moves: int, ply: int) -> list[Move] | None:
+        """
+        Searches a mate for the active player (OR node)
+        :param board_state: the position
+        :param moves: maximum number of moves of the active player until the mate
+        :param ply: distance to the root
+        :return: the mating line, or None if there is no mate in the given number of moves
+        """
+        self._visit_node(ply)
+        hash = board_state.hash
+        proven = self._proven.get(hash)
+        if proven is not None and (len(proven) + 1) // 2 <= moves:
+            return proven
+        if self._disproven.get(hash, 0) >= moves:
+            return None
+
+        candidates = []
+        for move in board_state.get_legal_moves():
+            new_board_state = board_state.perform_move(move, update=False)
+            if self._checks_only and not new_board_state.is_in_check():
+                continue
+
+            replies = new_board_state.get_legal_moves()
+            if not replies:
+                if new_board_state.is_checkmate():
+                    self._proven[hash] = [move]
+                    return [move]
+                # stalemate or insufficient material
+                continue
+            candidates.append((len(replies), move, new_board_state))
+
+        if moves > 1:
+            # fewest escapes first
+            candidates.sort(key=lambda candidate: candidate[0])
+            for _, move, new_board_state in candidates:
+                sequence = self._defend(new_board_state, moves - 1, ply + 1)
+                if sequence is not None:
+                    sequence = [move] + sequence
+                    self._proven[hash] = sequence
+                    return sequence
+
+        self._disproven[hash] = moves
+        return None
+
+    def _defend(self, board_state: BoardState, moves: int, ply: int) -> list[Move] | None:
+        """
+        Checks that every reply of the active player gets mated (AND node)
+        :param board_state: the position, with at least one legal move
+        :param moves: maximum number of moves of the attacker until the mate
+        :param ply: distance to the root
+        :return: the mating line after the reply that delays the mate the most, or None if any reply escapes it
+        """
+        self._visit_node(ply)
+        longest_sequence = None
+        for reply in self._order_replies(board_state, board_state.get_legal_moves()):
+            sequence = self._attack(board_state.perform_move(reply, update=False), moves, ply + 1)
+            if sequence is None:
+                return None
+            if longest_sequence is None or len(sequence) + 1 > len(longest_sequence):
+                longest_sequence = [reply] + sequence
+        return longest_sequence
+
+    @staticmethod
+    def _order_replies(board_state: BoardState, replies: list[Move]) -> list[Move]:
+        """
+        Sorts the replies of the defender so that the ones most likely to escape the mate come first: captures, then king moves
+        """
+        king_square = None
+        for piece, square in board_state.get_all_pieces_by_color(board_state.white_to_move):
+            if piece.type == PieceType.KING:
+                king_square = square
+                break
+
+        def priority(reply: Move) -> int:
+            if reply.en_passant or board_state.get_piece_on_square(reply.dest_square) is not None:
+                return 2
+            if reply.origin_square == king_square:
+                return 1
+            return 0
+
+        return sorted(replies, key=priority, reverse=True)
+
+    def _visit_node(self, ply: int):
+        """
+        Counts a node and aborts the search if the time limit was exceeded
+        """
+        stats = self._stats
+        stats.nodes += 1
+        if ply > stats.seldepth:
+            stats.seldepth = ply
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchAborted()
@@ -0,0 +1,343 @@
+import math
+import time
+from array import array
+from copy import deepcopy
+from typing import Callable
+
+from domain.engine.engine import Engine
+from domain.engine.search_stats import SearchStats
+from domain.evaluator.evaluator import Evaluator
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+
+
+class MCTSEngine(Engine):
+    """
+    Monte Carlo tree search engine using the PUCT selection rule.
+    The tree is stored in flat arrays of node statistics indexed by node id, where the children of a node occupy a
+    contiguous block of ids. Leaves are collected using virtual loss and evaluated in batches with Evaluator.evaluate_many.
+    The subtree of the position reached after the engine's move (and the opponent's reply) is kept for the next search.
+    """
+
+    ROOT = 0
+    UNEXPANDED = -1
+    NO_PARENT = -1
+    VIRTUAL_LOSS = 1.0
+    MAX_VALUE = 0.999999
+
+    def __init__(self,
+                 evaluator: Evaluator,
+                 simulations: int = 800,
+                 batch_size: int = 16,
+                 time_limit: float = None,
+                 exploration: float = 1.5,
+                 value_scale: float = 4.0,
+                 max_nodes: int = 1_000_000,
+                 on_iteration: Callable[[SearchStats], None] = None):
+        """
+        Constructor
+        :param evaluator: the evaluator used to score the leaves
+        :param simulations: number of simulations per search, including the ones kept from a reused tree
+        :param batch_size: maximum number of leaves evaluated at once
+        :param time_limit: (optional) maximum number of seconds per search
+        :param exploration: exploration constant of the PUCT formula
+        :param value_scale: score that maps to a value of tanh(1) (~76% expected result)
+        :param max_nodes: maximum number of nodes in the tree. The search stops when it's reached.
+        :param on_iteration: (optional) callback invoked with the search statistics after every batch of simulations
+        """
+        super().__init__(evaluator, on_iteration)
+        self._simulations = simulations
+        self._batch_size = batch_size
+        self._time_limit = time_limit
+        self._exploration = exploration
+        self._value_scale = value_scale
+        self._max_nodes = max_nodes
+
+        self._root_board: BoardState | None = None
+        self._stats = SearchStats()
+        self._clear_tree()
+
+    def calculate_move(self, board_state: BoardState) -> tuple[Move, float, list[Move], SearchStats]:
+        self._stats = SearchStats()
+        self._stop_requested = False
+        if not self._reuse_tree(board_state):
+            self._clear_tree()
+            self._add_node(MCTSEngine.NO_PARENT, None, 1.0)
+        self._root_board = deepcopy(board_state)
+        self._evaluator.prepare(self._root_board)
+        self._hashes[MCTSEngine.ROOT] = board_state.hash
+
+        t_0 = time.time()
+        while self._visits[MCTSEngine.ROOT] < self._simulations:
+            if self._time_limit is not None and time.time() - t_0 >= self._time_limit:
+                break
+            if len(self._visits) >= self._max_nodes:
+                break
+            if self._num_children[MCTSEngine.ROOT] == 0:
+                # game over in the root position
+                break
+            self._run_batch(min(self._batch_size, self._simulations - self._visits[MCTSEngine.ROOT]))
+
+            best_child = self._most_visited_child(MCTSEngine.ROOT)
+            if best_child is not None:
+                sequence = self._principal_variation(best_child)
+                self._stats.finish_iteration(len(sequence), self._value_to_score(self._mean_value(best_child)), sequence)
+                self._report_iteration(self._stats)
+            if self._stop_requested:
+                break
+
+        self._stats.finish()
+        best_child = self._most_visited_child(MCTSEngine.ROOT)
+        if best_child is None:
+            return None, self._evaluator.evaluate(board_state) * (1 if board_state.white_to_move else -1), [], self._stats
+
+        return self._moves[best_child], self._value_to_score(self._mean_value(best_child)), self._principal_variation(best_child), self._stats
+
+    def _run_batch(self, size: int):
+        """
+        Selects up to the given number of leaves, evaluates them at once and backpropagates the results
+        :param size: the number of leaves to select
+        """
+        nodes = []
+        board_states = []
+        selected = set()
+        for _ in range(size):
+            node, board_state = self._select_leaf()
+            if node in selected:
+                # the same leaf was reached twice, it's evaluated only once
+                self._revert_virtual_loss(node)
+                continue
+            selected.add(node)
+            nodes.append(node)
+            board_states.append(board_state)
+
+        self._stats.nodes += len(nodes)
+        scores = self._evaluator.evaluate_many(board_states)
+        for node, board_state, score in zip(nodes, board_states, scores):
+            self._backpropagate(node, self._score_to_value(score, board_state))
+
+    def _select_leaf(self) -> tuple[int, BoardState]:
+        """
+        Descends the tree following the PUCT rule until reaching an unexpanded or terminal node, expanding it.
+        Virtual loss is applied to every node in the path.
+        :return: a tuple with the id of the leaf and its position
+        """
+        node = MCTSEngine.ROOT
+        board_state = self._root_board
+        depth = 0
+        while True:
+            self._visits[node] += 1
+            self._value_sums[node] -= MCTSEngine.VIRTUAL_LOSS
+
+            if self._num_children[node] <= 0:
+                if depth > self._stats.seldepth:
+                    self._stats.seldepth = depth
+                if self._num_children[node] == MCTSEngine.UNEXPANDED:
+                    self._expand(node, board_state)
+                return node, board_state
+
+            node = self._select_child(node)
+            board_state = board_state.perform_move(self._moves[node], update=False)
+            depth += 1
+
+    def _select_child(self, node: int) -> int:
+        """
+        Selects the child of a node with the highest PUCT score
+        :param node: the node id
+        :return: the id of the selected child
+        """
+        first_child = self._first_child[node]
+        sqrt_visits = math.sqrt(self._visits[node])
+        best_child = first_child
+        best_score = -math.inf
+        for child in range(first_child, first_child + self._num_children[node]):
+            visits = self._visits[child]
+            q = self._value_sums[child] / visits if visits else 0.0
+            u = self._exploration * self._priors[child] * sqrt_visits / (1 + visits)
+            if q + u > best_score:
+                best_score = q + u
+                best_child = child
+        return best_child
+
+    def _expand(self, node: int, board_state: BoardState):
+        """
+        Creates the children of a node
+        :param node: the node id
+        :param board_state: the position of the node
+        """
+        self._hashes[node] = board_state.hash
+        moves = board_state.get_legal_moves()
+        self._first_child[node] = len(self._visits)
+        self._num_children[node] = len(moves)
+        if not moves:
+            return
+        for move, prior in zip(moves, self._calculate_priors(board_state, moves)):
+            self._add_node(node, move, prior)
+
+    def _calculate_priors(self, board_state: BoardState, moves: list[Move]) -> list[float]:
+        """
+        Calculates the prior probability of each move. Uniform by default, engines with a policy should override it.
+        :param board_state: the position
+        :param moves: the legal moves in the position
+        :return: the prior of each move, in the same order
+        """
+        return [1 / len(moves)] * len(moves)
+
+    def _backpropagate(self, node: int, value: float):
+        """
+        Adds the value of a leaf to all the nodes in its path, replacing the virtual loss
+        :param node: the id of the leaf
+        :param value: the value of the leaf for the player that moved into it
+        """
+        while node != MCTSEngine.NO_PARENT:
+            self._value_sums[node] += MCTSEngine.VIRTUAL_LOSS + value
+            value = -value
+            node = self._parents[node]
+
+    def _revert_virtual_loss(self, node: int):
+        """
+        Removes the virtual loss from all the nodes in the path of a leaf that won't be evaluated
+        :param node: the id of the leaf
+        """
+        while node != MCTSEngine.NO_PARENT:
+            self._visits[node] -= 1
+            self._value_sums[node] += MCTSEngine.VIRTUAL_LOSS
+            node = self._parents[node]
+
+    def _score_to_value(self, score: float, board_state: BoardState) -> float:
+        """
+        Maps a score for white to a value in [-1, 1] for the player that moved into the position
+        :param score: the score for white
+        :param board_state: the evaluated position
+        :return: the value
+        """
+        value = math.tanh(score / self._value_scale)
+        return -value if board_state.white_to_move else value
+
+    def _value_to_score(self, value: float) -> float:
+        """
+        Maps a value in [-1, 1] back to a score
+        :param value: the value
+        :return: the score
+        """
+        if abs(value) > MCTSEngine.MAX_VALUE:
+            return math.copysign(Evaluator.SCORE_WIN, value)
+        return math.atanh(value) * self._value_scale
+
+    def _principal_variation(self, node: int) -> list[Move]:
+        """
+        :param node: the node id
+        :return: the move leading to the node followed by the most visited path below it
+        """
+        sequence = []
+        while node is not None:
+            sequence.append(self._moves[node])
+            node = self._most_visited_child(node)
+        return sequence
+
+    def _mean_value(self, node: int) -> float:
+        return self._value_sums[node] / self._visits[node] if self._visits[node] else 0.0
+
+    def _most_visited_child(self, node: int) -> int | None:
+        """
+        :param node: the node id
+        :return: the id of the most visited child, or None if the node has no visited children
+        """
+        if self._num_children[node] <= 0:
+            return None
+        first_child = self._first_child[node]
+        children = range(first_child, first_child + self._num_children[node])
+        best_child = max(children, key=lambda child: self._visits[child])
+        return best_child if self._visits[best_child] else None
+
+    def _reuse_tree(self, board_state: BoardState) -> bool:
+        """
+        Looks for the position among the root of the previous search, its children and its grandchildren.
+        If found, the tree is re-rooted on it, discarding the rest of the nodes.
+        :param board_state: the position to search
+        :return: True if the tree was reused, False otherwise
+        """
+        if self._root_board is None or not self._visits:
+            return False
+
+        candidates = [MCTSEngine.ROOT]
+        for _ in range(2):
+            children = []
+            for node in candidates:
+                if self._num_children[node] > 0:
+                    children.extend(range(self._first_child[node], self._first_child[node] + self._num_children[node]))
+            candidates += children
+
+        for node in candidates:
+            if self._hashes[node] == board_state.hash and self._num_children[node] != MCTSEngine.UNEXPANDED:
+                self._reroot(node)
+                return True
+
+        return False
+
+    def _reroot(self, new_root: int):
+        """
+        Rebuilds the node arrays keeping only the subtree of the given node, which becomes the root
+        :param new_root: the id of the new root
+        """
+        old_tree = self._tree()
+        self._clear_tree()
+        self._copy_node(old_tree, new_root, MCTSEngine.NO_PARENT)
+
+        pending = [(new_root, MCTSEngine.ROOT)]
+        while pending:
+            old_node, new_node = pending.pop()
+            num_children = old_tree['num_children'][old_node]
+            if num_children <= 0:
+                continue
+            old_first_child = old_tree['first_child'][old_node]
+            self._first_child[new_node] = len(self._visits)
+            for i in range(num_children):
+                self._copy_node(old_tree, old_first_child + i, new_node)
+                pending.append((old_first_child + i, self._first_child[new_node] + i))
+
+    def _copy_node(self, tree: dict, node: int, parent: int):
+        """
+        Appends a copy of a node of another tree, leaving it unexpanded until its children are copied
+        :param tree: the arrays of the other tree
+        :param node: the id of the node in the other tree
+        :param parent: the id of the parent in this tree
+        """
+        self._add_node(parent, tree['moves'][node], tree['priors'][node])
+        new_node = len(self._visits) - 1
+        self._visits[new_node] = tree['visits'][node]
+        self._value_sums[new_node] = tree['value_sums'][node]
+        self._num_children[new_node] = tree['num_children'][node]
+        self._hashes[new_node] = tree['hashes'][node]
+
+    def _add_node(self, parent: int, move: Move | None, prior: float):
+        self._parents.append(parent)
+        self._moves.append(move)
+        self._priors.append(prior)
+        self._visits.append(0)
+        self._value_sums.append(0.0)
+        self._first_child.append(0)
+        self._num_children.append(MCTSEngine.UNEXPANDED)
+        self._hashes.append(0)
+
+    def _tree(self) -> dict:
+        return {
+            'parents': self._parents,
+            'moves': self._moves,
+            'priors': self._priors,
+            'visits': self._visits,
+            'value_sums': self._value_sums,
+            'first_child': self._first_child,
+            'num_children': self._num_children,
+            'hashes': self._hashes,
+        }
+
+    def _clear_tree(self):
+        self._parents = array('i')
+        self._moves: list[Move | None] = []
+        self._priors = array('d')
+        self._visits = array('i')
+        self._value_sums = array('d')
+        self._first_child = array('i')
+        self._num_children = array('i')
+        self._hashes = array('Q')
@@ -0,0 +1,33 @@
+import abc
+from abc import abstractmethod
+
+from domain.engine.transposition_table import Bound, TranspositionEntry
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+
+
+class AnalysisCache(abc.ABC):
+    """
+    Persistent store of search results shared between searches, processes and executions
+    """
+
+    @abstractmethod
+    def probe(self, board_state: BoardState) -> TranspositionEntry | None:
+        """
+        Returns the search result stored for a position
+        :param board_state: the position
+        :return: the stored entry, or None if the position is not stored
+        """
+        raise NotImplemented
+
+    @abstractmethod
+    def store(self, board_state: BoardState, depth: int, bound: Bound, score: float, move: Move | None):
+        """
+        Stores the result of searching a position
+        :param board_state: the position
+        :param depth: the remaining depth of the search
+        :param bound: whether the score is exact or a lower or upper bound
+        :param score: the score for the active player
+        :param move: the best move found, if any
+        """
+        raise NotImplemented
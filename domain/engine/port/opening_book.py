@@ -0,0 +1,29 @@
+import abc
+from abc import abstractmethod
+
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+
+
+class OpeningBook(abc.ABC):
+    """
+    Collection of known moves for opening positions
+    """
+
+    @abstractmethod
+    def get_moves(self, board_state: BoardState) -> list[tuple[Move, int]]:
+        """
+        Returns the book moves for a position
+        :param board_state: the position
+        :return: list of tuples with each legal book move and its weight, sorted by descending weight
+        """
+        raise NotImplemented
+
+    @abstractmethod
+    def choose_move(self, board_state: BoardState) -> Move | None:
+        """
+        Selects one of the book moves for a position
+        :param board_state: the position
+        :return: the selected move, or None if the position is not in the book
+        """
+        raise NotImplemented
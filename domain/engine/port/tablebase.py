@@ -0,0 +1,40 @@
+import abc
+from abc import abstractmethod
+
+from domain.game.model.board import BoardState
+
+
+class Tablebase(abc.ABC):
+    """
+    Precalculated exact results of endgames with few pieces
+    """
+
+    WIN = 1
+    DRAW = 0
+    LOSS = -1
+
+    @property
+    @abstractmethod
+    def max_pieces(self) -> int:
+        """
+        :return: the maximum number of pieces (kings included) of the positions that can be probed
+        """
+        raise NotImplemented
+
+    @abstractmethod
+    def probe_wdl(self, board_state: BoardState) -> int | None:
+        """
+        Returns the result of a position with perfect play
+        :param board_state: the position
+        :return: WIN, DRAW or LOSS for the active player, or None if the position is not in the tablebase
+        """
+        raise NotImplemented
+
+    @abstractmethod
+    def probe_dtm(self, board_state: BoardState) -> int | None:
+        """
+        Returns the distance to mate of a position with perfect play
+        :param board_state: the position
+        :return: the number of plies until checkmate (odd if the active player delivers it, even if it receives it), or None if the position is drawn or is not in the tablebase
+        """
+        raise NotImplemented
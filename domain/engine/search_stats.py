@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import time
+
+from domain.game.model.move import Move
+
+
+class IterationInfo:
+    """
+    Summary of one iteration of a search (a completed depth for iterative deepening, a batch of simulations for MCTS)
+    """
+    __slots__ = ('depth', 'score', 'mate', 'nodes', 'quiescence_nodes', 'time', 'pv')
+
+    def __init__(self, depth: int, score: float, nodes: int, quiescence_nodes: int, time: float, pv: list[Move], mate: int = None):
+        """
+        Constructor
+        :param depth: depth reached by the iteration
+        :param score: score of the best move for the active player
+        :param nodes: total nodes searched when the iteration ended, including previous iterations
+        :param quiescence_nodes: total quiescence nodes searched when the iteration ended
+        :param time: seconds spent on the iteration
+        :param pv: principal variation found by the iteration
+        :param mate: (optional) number of moves to deliver mate (negative if the active player gets mated)
+        """
+        self.depth = depth
+        self.score = score
+        self.mate = mate
+        self.nodes = nodes
+        self.quiescence_nodes = quiescence_nodes
+        self.time = time
+        self.pv = pv
+
+
+class SearchStats:
+    """
+    Counters filled in by the engines during a search. Fields are plain attributes so that updating them is as cheap as possible.
+    """
+    __slots__ = ('nodes', 'quiescence_nodes', 'tt_probes', 'tt_hits', 'tt_cutoffs', 'cache_probes', 'cache_hits',
+                 'beta_cutoffs', 'first_move_cutoffs', 'tablebase_hits', 'seldepth', 'iterations', '_start_time', '_end_time', '_iteration_start_time')
+
+    def __init__(self):
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.cache_probes = 0
+        self.cache_hits = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tablebase_hits = 0
+        self.seldepth = 0
+        self.iterations: list[IterationInfo] = []
+
+        self._start_time = time.perf_counter()
+        self._end_time = None
+        self._iteration_start_time = self._start_time
+
+    def finish_iteration(self, depth: int, score: float, pv: list[Move], mate: int = None) -> IterationInfo:
+        """
+        Records the end of an iteration
+        :param depth: depth reached by the iteration
+        :param score: score of the best move for the active player
+        :param pv: principal variation found by the iteration
+        :param mate: (optional) number of moves to deliver mate (negative if the active player gets mated)
+        :return: the recorded iteration
+        """
+        now = time.perf_counter()
+        iteration = IterationInfo(depth, score, self.nodes, self.quiescence_nodes, now - self._iteration_start_time, pv, mate)
+        self.iterations.append(iteration)
+        self._iteration_start_time = now
+        return iteration
+
+    def finish(self):
+        """
+        Records the end of the search
+        """
+        self._end_time = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """
+        :return: seconds spent on the search (so far, if it hasn't finished)
+        """
+        end_time = self._end_time if self._end_time is not None else time.perf_counter()
+        return end_time - self._start_time
+
+    @property
+    def depth(self) -> int:
+        """
+        :return: depth of the last completed iteration
+        """
+        return self.iterations[-1].depth if self.iterations else 0
+
+    @property
+    def total_nodes(self) -> int:
+        """
+        :return: regular plus quiescence nodes
+        """
+        return self.nodes + self.quiescence_nodes
+
+    @property
+    def nps(self) -> float:
+        """
+        :return: nodes (regular plus quiescence) searched per second
+        """
+        elapsed = self.elapsed
+        return self.total_nodes / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        """
+        :return: fraction of transposition table probes that found the position
+        """
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """
+        :return: fraction of analysis cache probes that found the position
+        """
+        return self.cache_hits / self.cache_probes if self.cache_probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """
+        :return: fraction of beta cutoffs produced by the first move searched. A measure of move ordering quality.
+        """
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    @property
+    def effective_branching_factor(self) -> float:
+        """
+        :return: ratio between the nodes searched by the last two iterations, or 0 if there are less than two
+        """
+        if len(self.iterations) < 2:
+            return 0.0
+        previous_nodes = self.iterations[-2].nodes + self.iterations[-2].quiescence_nodes
+        if len(self.iterations) > 2:
+            previous_nodes -= self.iterations[-3].nodes + self.iterations[-3].quiescence_nodes
+        last_nodes = self.iterations[-1].nodes + self.iterations[-1].quiescence_nodes - self.iterations[-2].nodes - self.iterations[-2].quiescence_nodes
+        return last_nodes / previous_nodes if previous_nodes else 0.0
+
+    def __str__(self):
+        return (f'depth {self.depth} seldepth {self.seldepth} '
+                f'nodes {self.nodes} qnodes {self.quiescence_nodes} nps {self.nps:.0f} '
+                f'tt hits {self.tt_hit_rate:.1%} tt cutoffs {self.tt_cutoffs} cache hits {self.cache_hit_rate:.1%} '
+                f'first move cutoffs {self.first_move_cutoff_rate:.1%} tb hits {self.tablebase_hits} ebf {self.effective_branching_factor:.2f} '
+                f'time {self.elapsed:.3f}s '
+                f'iterations [{", ".join([f"{iteration.time:.3f}s" for iteration in self.iterations])}]')
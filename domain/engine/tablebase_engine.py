@@ -0,0 +1,102 @@
+from domain.engine.engine import Engine
+from domain.engine.port.tablebase import Tablebase
+from domain.engine.search_stats import SearchStats
+from domain.evaluator.evaluator import Evaluator
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+
+
+class TablebaseEngine(Engine):
+    """
+    Plays perfect moves without searching while the position is in an endgame tablebase, and delegates to another
+    engine otherwise. Won positions are converted with the fastest mate, lost positions are defended with the slowest
+    one and drawn positions keep the draw.
+    """
+
+    def __init__(self, engine: Engine, tablebase: Tablebase):
+        """
+        Constructor
+        :param engine: the engine used for positions that aren't in the tablebase
+        :param tablebase: the tablebase
+        """
+        super().__init__(engine.evaluator, engine.on_iteration)
+        self._engine = engine
+        self._tablebase = tablebase
+
+    def stop(self):
+        self._engine.stop()
+
+    def clear(self):
+        self._engine.clear()
+
+    def calculate_move(self, board_state: BoardState) -> tuple[Move, float, list[Move], SearchStats]:
+        stats = SearchStats()
+        result = self._get_best_move(board_state, stats)
+        if result is None:
+            return self._engine.calculate_move(board_state)
+
+        move, wdl, dtm = result
+        sequence = [move]
+        if wdl != Tablebase.DRAW:
+            # follow the perfect play until the mate
+            new_board_state = board_state.perform_move(move, update=False)
+            for _ in range(dtm - 1):
+                next_result = self._get_best_move(new_board_state, stats)
+                if next_result is None:
+                    break
+                sequence.append(next_result[0])
+                new_board_state.perform_move(next_result[0], update=True)
+
+        if wdl == Tablebase.WIN:
+            score = Evaluator.SCORE_WIN
+            mate = (dtm + 1) // 2
+        elif wdl == Tablebase.LOSS:
+            score = -Evaluator.SCORE_WIN
+            mate = -(dtm // 2)
+        else:
+            score = Evaluator.SCORE_DRAW
+            mate = None
+        stats.finish_iteration(len(sequence), score, sequence, mate)
+        self._report_iteration(stats)
+        stats.finish()
+        return move, score, sequence, stats
+
+    def _get_best_move(self, board_state: BoardState, stats: SearchStats) -> tuple[Move, int, int] | None:
+        """
+        Finds the move that keeps the result of the position with the best distance to mate
+        :param board_state: the position
+        :param stats: the statistics where the probes are counted
+        :return: tuple with the move, the result and the distance to mate in plies (0 for draws), or None if the position or the moves that keep its result are not in the tablebase
+        """
+        wdl = self._probe(board_state, stats)
+        if wdl is None or not board_state.get_legal_moves():
+            return None
+
+        best_move = None
+        best_key = None
+        best_dtm = 0
+        for move in board_state.get_legal_moves():
+            new_board_state = board_state.perform_move(move, update=False)
+            child_wdl = self._probe(new_board_state, stats)
+            if child_wdl is None:
+                continue
+            child_dtm = self._tablebase.probe_dtm(new_board_state) if child_wdl != Tablebase.DRAW else 0
+            # the opponent's result, reversed, then the fastest mate when winning and the slowest when losing
+            key = (-child_wdl, -child_dtm if child_wdl == Tablebase.LOSS else child_dtm)
+            if best_key is None or key > best_key:
+                best_move = move
+                best_key = key
+                best_dtm = child_dtm + 1 if child_wdl != Tablebase.DRAW else 0
+
+        if best_key is None or best_key[0] != wdl:
+            # the moves that keep the result are not in the tablebase (i.e.: en passant captures)
+            return None
+        return best_move, wdl, best_dtm
+
+    def _probe(self, board_state: BoardState, stats: SearchStats) -> int | None:
+        if board_state.piece_count > self._tablebase.max_pieces:
+            return None
+        wdl = self._tablebase.probe_wdl(board_state)
+        if wdl is not None:
+            stats.tablebase_hits += 1
+        return wdl
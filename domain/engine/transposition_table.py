@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from enum import Enum
+
+from domain.game.model.move import Move
+
+
+class Bound(Enum):
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+class TranspositionEntry:
+    __slots__ = ('hash', 'depth', 'bound', 'score', 'move')
+
+    def __init__(self, hash: int, depth: int, bound: Bound, score: float, move: Move | None):
+        self.hash = hash
+        self.depth = depth
+        self.bound = bound
+        self.score = score
+        self.move = move
+
+
+class TranspositionTable:
+    """
+    Fixed-size, direct-mapped table of search results indexed by the hash of the position
+    """
+
+    def __init__(self, size: int = 2 ** 20):
+        """
+        Constructor
+        :param size: number of entries. It's rounded down to a power of two.
+        """
+        self._size = 1 << (max(1, size).bit_length() - 1)
+        self._mask = self._size - 1
+        self._entries: list[TranspositionEntry | None] = [None] * self._size
+        self._used = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def probe(self, hash: int) -> TranspositionEntry | None:
+        """
+        Returns the entry stored for a position
+        :param hash: the hash of the position
+        :return: the entry, or None if the position is not stored
+        """
+        entry = self._entries[hash & self._mask]
+        if entry is not None and entry.hash == hash:
+            return entry
+        return None
+
+    def store(self, hash: int, depth: int, bound: Bound, score: float, move: Move | None):
+        """
+        Stores the result of searching a position. A different position in the same slot is always replaced, while
+        the same position is only replaced by a search at least as deep.
+        :param hash: the hash of the position
+        :param depth: the remaining depth of the search
+        :param bound: whether the score is exact or a lower or upper bound
+        :param score: the score
+        :param move: the best move found, if any
+        """
+        index = hash & self._mask
+        entry = self._entries[index]
+        if entry is None:
+            self._used += 1
+        elif entry.hash == hash and entry.depth > depth:
+            return
+        self._entries[index] = TranspositionEntry(hash, depth, bound, score, move)
+
+    def hashfull(self) -> int:
+        """
+        :return: occupation of the table in permille
+        """
+        return self._used * 1000 // self._size
+
+    def clear(self):
+        self._entries = [None] * self._size
+        self._used = 0
@@ -1,8 +1,10 @@
 import math
 import abc
 from abc import abstractmethod
+from array import array
 
 from domain.game.model.board import BoardState
+from domain.game.model.game_status import GameStatus
 
 
 class Evaluator(abc.ABC):
@@ -10,23 +12,93 @@ class Evaluator(abc.ABC):
     SCORE_DRAW = 0
     SCORE_WIN = math.inf
 
+    def __init__(self, cache_size: int = 2 ** 16):
+        """
+        Constructor
+        :param cache_size: number of entries of the evaluation cache, rounded down to a power of two. 0 disables the cache.
+        """
+        size = 1 << (cache_size.bit_length() - 1) if cache_size > 0 else 0
+        self._cache_mask = size - 1
+        # direct-mapped table: the slot of a position is given by the lowest bits of its hash
+        self._cache_keys = array('Q', bytes(8 * size))
+        self._cache_scores = array('d', bytes(8 * size))
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     def evaluate(self, board_state: BoardState) -> float:
         """
-        Evaluates a position on the board and generates a score for the white pieces
+        Evaluates a position on the board and generates a score for the white pieces.
+        Scores are cached by the hash of the position, so positions reached again (i.e.: through transpositions) are not evaluated twice.
+        :param board_state: the board state to evaluate
+        :return: the score for white
+        """
+        if not self._cache_keys or board_state.is_repetition() or board_state.is_fifty_move_draw():
+            # draws that depend on the history of the game, not only on the position, can't be cached
+            return self._evaluate_position(board_state)
+
+        hash = board_state.hash
+        slot = hash & self._cache_mask
+        if self._cache_keys[slot] == hash:
+            self.cache_hits += 1
+            return self._cache_scores[slot]
+
+        self.cache_misses += 1
+        score = self._evaluate_position(board_state)
+        self._cache_keys[slot] = hash
+        self._cache_scores[slot] = score
+        return score
+
+    def evaluate_many(self, board_states: list[BoardState]) -> list[float]:
+        """
+        Evaluates a batch of positions. Evaluators that can score several positions at once (i.e.: vectorized or learned evaluators) should override it.
+        :param board_states: the board states to evaluate
+        :return: the score for white of each position, in the same order
+        """
+        return [self.evaluate(board_state) for board_state in board_states]
+
+    def prepare(self, board_state: BoardState):
+        """
+        Called by the engines on the root position before searching it. Evaluators that keep incremental state on the
+        board (i.e.: an Accumulator) can attach it here, so that it is updated along every line searched from the root.
+        :param board_state: the root position
+        """
+        pass
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """
+        :return: fraction of the evaluations answered by the cache
+        """
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def clear_cache(self):
+        """
+        Empties the evaluation cache and resets its counters
+        """
+        self._cache_keys = array('Q', bytes(8 * len(self._cache_keys)))
+        self._cache_scores = array('d', bytes(8 * len(self._cache_scores)))
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _evaluate_position(self, board_state: BoardState) -> float:
+        """
+        Evaluates a position: finished games by their status, the rest with the concrete evaluator
         :param board_state: the board state to evaluate
         :return: the score for white
         """
-        if board_state.is_checkmate():
+        status = board_state.game_status()
+        if status == GameStatus.CHECKMATE:
             if not board_state.white_to_move:
                 return Evaluator.SCORE_WIN
             else:
                 return -Evaluator.SCORE_WIN
 
-        if board_state.is_stalemate() or board_state.cant_checkmate():
+        if status != GameStatus.PLAYING:
             return Evaluator.SCORE_DRAW
 
         return self._evaluate(board_state)
 
     @abstractmethod
     def _evaluate(self, board_state: BoardState) -> float:
-        raise NotImplemented
\ No newline at end of file
+        raise NotImplemented
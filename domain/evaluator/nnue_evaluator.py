@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import numpy as np
+
+from domain.evaluator.evaluator import Evaluator
+from domain.evaluator.nnue_network import NNUENetwork
+from domain.game.model.accumulator import Accumulator
+from domain.game.model.board import BoardState
+from domain.game.model.pieces import Piece, PieceType
+from domain.game.model.square import Square
+
+
+class _AccumulatorNode:
+    """
+    Immutable link in the chain of positions derived from each other: the pieces changed since the parent position,
+    and the accumulators of both sides once they are calculated
+    """
+
+    __slots__ = ['parent', 'changes', 'king_squares', 'king_moved', 'values']
+
+    def __init__(self, parent: _AccumulatorNode | None, changes: list[tuple[Piece, Square, int]], king_squares: tuple[int, int]):
+        """
+        Constructor
+        :param parent: link of the previous position, None for the first one
+        :param changes: pieces placed (1) or removed (-1) since the previous position
+        :param king_squares: squares of the white and black kings in the previous position (8 * rank + file)
+        """
+        self.parent = parent
+        self.changes = changes
+        self.king_moved = [False, False]
+        squares = list(king_squares)
+        for piece, square, sign in changes:
+            if piece.type == PieceType.KING:
+                side = 0 if piece.is_white else 1
+                self.king_moved[side] = True
+                if sign > 0:
+                    squares[side] = 8 * square.rank + square.file
+        self.king_squares = (squares[0], squares[1])
+        self.values: tuple[np.ndarray, np.ndarray] | None = None
+
+
+class NNUEAccumulator(Accumulator):
+    """
+    First layer of an NNUE network for a position, for both sides. The updates are lazy: copies of the position share
+    the chain of previous positions, and record the pieces touched by the moves performed on them. When the position
+    is evaluated, the recorded changes are applied by adding or subtracting rows of the feature weights to the
+    accumulators of the nearest position already evaluated. A move of the king changes all the features of its side,
+    so in that case the accumulator of that side is calculated from scratch.
+    """
+
+    def __init__(self, network: NNUENetwork, node: _AccumulatorNode):
+        """
+        Constructor. Use NNUEAccumulator.create to attach an accumulator to a position.
+        :param network: the network
+        :param node: the last link of the chain of the position
+        """
+        self._network = network
+        self._node = node
+        # changes performed since the last link was created
+        self._changes: list[tuple[Piece, Square, int]] = []
+
+    @classmethod
+    def create(cls, network: NNUENetwork, board_state: BoardState) -> NNUEAccumulator:
+        """
+        Calculates the accumulators of a position from scratch
+        :param network: the network
+        :param board_state: the position
+        :return: the accumulator
+        """
+        king_squares = [0, 0]
+        for piece, square in board_state.get_all_pieces():
+            if piece.type == PieceType.KING:
+                king_squares[0 if piece.is_white else 1] = 8 * square.rank + square.file
+        node = _AccumulatorNode(None, [], (king_squares[0], king_squares[1]))
+        node.values = (network.refresh(board_state, True), network.refresh(board_state, False))
+        return cls(network, node)
+
+    @property
+    def network(self) -> NNUENetwork:
+        return self._network
+
+    def add_piece(self, piece: Piece, square: Square):
+        self._changes.append((piece, square, 1))
+
+    def remove_piece(self, piece: Piece, square: Square):
+        self._changes.append((piece, square, -1))
+
+    def copy(self) -> NNUEAccumulator:
+        return NNUEAccumulator(self._network, self._freeze())
+
+    def values(self, board_state: BoardState) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculates the accumulators of the position, if they weren't already
+        :param board_state: the position this accumulator is attached to
+        :return: the int16 accumulators of white and black
+        """
+        node = self._freeze()
+        if node.values is None:
+            node.values = (self._resolve(node, board_state, True), self._resolve(node, board_state, False))
+        return node.values
+
+    def _freeze(self) -> _AccumulatorNode:
+        """
+        Closes the changes performed so far in a new link of the chain, shared with the copies made from now on
+        :return: the last link of the chain
+        """
+        if self._changes:
+            self._node = _AccumulatorNode(self._node, self._changes, self._node.king_squares)
+            self._changes = []
+        return self._node
+
+    def _resolve(self, node: _AccumulatorNode, board_state: BoardState, white: bool) -> np.ndarray:
+        """
+        Calculates the accumulator of one side by applying the changes since the nearest calculated link of the chain
+        :param node: the link of the position
+        :param board_state: the position
+        :param white: the side
+        :return: the int16 accumulator
+        """
+        side = 0 if white else 1
+        king_square = node.king_squares[side]
+        pending = []
+        while node.values is None:
+            if node.king_moved[side]:
+                return self._network.refresh(board_state, white)
+            pending.append(node.changes)
+            node = node.parent
+
+        added = []
+        removed = []
+        for changes in pending:
+            for piece, square, sign in changes:
+                if piece.type == PieceType.KING:
+                    # the other king isn't a feature
+                    continue
+                index =self._network.feature_index(piece, 8 * square.rank + square.file, king_square, white)
+                if sign > 0:
+                    added.append(index)
+                else:
+                    removed.append(index)
+
+        values = node.values[side].copy()
+        weights = self._network.feature_weights
+        if added:
+            values += weights[added].sum(axis=0, dtype=np.int16)
+        if removed:
+            values -= weights[removed].sum(axis=0, dtype=np.int16)
+        return values
+
+
+class NNUEEvaluator(Evaluator):
+    """
+    Evaluates positions with an efficiently updatable neural network (see NNUENetwork). The accumulators of its first
+    layer are attached to the positions and updated incrementally as moves are performed, so only the small layers
+    after it are calculated for each position.
+    """
+
+    def __init__(self, network: NNUENetwork, cache_size: int = 2 ** 16):
+        """
+        Constructor
+        :param network: the network, i.e.: loaded with NNUENetwork.load
+        :param cache_size: number of entries of the evaluation cache
+        """
+        super().__init__(cache_size)
+        self._network = network
+
+    def prepare(self, board_state: BoardState):
+        self._get_accumulator(board_state)
+
+    def _evaluate(self, board_state: BoardState) -> float:
+        """
+        :param board_state: the board state to evaluate
+        :return: the score for white, in pawns
+        """
+        white_values, black_values = self._get_accumulator(board_state).values(board_state)
+        if board_state.white_to_move:
+            return self._network.propagate(white_values, black_values)
+        return -self._network.propagate(black_values, white_values)
+
+    def _get_accumulator(self, board_state: BoardState) -> NNUEAccumulator:
+        """
+        Gets the accumulator of a position, attaching a new one if it doesn't have one of this network
+        """
+        accumulator = board_state.accumulator
+        if not isinstance(accumulator, NNUEAccumulator) or accumulator.network is not self._network:
+            accumulator = NNUEAccumulator.create(self._network, board_state)
+            board_state.accumulator = accumulator
+        return accumulator
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import os
+
+import numpy as np
+
+from domain.game.model.board import BoardState
+from domain.game.model.pieces import Piece, PieceType
+
+
+class NNUENetwork:
+    """
+    Weights of an efficiently updatable neural network with HalfKP inputs: for each side, one feature per combination
+    of the square of its king and the type, color and square of another piece (kings excluded). The first layer
+    (feature transformer) is quantized to int16 so its outputs can be accumulated incrementally, and the small layers
+    after it are float32.
+
+    The network is stored as a directory of .npy files, loaded memory-mapped: startup doesn't read the weights, and
+    processes loading the same network share the pages of the files.
+    """
+
+    # order of the non-king pieces in the features
+    PIECE_INDEXES = {
+        PieceType.PAWN: 0,
+        PieceType.KNIGHT: 1,
+        PieceType.BISHOP: 2,
+        PieceType.ROOK: 3,
+        PieceType.QUEEN: 4,
+    }
+    FEATURES = 64 * 2 * len(PIECE_INDEXES) * 64
+    # value of the accumulator that corresponds to an activation of 1.0
+    ACTIVATION_SCALE = 127
+
+    FEATURE_WEIGHTS_FILE = 'feature_weights.npy'
+    FEATURE_BIAS_FILE = 'feature_bias.npy'
+    LAYER_WEIGHTS_FILE = 'layer_{}_weights.npy'
+    LAYER_BIAS_FILE = 'layer_{}_bias.npy'
+
+    def __init__(self, feature_weights: np.ndarray, feature_bias: np.ndarray, layers: list[tuple[np.ndarray, np.ndarray]]):
+        """
+        Constructor
+        :param feature_weights: int16 array of shape (FEATURES, hidden size) with the weights of the feature transformer
+        :param feature_bias: int16 array of shape (hidden size,) with its bias
+        :param layers: weights and bias of each of the following layers, the first one taking the accumulators of both sides (2 * hidden size) and the last one giving a single output: the score in pawns for the side to move. Every layer but the last one is followed by a clipped ReLU.
+        """
+        if feature_weights.shape != (NNUENetwork.FEATURES, feature_bias.shape[0]):
+            raise ValueError(f'wrong shape of the feature weights: {feature_weights.shape}')
+        if not layers or layers[0][0].shape[0] != 2 * feature_bias.shape[0] or layers[-1][0].shape[1] != 1:
+            raise ValueError('the layers don\'t match the feature transformer or don\'t give a single output')
+
+        self.feature_weights = feature_weights
+        self.feature_bias = feature_bias
+        self.layers = layers
+
+    @property
+    def hidden_size(self) -> int:
+        """
+        :return: size of the accumulator of each side
+        """
+        return self.feature_bias.shape[0]
+
+    @classmethod
+    def load(cls, directory: str) -> NNUENetwork:
+        """
+        Loads a network memory-mapping its files
+        :param directory: directory of the network
+        :return: the network
+        """
+        feature_weights = np.load(os.path.join(directory, NNUENetwork.FEATURE_WEIGHTS_FILE), mmap_mode='r')
+        feature_bias = np.load(os.path.join(directory, NNUENetwork.FEATURE_BIAS_FILE), mmap_mode='r')
+        layers = []
+        while os.path.exists(os.path.join(directory, NNUENetwork.LAYER_WEIGHTS_FILE.format(len(layers)))):
+            weights = np.load(os.path.join(directory, NNUENetwork.LAYER_WEIGHTS_FILE.format(len(layers))), mmap_mode='r')
+            bias = np.load(os.path.join(directory, NNUENetwork.LAYER_BIAS_FILE.format(len(layers))), mmap_mode='r')
+            layers.append((weights, bias))
+        return cls(feature_weights, feature_bias, layers)
+
+    @classmethod
+    def random(cls, hidden_size: int = 256, layer_sizes: tuple[int, ...] = (32, 32), seed: int | None = None) -> NNUENetwork:
+        """
+        Creates a network with random weights, i.e.: as the starting point of a training
+        :param hidden_size: size of the accumulator of each side
+        :param layer_sizes: sizes of the hidden layers after the feature transformer
+        :param seed: (optional) seed of the random generator
+        :return: the network
+        """
+        rng = np.random.default_rng(seed)
+        feature_weights = rng.integers(-32, 33, size=(NNUENetwork.FEATURES, hidden_size), dtype=np.int16)
+        feature_bias = rng.integers(-32, 33, size=hidden_size, dtype=np.int16)
+        layers = []
+        sizes = [2 * hidden_size] + list(layer_sizes) + [1]
+        for inputs, outputs in zip(sizes, sizes[1:]):
+            weights = rng.normal(0.0, 1.0 / np.sqrt(inputs), size=(inputs, outputs)).astype(np.float32)
+            layers.append((weights, np.zeros(outputs, dtype=np.float32)))
+        return cls(feature_weights, feature_bias, layers)
+
+    def save(self, directory: str):
+        """
+        Saves the network as a directory of .npy files that can be loaded memory-mapped
+        :param directory: directory of the network. It is created if it doesn't exist.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, NNUENetwork.FEATURE_WEIGHTS_FILE), np.asarray(self.feature_weights, dtype=np.int16))
+        np.save(os.path.join(directory, NNUENetwork.FEATURE_BIAS_FILE), np.asarray(self.feature_bias, dtype=np.int16))
+        for i, (weights, bias) in enumerate(self.layers):
+            np.save(os.path.join(directory, NNUENetwork.LAYER_WEIGHTS_FILE.format(i)), np.asarray(weights, dtype=np.float32))
+            np.save(os.path.join(directory, NNUENetwork.LAYER_BIAS_FILE.format(i)), np.asarray(bias, dtype=np.float32))
+
+    @staticmethod
+    def feature_index(piece: Piece, square: int, king_square: int, white: bool) -> int:
+        """
+        Calculates the input feature of a piece from the point of view of one of the sides. Black sees the board
+        flipped, so that both sides share the weights.
+        :param piece: the piece, not a king
+        :param square: square of the piece (8 * rank + file)
+        :param king_square: square of the king of the side (8 * rank + file)
+        :param white: side whose point of view is used
+        :return: the index of the feature
+        """
+        if not white:
+            square ^= 56
+            king_square ^= 56
+        piece_index = 2 * NNUENetwork.PIECE_INDEXES[piece.type] + (piece.is_white != white)
+        return (king_square * 2 * len(NNUENetwork.PIECE_INDEXES) + piece_index) * 64 + square
+
+    def refresh(self, board_state: BoardState, white: bool) -> np.ndarray:
+        """
+        Calculates the accumulator of one of the sides from scratch
+        :param board_state: the position
+        :param white: the side
+        :return: int16 array of shape (hidden size,)
+        """
+        pieces = [(piece, 8 * square.rank + square.file) for piece, square in board_state.get_all_pieces()]
+        king_square = next(square for piece, square in pieces if piece.type == PieceType.KING and piece.is_white == white)
+        features = [self.feature_index(piece, square, king_square, white) for piece, square in pieces if piece.type != PieceType.KING]
+        # int16 arithmetic wraps around like the incremental updates, so both give the same result
+        return self.feature_bias + self.feature_weights[features].sum(axis=0, dtype=np.int16)
+
+    def propagate(self, accumulator: np.ndarray, other_accumulator: np.ndarray) -> float:
+        """
+        Calculates the output of the network from the accumulators of both sides
+        :param accumulator: accumulator of the side to move
+        :param other_accumulator: accumulator of the other side
+        :return: the score for the side to move, in pawns
+        """
+        values = np.clip(np.concatenate((accumulator, other_accumulator)), 0, NNUENetwork.ACTIVATION_SCALE)
+        values = values.astype(np.float32) / NNUENetwork.ACTIVATION_SCALE
+        for weights, bias in self.layers[:-1]:
+            values = np.clip(values @ weights + bias, 0.0, 1.0)
+        weights, bias = self.layers[-1]
+        return float((values @ weights + bias)[0])
@@ -0,0 +1,78 @@
+from array import array
+
+from domain.evaluator.pawn_structure import evaluate_pawns
+from domain.game.model.board import BoardState
+from domain.game.model.pieces import Piece, PieceType
+
+
+class PawnHashTable:
+    """
+    Direct-mapped cache of the evaluation of the pawn structure, keyed by the pawn hash of the positions. The pawns
+    change in few moves, so most positions of a search share their structure with others already evaluated.
+    """
+
+    _WHITE_PAWNS = BoardState.BITBOARD_PIECES.index(Piece(PieceType.PAWN, is_white=True))
+    _BLACK_PAWNS = BoardState.BITBOARD_PIECES.index(Piece(PieceType.PAWN, is_white=False))
+
+    def __init__(self, size: int = 2 ** 14):
+        """
+        Constructor
+        :param size: number of entries, rounded down to a power of two. 0 disables the table.
+        """
+        size = 1 << (size.bit_length() - 1) if size > 0 else 0
+        self._mask = size - 1
+        self._keys = array('Q', bytes(8 * size))
+        self._midgame_scores = array('q', bytes(8 * size))
+        self._endgame_scores = array('q', bytes(8 * size))
+        self._white_passed = array('Q', bytes(8 * size))
+        self._black_passed = array('Q', bytes(8 * size))
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: fraction of the probes answered by the table
+        """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def probe(self, board_state: BoardState) -> tuple[int, int, int, int]:
+        """
+        Gets the evaluation of the pawn structure of a position, calculating and storing it if it isn't in the table
+        :param board_state: the position
+        :return: the midgame and endgame scores for white, in centipawns, and the bitboards of the white and black passed pawns
+        """
+        if not self._keys:
+            return self._evaluate(board_state)
+
+        key = board_state.pawn_hash
+        slot = key & self._mask
+        # the empty table has keys 0, which is also the key of the positions without pawns, whose scores are 0 too
+        if self._keys[slot] == key:
+            self.hits += 1
+            return self._midgame_scores[slot], self._endgame_scores[slot], self._white_passed[slot], self._black_passed[slot]
+
+        self.misses += 1
+        entry = self._evaluate(board_state)
+        self._keys[slot] = key
+        self._midgame_scores[slot], self._endgame_scores[slot], self._white_passed[slot], self._black_passed[slot] = entry
+        return entry
+
+    def clear(self):
+        """
+        Empties the table and resets its counters
+        """
+        size = len(self._keys)
+        self._keys = array('Q', bytes(8 * size))
+        self._midgame_scores = array('q', bytes(8 * size))
+        self._endgame_scores = array('q', bytes(8 * size))
+        self._white_passed = array('Q', bytes(8 * size))
+        self._black_passed = array('Q', bytes(8 * size))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _evaluate(board_state: BoardState) -> tuple[int, int, int, int]:
+        bitboards = board_state.bitboards
+        return evaluate_pawns(bitboards[PawnHashTable._WHITE_PAWNS], bitboards[PawnHashTable._BLACK_PAWNS])
@@ -0,0 +1,68 @@
+# Evaluation terms that depend only on the placement of the pawns. Pawns are given as bitboards (bit 8 * rank + file).
+
+# penalties and bonuses in centipawns, as (midgame, endgame)
+DOUBLED_PAWN = (-10, -20)
+ISOLATED_PAWN = (-10, -15)
+BACKWARD_PAWN = (-8, -12)
+# bonus of a passed pawn by its rank, counted from its own side (the tables of the pieces already reward advanced pawns)
+PASSED_PAWN = [(0, 0), (0, 10), (5, 15), (10, 25), (20, 45), (35, 75), (60, 110), (0, 0)]
+
+_FILES = [0x0101010101010101 << file for file in range(8)]
+_ADJACENT_FILES = [(_FILES[file - 1] if file > 0 else 0) | (_FILES[file + 1] if file < 7 else 0) for file in range(8)]
+# squares of the ranks strictly in front of each rank, for white and for black
+_RANKS_AHEAD = [[(~0 << 8 * (rank + 1)) & 0xFFFFFFFFFFFFFFFF for rank in range(8)],
+                [(1 << 8 * rank) - 1 for rank in range(8)]]
+
+
+def _passed_mask(square: int, white: bool) -> int:
+    file, rank = square % 8, square // 8
+    return (_FILES[file] | _ADJACENT_FILES[file]) & _RANKS_AHEAD[0 if white else 1][rank]
+
+
+# squares that must be free of enemy pawns for a pawn on each square to be passed, for white and for black
+PASSED_MASKS = [[_passed_mask(square, True) for square in range(64)], [_passed_mask(square, False) for square in range(64)]]
+
+
+def evaluate_pawns(white_pawns: int, black_pawns: int) -> tuple[int, int, int, int]:
+    """
+    Evaluates the pawn structure: doubled, isolated, backward and passed pawns
+    :param white_pawns: bitboard of the white pawns
+    :param black_pawns: bitboard of the black pawns
+    :return: the midgame and endgame scores for white, in centipawns, and the bitboards of the white and black passed pawns
+    """
+    midgame_score = 0
+    endgame_score = 0
+    passed_pawns = [0, 0]
+    for white, pawns, enemy_pawns, sign in [(True, white_pawns, black_pawns, 1), (False, black_pawns, white_pawns, -1)]:
+        side = 0 if white else 1
+        for file in range(8):
+            on_file = (pawns & _FILES[file]).bit_count()
+            if on_file > 1:
+                midgame_score += sign * (on_file - 1) * DOUBLED_PAWN[0]
+                endgame_score += sign * (on_file - 1) * DOUBLED_PAWN[1]
+
+        remaining = pawns
+        while remaining:
+            square = (remaining & -remaining).bit_length() - 1
+            remaining &= remaining - 1
+            file, rank = square % 8, square // 8
+            relative_rank = rank if white else 7 - rank
+
+            if not enemy_pawns & PASSED_MASKS[side][square]:
+                passed_pawns[side] |= 1 << square
+                midgame_score += sign * PASSED_PAWN[relative_rank][0]
+                endgame_score += sign * PASSED_PAWN[relative_rank][1]
+
+            if not pawns & _ADJACENT_FILES[file]:
+                midgame_score += sign * ISOLATED_PAWN[0]
+                endgame_score += sign * ISOLATED_PAWN[1]
+            elif 0 < relative_rank < 6:
+                # backward: no pawn on an adjacent file can support it, and an enemy pawn controls the square in front of it
+                supporters = pawns & _ADJACENT_FILES[file] & ~_RANKS_AHEAD[side][rank]
+                stop_rank = rank + 1 if white else rank - 1
+                attackers = enemy_pawns & _ADJACENT_FILES[file] & (0xFF << 8 * (stop_rank + (1 if white else -1)))
+                if not supporters and attackers:
+                    midgame_score += sign * BACKWARD_PAWN[0]
+                    endgame_score += sign * BACKWARD_PAWN[1]
+
+    return midgame_score, endgame_score, passed_pawns[0], passed_pawns[1]
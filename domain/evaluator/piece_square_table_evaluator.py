@@ -0,0 +1,55 @@
+from domain.evaluator.evaluator import Evaluator
+from domain.evaluator.pawn_hash_table import PawnHashTable
+from domain.evaluator.pawn_structure import PASSED_PAWN
+from domain.game.model.board import BoardState
+from domain.game.model.piece_square_tables import MAX_PHASE
+
+
+class PieceSquareTableEvaluator(Evaluator):
+    """
+    Tapered evaluation with piece-square tables: the midgame and endgame scores of the pieces are interpolated by the
+    game phase, so that the weight of the endgame tables grows as pieces are exchanged. The scores and the phase are
+    kept up to date by BoardState as moves are performed, so evaluating a position doesn't scan the board.
+    The pawn structure (doubled, isolated, backward and passed pawns) is evaluated once per structure and kept in a
+    PawnHashTable.
+    """
+
+    def __init__(self, cache_size: int = 2 ** 16, pawn_hash_size: int = 2 ** 14):
+        """
+        Constructor
+        :param cache_size: number of entries of the evaluation cache
+        :param pawn_hash_size: number of entries of the pawn hash table. 0 disables it.
+        """
+        super().__init__(cache_size)
+        self.pawn_hash_table = PawnHashTable(pawn_hash_size)
+
+    def clear_cache(self):
+        super().clear_cache()
+        self.pawn_hash_table.clear()
+
+    def _evaluate(self, board_state: BoardState) -> float:
+        """
+        :param board_state: the board state to evaluate
+        :return: the score for white, in pawns
+        """
+        midgame_score, endgame_score, phase = board_state.piece_square_scores
+        pawns_midgame_score, pawns_endgame_score, white_passed, black_passed = self.pawn_hash_table.probe(board_state)
+        midgame_score += pawns_midgame_score
+        endgame_score += pawns_endgame_score
+
+        if white_passed or black_passed:
+            # passed pawns blocked by a piece keep half of their bonus
+            occupied = 0
+            for bitboard in board_state.bitboards:
+                occupied |= bitboard
+            for passed, sign in [(white_passed & (occupied >> 8), 1), (black_passed & (occupied << 8), -1)]:
+                while passed:
+                    square = (passed & -passed).bit_length() - 1
+                    passed &= passed - 1
+                    bonus = PASSED_PAWN[square // 8 if sign > 0 else 7 - square // 8]
+                    midgame_score -= sign * (bonus[0] // 2)
+                    endgame_score -= sign * (bonus[1] // 2)
+
+        # early promotions can take the phase over its maximum
+        phase = min(phase, MAX_PHASE)
+        return (midgame_score * phase + endgame_score * (MAX_PHASE - phase)) / (100 * MAX_PHASE)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+import abc
+from abc import abstractmethod
+
+from domain.game.model.pieces import Piece
+from domain.game.model.square import Square
+
+
+class Accumulator(abc.ABC):
+    """
+    Incremental state derived from the pieces on the board (i.e.: the first layer of a neural network). When attached
+    to a BoardState, it is notified of every piece placed or removed while performing moves, and copied along with
+    the BoardState, so each position keeps its own state without recalculating it from scratch.
+    """
+
+    @abstractmethod
+    def add_piece(self, piece: Piece, square: Square):
+        """
+        Notifies that a piece was placed on a square
+        :param piece: the piece
+        :param square: the square
+        """
+        raise NotImplemented
+
+    @abstractmethod
+    def remove_piece(self, piece: Piece, square: Square):
+        """
+        Notifies that a piece was removed from a square
+        :param piece: the piece
+        :param square: the square
+        """
+        raise NotImplemented
+
+    @abstractmethod
+    def copy(self) -> Accumulator:
+        """
+        Creates the accumulator of a copy of the BoardState. Changes to either of them must not affect the other one.
+        :return: the copied accumulator
+        """
+        raise NotImplemented
@@ -0,0 +1,58 @@
+# Geometry of the moves of the pieces on bitboards: 64-bit integers where bit 8 * rank + file stands for a square.
+
+DIAGONAL_DIRECTIONS = [(1, 1), (1, -1), (-1, -1), (-1, 1)]
+ORTHOGONAL_DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+KNIGHT_JUMPS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+
+
+def _ray(square: int, file_step: int, rank_step: int, slide: bool = True) -> list[int]:
+    """
+    Calculates the squares reached from a square in a direction, nearest first
+    """
+    ray = []
+    file, rank = square % 8 + file_step, square // 8 + rank_step
+    while 0 <= file < 8 and 0 <= rank < 8:
+        ray.append(8 * rank + file)
+        if not slide:
+            break
+        file, rank = file + file_step, rank + rank_step
+    return ray
+
+
+def _jumps(square: int, steps: list[tuple[int, int]]) -> int:
+    """
+    Calculates the bitboard of the squares reached from a square with a single step in each direction
+    """
+    bitboard = 0
+    for file_step, rank_step in steps:
+        for target in _ray(square, file_step, rank_step, slide=False):
+            bitboard |= 1 << target
+    return bitboard
+
+
+# squares attacked from each square
+KNIGHT_ATTACKS = [_jumps(square, KNIGHT_JUMPS) for square in range(64)]
+KING_ATTACKS = [_jumps(square, DIAGONAL_DIRECTIONS + ORTHOGONAL_DIRECTIONS) for square in range(64)]
+# squares attacked by a white pawn and by a black pawn from each square
+PAWN_ATTACKS = [[_jumps(square, [(-1, 1), (1, 1)]) for square in range(64)],
+                [_jumps(square, [(-1, -1), (1, -1)]) for square in range(64)]]
+# squares of the rays of the sliders from each square, one list per direction
+DIAGONAL_RAYS = [[_ray(square, *direction) for direction in DIAGONAL_DIRECTIONS] for square in range(64)]
+ORTHOGONAL_RAYS = [[_ray(square, *direction) for direction in ORTHOGONAL_DIRECTIONS] for square in range(64)]
+
+
+def slider_attacks(rays: list[list[int]], occupied: int) -> int:
+    """
+    Calculates the squares attacked by a slider, which stops at the first occupied square of each ray
+    :param rays: rays of the slider from its square (i.e.: DIAGONAL_RAYS[square])
+    :param occupied: bitboard of the occupied squares
+    :return: bitboard of the attacked squares, occupied ones included
+    """
+    attacks = 0
+    for ray in rays:
+        for target in ray:
+            attacks |= 1 << target
+            if (occupied >> target) & 1:
+                break
+    return attacks
+
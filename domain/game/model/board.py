@@ -1,11 +1,16 @@
 from __future__ import annotations
+import struct
 from copy import deepcopy
 from math import copysign
 from typing import Generator
 
+from domain.game.model import piece_square_tables
+from domain.game.model.accumulator import Accumulator
+from domain.game.model.game_status import GameStatus
 from domain.game.model.pieces import Piece, PieceType
 from domain.game.model.move import Move
 from domain.game.model.square import Square
+from domain.game.model import bitboards, zobrist
 
 
 class BoardState:
@@ -14,13 +19,44 @@ class BoardState:
     MAX_RANK = 7
     MIN_RANK = 0
 
+    # order of the pieces in the bitboards
+    BITBOARD_PIECES = [Piece(piece_type, is_white) for is_white in [True, False] for piece_type in PieceType]
+    _BITBOARD_INDEXES = {piece: i for i, piece in enumerate(BITBOARD_PIECES)}
+
+    # values of the pieces in the static exchange evaluation, in pawns
+    SEE_VALUES = {
+        PieceType.PAWN: 1,
+        PieceType.KNIGHT: 3,
+        PieceType.BISHOP: 3,
+        PieceType.ROOK: 5,
+        PieceType.QUEEN: 9,
+        PieceType.KING: 100,
+    }
+    # piece types from least to most valuable, with the index of their bitboards for white (black ones follow)
+    _SEE_ORDER = list(enumerate(PieceType))
+
+    # packed format of to_bytes/from_bytes: occupied squares, 4-bit index in BITBOARD_PIECES of the piece on each of
+    # them (in the order of the squares, low nibble first), flags, en passant square, halfmove clock, fullmove number
+    PACKED = struct.Struct('<Q16sBBHH2x')
+    PACKED_SIZE = PACKED.size
+    PACKED_WHITE_TO_MOVE = 0x01
+    PACKED_W_CASTLE_SHORT = 0x02
+    PACKED_W_CASTLE_LONG = 0x04
+    PACKED_B_CASTLE_SHORT = 0x08
+    PACKED_B_CASTLE_LONG = 0x10
+    PACKED_NO_EN_PASSANT = 0xFF
+    _PACKED_MAX_PIECES = 32
+    _PACKED_MAX_CLOCK = 0xFFFF
+
     def __init__(self, squares: dict[int, dict[int, Piece]],
                  white_to_move: bool = True,
                  w_castle_short: bool = True,
                  w_castle_long: bool = True,
                  b_castle_short: bool = True,
                  b_castle_long: bool = True,
-                 en_passant_target: Square = None):
+                 en_passant_target: Square = None,
+                 halfmove_clock: int = 0,
+                 fullmove_number: int = 1):
         """
         Constructor
         :param squares: nested dictionary where the first key represent a file (column) and the second key represents a rank (row), with the value being the piece present in that square. Only squares with pieces are stored.
@@ -29,6 +65,9 @@ class BoardState:
         :param w_castle_long: True if white can castle on the queen's side, False otherwise
         :param b_castle_short: True if black can castle on the king's side, False otherwise
         :param b_castle_long: True if black can castle on the queen's side, False otherwise
+        :param en_passant_target: (optional) square behind a pawn that has just made a double move
+        :param halfmove_clock: number of moves since the last capture or pawn move
+        :param fullmove_number: number of the move, starting at 1 and incremented after black moves
         """
         self._squares: dict[int, dict[int, Piece]] = squares
         self._white_to_move: bool = white_to_move
@@ -37,9 +76,25 @@ class BoardState:
         self._b_castle_short: bool = b_castle_short
         self._b_castle_long: bool = b_castle_long
         self._en_passant_target: Square = en_passant_target
+        self._halfmove_clock: int = halfmove_clock
+        self._fullmove_number: int = fullmove_number
+
+        self._hash = None
+        # Zobrist hash of the pawns alone, calculated on first access and updated incrementally afterwards
+        self._pawn_hash = None
+        # hashes of the previous positions since the last capture or pawn move, which can't be repeated
+        self._history: list[int] = []
+        # tapered piece-square scores for white and game phase, calculated on first access and updated incrementally afterwards
+        self._midgame_score: int | None = None
+        self._endgame_score: int | None = None
+        self._phase: int | None = None
+        self._accumulator: Accumulator | None = None
+        # occupied squares of each piece, calculated on first access and updated incrementally afterwards
+        self._bitboards: list[int] | None = None
 
         self._is_check = None
         self._legal_moves = None
+        self._game_status = None
 
     def __deepcopy__(self, memo=None) -> BoardState:
         """
@@ -53,15 +108,194 @@ class BoardState:
             w_castle_long = self._w_castle_long,
             b_castle_short = self._b_castle_short,
             b_castle_long = self._b_castle_long,
-            en_passant_target = self._en_passant_target
+            en_passant_target = self._en_passant_target,
+            halfmove_clock = self._halfmove_clock,
+            fullmove_number = self._fullmove_number
         )
+        copy._hash = self._hash
+        copy._pawn_hash = self._pawn_hash
+        copy._history = list(self._history)
+        copy._midgame_score = self._midgame_score
+        copy._endgame_score = self._endgame_score
+        copy._phase = self._phase
+        if self._accumulator is not None:
+            copy._accumulator = self._accumulator.copy()
+        if self._bitboards is not None:
+            copy._bitboards = list(self._bitboards)
 
         return copy
 
+    def to_bytes(self) -> bytes:
+        """
+        Packs the position into BoardState.PACKED_SIZE bytes (32), for storage and for sending it between processes.
+        The hash history isn't packed, so repetitions before the position are lost.
+        :return: the packed position
+        :raises ValueError: if there are more than 32 pieces on the board
+        """
+        pieces = [0] * 64
+        occupied = 0
+        for index, bitboard in enumerate(self.bitboards):
+            occupied |= bitboard
+            while bitboard:
+                square = (bitboard & -bitboard).bit_length() - 1
+                bitboard &= bitboard - 1
+                pieces[square] = index
+
+        codes, shift = 0, 0
+        remaining = occupied
+        while remaining:
+            square = (remaining & -remaining).bit_length() - 1
+            remaining &= remaining - 1
+            codes |= pieces[square] << shift
+            shift += 4
+        if shift > 4 * BoardState._PACKED_MAX_PIECES:
+            raise ValueError(f'Too many pieces to pack the position: {shift // 4}')
+
+        flags = ((BoardState.PACKED_WHITE_TO_MOVE if self._white_to_move else 0) |
+                 (BoardState.PACKED_W_CASTLE_SHORT if self._w_castle_short else 0) |
+                 (BoardState.PACKED_W_CASTLE_LONG if self._w_castle_long else 0) |
+                 (BoardState.PACKED_B_CASTLE_SHORT if self._b_castle_short else 0) |
+                 (BoardState.PACKED_B_CASTLE_LONG if self._b_castle_long else 0))
+        en_passant = BoardState.PACKED_NO_EN_PASSANT
+        if self._en_passant_target is not None:
+            en_passant = 8 * self._en_passant_target.rank + self._en_passant_target.file
+        return BoardState.PACKED.pack(occupied, codes.to_bytes(16, 'little'), flags, en_passant,
+                                      min(self._halfmove_clock, BoardState._PACKED_MAX_CLOCK),
+                                      min(self._fullmove_number, BoardState._PACKED_MAX_CLOCK))
+
+    @staticmethod
+    def from_bytes(data: bytes | memoryview, offset: int = 0) -> BoardState:
+        """
+        Unpacks a position packed with to_bytes
+        :param data: buffer with the packed position
+        :param offset: (optional) position of the packed position in the buffer
+        :return: the position
+        """
+        occupied, codes, flags, en_passant, halfmove_clock, fullmove_number = BoardState.PACKED.unpack_from(data, offset)
+        codes = int.from_bytes(codes, 'little')
+
+        squares = {}
+        bitboards = [0] * len(BoardState.BITBOARD_PIECES)
+        while occupied:
+            square = (occupied & -occupied).bit_length() - 1
+            occupied &= occupied - 1
+            index = codes & 0xF
+            codes >>= 4
+            file_squares = squares.get(square & 7)
+            if file_squares is None:
+                file_squares = squares[square & 7] = {}
+            file_squares[square >> 3] = BoardState.BITBOARD_PIECES[index]
+            bitboards[index] |= 1 << square
+
+        board_state = BoardState(squares=squares,
+                                 white_to_move=bool(flags & BoardState.PACKED_WHITE_TO_MOVE),
+                                 w_castle_short=bool(flags & BoardState.PACKED_W_CASTLE_SHORT),
+                                 w_castle_long=bool(flags & BoardState.PACKED_W_CASTLE_LONG),
+                                 b_castle_short=bool(flags & BoardState.PACKED_B_CASTLE_SHORT),
+                                 b_castle_long=bool(flags & BoardState.PACKED_B_CASTLE_LONG),
+                                 en_passant_target=Square(en_passant & 7, en_passant >> 3) if en_passant != BoardState.PACKED_NO_EN_PASSANT else None,
+                                 halfmove_clock=halfmove_clock,
+                                 fullmove_number=fullmove_number)
+        board_state._bitboards = bitboards
+        return board_state
+
     @property
     def white_to_move(self):
         return self._white_to_move
 
+    @property
+    def w_castle_short(self) -> bool:
+        return self._w_castle_short
+
+    @property
+    def w_castle_long(self) -> bool:
+        return self._w_castle_long
+
+    @property
+    def b_castle_short(self) -> bool:
+        return self._b_castle_short
+
+    @property
+    def b_castle_long(self) -> bool:
+        return self._b_castle_long
+
+    @property
+    def en_passant_target(self) -> Square | None:
+        return self._en_passant_target
+
+    @property
+    def halfmove_clock(self) -> int:
+        return self._halfmove_clock
+
+    @property
+    def fullmove_number(self) -> int:
+        return self._fullmove_number
+
+    @property
+    def hash(self) -> int:
+        """
+        Zobrist hash of the position. It is calculated on first access and updated incrementally afterwards.
+        The keys are those of the Polyglot book format, so the hash is also the Polyglot key of the position.
+        :return: the 64-bit hash
+        """
+        if self._hash is None:
+            self._hash = self._calculate_hash()
+        return self._hash
+
+    @property
+    def pawn_hash(self) -> int:
+        """
+        Zobrist hash of the pawns of both sides, ignoring the rest of the pieces and the state of the game. It changes
+        only in the moves that move, capture or promote a pawn, so it can key the evaluation of the pawn structure.
+        :return: the 64-bit hash
+        """
+        if self._pawn_hash is None:
+            self._pawn_hash = 0
+            for piece, square in self.get_all_pieces():
+                if piece.type == PieceType.PAWN:
+                    self._pawn_hash ^= zobrist.piece_key(piece, square)
+        return self._pawn_hash
+
+    @property
+    def piece_square_scores(self) -> tuple[int, int, int]:
+        """
+        Sums of the midgame and endgame piece-square tables (material included) over the pieces on the board, and the
+        game phase given by the pieces left. They are calculated on first access and updated incrementally afterwards.
+        :return: the midgame score for white, the endgame score for white and the game phase, all in centipawns except the phase
+        """
+        if self._midgame_score is None:
+            self._calculate_piece_square_scores()
+        return self._midgame_score, self._endgame_score, self._phase
+
+    @property
+    def bitboards(self) -> list[int]:
+        """
+        Squares occupied by each piece, as 64-bit integers where bit 8 * rank + file is set if the piece is on that
+        square. They are calculated on first access and updated incrementally afterwards. The list must not be modified.
+        :return: a bitboard for each piece, in the order of BoardState.BITBOARD_PIECES
+        """
+        if self._bitboards is None:
+            self._bitboards = [0] * len(BoardState.BITBOARD_PIECES)
+            for piece, square in self.get_all_pieces():
+                self._bitboards[BoardState._BITBOARD_INDEXES[piece]] |= 1 << (8 * square.rank + square.file)
+        return self._bitboards
+
+    @property
+    def accumulator(self) -> Accumulator | None:
+        """
+        :return: the accumulator attached to the position, if any
+        """
+        return self._accumulator
+
+    @accumulator.setter
+    def accumulator(self, accumulator: Accumulator | None):
+        """
+        Attaches an accumulator to the position. It will be notified of the pieces placed and removed by the moves
+        performed from now on, and copied to the positions derived from this one.
+        :param accumulator: the accumulator, or None to detach it
+        """
+        self._accumulator = accumulator
+
     def get_legal_moves(self) -> list[Move]:
         """
         Calculates all the possible moves in the position
@@ -70,14 +304,46 @@ class BoardState:
         if self._legal_moves is not None:
             return self._legal_moves
 
-        if not self.is_game_over():
+        if self._game_status is None:
+            # the status is calculated from the moves, instead of generating them once more to check if there is any
+            legal_moves = list(self._get_all_legal_moves())
+            self._game_status = self._calculate_game_status(len(legal_moves) > 0)
+        elif self._game_status == GameStatus.PLAYING:
             legal_moves = list(self._get_all_legal_moves())
         else:
             legal_moves = []
 
+        if self._game_status != GameStatus.PLAYING:
+            # draws by rule end the game even if there are moves
+            legal_moves = []
+
         self._legal_moves = legal_moves
         return legal_moves
 
+    def get_legal_move_by_code(self, code: int) -> Move | None:
+        """
+        Returns the legal move with the given compact encoding (see Move.code). Only the moves of the piece on the origin square are generated, and only the matching one is checked for legality.
+        :param code: the encoded move
+        :return: the move, or None if no legal move has that encoding
+        """
+        origin_index = (code >> 6) & 0x3F
+        origin_square = Square(origin_index % 8, origin_index // 8)
+        piece = self.get_piece_on_square(origin_square)
+        if not piece or piece.is_white != self._white_to_move:
+            return None
+
+        if self._legal_moves is not None:
+            moves = self._legal_moves
+        else:
+            moves = self._get_all_moves_for_piece(piece, origin_square)
+
+        for move in moves:
+            if move.code == code:
+                if self._legal_moves is not None or self._move_is_legal(move):
+                    return move
+                return None
+        return None
+
     def get_legal_moves_for_piece_in_square(self, square: Square) -> Generator[Move]:
         """
         Returns all the legal moves for the piece on the given square
@@ -101,6 +367,9 @@ class BoardState:
             copy = deepcopy(self)
             return copy.perform_move(move, update=True)
 
+        previous_hash = self.hash
+        self._hash ^= self._state_hash()
+
         # move the piece
         piece = self.get_piece_on_square(move.origin_square)
         captured_piece = self.get_piece_on_square(move.dest_square)
@@ -159,9 +428,21 @@ class BoardState:
         if captured_piece and captured_piece.type == PieceType.ROOK:
             self._check_castle_flags_for_rook(captured_piece, move.dest_square)
 
+        # update the clocks and the history
+        if piece.type == PieceType.PAWN or captured_piece or move.en_passant:
+            self._halfmove_clock = 0
+            self._history = []
+        else:
+            self._halfmove_clock += 1
+            self._history.append(previous_hash)
+        if not self._white_to_move:
+            self._fullmove_number += 1
+
         # alternate turn
         self._white_to_move = not self._white_to_move
 
+        self._hash ^= self._state_hash() ^ zobrist.TURN_KEY
+
         self._reset_calculations()
         return self
 
@@ -194,6 +475,51 @@ class BoardState:
                 except KeyError:
                     continue
 
+    @property
+    def piece_count(self) -> int:
+        """
+        :return: the number of pieces on the board, kings included
+        """
+        return sum([len(file) for file in self._squares.values()])
+
+    def has_castling_rights(self) -> bool:
+        """
+        Calculates if any player could castle now or later in the game, that is, if a castling flag is set and the king
+        and the rook are still on their initial squares
+        :return: True if castling is still possible for either player
+        """
+        castle_flags = [
+            (True, BoardState.MAX_FILE, self._w_castle_short),
+            (True, BoardState.MIN_FILE, self._w_castle_long),
+            (False, BoardState.MAX_FILE, self._b_castle_short),
+            (False, BoardState.MIN_FILE, self._b_castle_long),
+        ]
+        for is_white, rook_file, flag in castle_flags:
+            if not flag:
+                continue
+            castle_rank = BoardState.MIN_RANK if is_white else BoardState.MAX_RANK
+            king = self.get_piece_on_square(Square(BoardState.MIN_FILE + 4, castle_rank))
+            rook = self.get_piece_on_square(Square(rook_file, castle_rank))
+            if king and king.type == PieceType.KING and king.is_white == is_white \
+                    and rook and rook.type == PieceType.ROOK and rook.is_white == is_white:
+                return True
+        return False
+
+    def can_capture_en_passant(self) -> bool:
+        """
+        Calculates if there is an en passant target and a pawn of the active player next to the pawn that can be captured
+        :return: True if an en passant capture is (pseudo-legally) possible
+        """
+        if not self._en_passant_target:
+            return False
+
+        rank_advancement = 1 if self._white_to_move else -1
+        for file_offset in [-1, 1]:
+            pawn = self.get_piece_on_square(self._en_passant_target.move(file_offset, -rank_advancement))
+            if pawn and pawn.type == PieceType.PAWN and pawn.is_white == self._white_to_move:
+                return True
+        return False
+
     def get_piece_on_square(self, square: Square) -> Piece | None:
         """
         Returns the piece (if any) on the given square
@@ -205,6 +531,101 @@ class BoardState:
         except KeyError:
             return None
 
+    def attackers_to(self, square: Square, occupied: int | None = None) -> int:
+        """
+        Calculates the pieces of both colors that attack a square
+        :param square: the square
+        :param occupied: (optional) bitboard of the occupied squares, to find the attackers once some pieces have left the board (i.e.: revealing sliders behind them). Defaults to the pieces on the board.
+        :return: bitboard of the squares of the attackers
+        """
+        if occupied is None:
+            occupied = 0
+            for bitboard in self.bitboards:
+                occupied |= bitboard
+        return self._attackers_to(8 * square.rank + square.file, occupied)
+
+    def see(self, move: Move) -> int:
+        """
+        Static exchange evaluation: material won with the sequence of captures on the destination square of a move, in
+        which both players capture with their least valuable attacker and stop when capturing no longer pays off.
+        Sliders behind the attackers (x-rays) join the exchange when the pieces in front of them capture. Pins are
+        ignored and no move is performed.
+        :param move: the move, usually a capture
+        :return: the material won by the active player, in pawns (see BoardState.SEE_VALUES)
+        """
+        if move.castle_short or move.castle_long:
+            return 0
+
+        target, captured_value, piece_value, occupied = self._see_start(move)
+        colors = self._color_bitboards()
+        gains = [captured_value]
+        white = not self._white_to_move
+        attackers = self._attackers_to(target, occupied)
+        while True:
+            side_attackers = attackers & colors[white] & occupied
+            if not side_attackers:
+                break
+            piece_type, value, bit = self._least_valuable_attacker(side_attackers, white)
+            if piece_type == PieceType.KING and attackers & colors[not white] & occupied:
+                # the king can't capture a defended piece
+                break
+
+            gains.append(piece_value - gains[-1])
+            piece_value = value
+            occupied ^= bit
+            attackers = self._attackers_to(target, occupied)
+            white = not white
+
+        # each player can stop capturing instead of continuing the exchange
+        while len(gains) > 1:
+            gain = gains.pop()
+            gains[-1] = -max(-gains[-1], gain)
+        return gains[0]
+
+    def see_ge(self, move: Move, threshold: int = 0) -> bool:
+        """
+        Checks if the static exchange evaluation of a move reaches a threshold. Equivalent to see(move) >= threshold,
+        but it stops as soon as the result is known.
+        :param move: the move, usually a capture
+        :param threshold: the minimum material won, in pawns
+        :return: True if the move wins at least the threshold
+        """
+        if move.castle_short or move.castle_long:
+            return threshold <= 0
+
+        target, captured_value, piece_value, occupied = self._see_start(move)
+        # balance for the active player if the exchange stopped now, minus the threshold
+        swap = captured_value - threshold
+        if swap < 0:
+            return False
+        # ... and if the opponent recaptured the piece for free
+        swap = piece_value - swap
+        if swap <= 0:
+            return True
+
+        colors = self._color_bitboards()
+        white = not self._white_to_move
+        attackers = self._attackers_to(target, occupied)
+        result = True
+        while True:
+            side_attackers = attackers & colors[white] & occupied
+            if not side_attackers:
+                break
+            result = not result
+            piece_type, value, bit = self._least_valuable_attacker(side_attackers, white)
+            if piece_type == PieceType.KING:
+                # the king can only capture if the opponent has no attackers left
+                return not result if attackers & colors[not white] & occupied else result
+
+            swap = value - swap
+            if swap < int(result):
+                break
+            occupied ^= bit
+            attackers = self._attackers_to(target, occupied)
+            white = not white
+
+        return result
+
     def square_is_under_attack(self, square: Square, white: bool) -> bool:
         """
         Calculates if a given square is threatened by a piece of the given color
@@ -212,29 +633,75 @@ class BoardState:
         :param white: True for the white pieces, False for black pieces
         :return: True if the square is under attack
         """
-        for piece_type in [PieceType.PAWN, PieceType.QUEEN, PieceType.KNIGHT]:
-            test_piece = Piece(piece_type, not white)
-            test_moves = self._get_all_moves_for_piece(test_piece, square)
-            for move in test_moves:
-                capture_piece = self.get_piece_on_square(move.dest_square)
-                if capture_piece:
-                    if capture_piece.type == piece_type:
-                        return True
-                    if piece_type == PieceType.QUEEN:
-                        if capture_piece.type in [PieceType.BISHOP, PieceType.ROOK]:
-                            return True
-                        if capture_piece.type == PieceType.KING:
-                            if abs(move.dest_square.file - move.origin_square.file) <= 1 and abs(move.dest_square.rank - move.origin_square.rank) <= 1:
+        # pawns attack diagonally forward, so they are found diagonally backwards from the square
+        pawn_rank_offset = -1 if white else 1
+        for file_offset in [-1, 1]:
+            piece = self.get_piece_on_square(square.move(file_offset, pawn_rank_offset))
+            if piece and piece.type == PieceType.PAWN and piece.is_white == white:
+                return True
+
+        jumps = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+        for jump in jumps:
+            piece = self.get_piece_on_square(square.move(jump[0], jump[1]))
+            if piece and piece.type == PieceType.KNIGHT and piece.is_white == white:
+                return True
+
+        line_attackers = [
+            (PieceType.ROOK, [(0, 1), (1, 0), (0, -1), (-1, 0)]),
+            (PieceType.BISHOP, [(-1, 1), (1, 1), (-1, -1), (1, -1)]),
+        ]
+        for line_piece_type, directions in line_attackers:
+            for direction in directions:
+                next_square = square.move(direction[0], direction[1])
+                steps = 1
+                while BoardState.is_in_bounds(next_square):
+                    piece = self.get_piece_on_square(next_square)
+                    if piece:
+                        if piece.is_white == white:
+                            if piece.type == line_piece_type or piece.type == PieceType.QUEEN:
                                 return True
+                            if piece.type == PieceType.KING and steps == 1:
+                                return True
+                        break
+                    next_square = next_square.move(direction[0], direction[1])
+                    steps += 1
 
         return False
 
+    def game_status(self) -> GameStatus:
+        """
+        Calculates the status of the game in the position: check, existence of legal moves, material and draw rules are
+        checked in a single pass and the result is kept until the position changes
+        :return: the status
+        """
+        if self._game_status is None:
+            self._game_status = self._calculate_game_status(self._has_legal_moves())
+        return self._game_status
+
+    def _calculate_game_status(self, has_legal_moves: bool) -> GameStatus:
+        """
+        Calculates the status of the game in the position
+        :param has_legal_moves: True if the active player has any legal move
+        :return: the status
+        """
+        if not has_legal_moves:
+            status = GameStatus.CHECKMATE if self.is_in_check() else GameStatus.STALEMATE
+        elif self.cant_checkmate():
+            status = GameStatus.INSUFFICIENT_MATERIAL
+        elif self.is_repetition():
+            status = GameStatus.REPETITION
+        elif self.is_fifty_move_draw():
+            status = GameStatus.FIFTY_MOVE_RULE
+        else:
+            status = GameStatus.PLAYING
+        return status
+
     def is_game_over(self) -> bool:
         """
         Calculates if the position is a game over for any reason
         :return: True if the game is over, False otherwise
         """
-        return not self._has_legal_moves() or self.cant_checkmate()
+        return self.game_status() != GameStatus.PLAYING
 
     def is_in_check(self) -> bool:
         """
@@ -254,22 +721,55 @@ class BoardState:
         Calculates if the position is checkmate
         :return: True if it's checkmate, False otherwise
         """
-        return self.is_in_check() and not self._has_legal_moves()
+        return self.game_status() == GameStatus.CHECKMATE
 
     def is_stalemate(self) -> bool:
         """
         Calculates if the position is a stalemate
         :return: True if stalemated, False otherwise
         """
-        return not self._has_legal_moves() and not self.is_in_check()
+        return self.game_status() == GameStatus.STALEMATE
+
+    def repetition_count(self) -> int:
+        """
+        Counts the previous occurrences of the position. Only the positions since the last capture or pawn move are
+        compared, and only every other one, as the rest have the other player to move.
+        :return: the number of times the position occurred before
+        """
+        hash = self.hash
+        count = 0
+        for i in range(len(self._history) - 2, -1, -2):
+            if self._history[i] == hash:
+                count += 1
+        return count
+
+    def is_repetition(self, times: int = 3) -> bool:
+        """
+        Calculates if the position has occurred a number of times, counting the current one
+        :param times: the number of occurrences. Defaults to 3 (draw by threefold repetition). Searches can use 2 to cut cycles.
+        :return: True if the position occurred at least the given number of times
+        """
+        return self.repetition_count() + 1 >= times
+
+    def is_fifty_move_draw(self) -> bool:
+        """
+        Calculates if the position is a draw by the fifty-move rule: fifty moves of each player without captures or pawn moves
+        :return: True if the fifty-move rule applies
+        """
+        return self._halfmove_clock >= 100
 
     def cant_checkmate(self) -> bool:
         """
         Calculates if the position is a draw due to the inability of either player to deliver checkmate
         :return: True if checkmate is impossible, False otherwise
         """
-        w_pieces = [tuple[0] for tuple in self.get_all_pieces_by_color(white=True)]
-        b_pieces = [tuple[0] for tuple in self.get_all_pieces_by_color(white=False)]
+        w_pieces = []
+        b_pieces = []
+        for piece, _ in self.get_all_pieces():
+            if piece.is_white:
+                w_pieces.append(piece)
+            else:
+                b_pieces.append(piece)
 
         return not self._pieces_can_checkmate(w_pieces) and not self._pieces_can_checkmate(b_pieces)
 
@@ -292,6 +792,21 @@ class BoardState:
         if self._squares.get(square.file) is None:
             self._squares[square.file] = {}
 
+        replaced_piece = self._squares[square.file].get(square.rank)
+        if replaced_piece:
+            self._forget_piece(replaced_piece, square)
+
+        if self._hash is not None:
+            self._hash ^= zobrist.piece_key(piece, square)
+        if self._pawn_hash is not None and piece.type == PieceType.PAWN:
+            self._pawn_hash ^= zobrist.piece_key(piece, square)
+        if self._midgame_score is not None:
+            self._add_piece_square_score(piece, square)
+        if self._accumulator is not None:
+            self._accumulator.add_piece(piece, square)
+        if self._bitboards is not None:
+            self._bitboards[BoardState._BITBOARD_INDEXES[piece]] |= 1 << (8 * square.rank + square.file)
+
         self._squares[square.file][square.rank] = piece
 
     def _remove_piece(self, square: Square):
@@ -299,10 +814,29 @@ class BoardState:
         Removes the piece (if any) from the given square.
         :param square: the square
         """
+        self._forget_piece(self._squares[square.file][square.rank], square)
+
         del self._squares[square.file][square.rank]
         if not self._squares[square.file]:
             del self._squares[square.file]
 
+    def _forget_piece(self, piece: Piece, square: Square):
+        """
+        Updates the incremental calculations (hashes, scores, accumulator and bitboards) for a piece leaving a square
+        :param piece: the piece
+        :param square: the square
+        """
+        if self._hash is not None:
+            self._hash ^= zobrist.piece_key(piece, square)
+        if self._pawn_hash is not None and piece.type == PieceType.PAWN:
+            self._pawn_hash ^= zobrist.piece_key(piece, square)
+        if self._midgame_score is not None:
+            self._remove_piece_square_score(piece, square)
+        if self._accumulator is not None:
+            self._accumulator.remove_piece(piece, square)
+        if self._bitboards is not None:
+            self._bitboards[BoardState._BITBOARD_INDEXES[piece]] &= ~(1 << (8 * square.rank + square.file))
+
     def _is_in_check(self, white: bool) -> bool:
         """
         Calculates if a given king is in check in the position
@@ -344,10 +878,10 @@ class BoardState:
         :param move: the move to check
         :return: True if the move is legal, False otherwise
         """
-        # check for castling crossing attacked square
+        # check for castling out of check or crossing attacked square
         if move.castle_long or move.castle_short:
             direction = 1 if move.dest_square.file >= move.origin_square.file else -1
-            i = 1
+            i = 0
             intermediate_square = Square(
                                     move.origin_square.file + i * direction,
                                     move.dest_square.rank)
@@ -426,8 +960,14 @@ class BoardState:
                 capture_piece = self.get_piece_on_square(diagonal_sq)
                 if capture_piece:
                     if capture_piece.is_white != is_white:
-                        # capture
-                        yield self._generate_move(origin_square, diagonal_sq)
+                        if diagonal_sq.rank == promotion_rank:
+                            # capture with promotion
+                            for piece_type in [PieceType.KNIGHT, PieceType.BISHOP, PieceType.ROOK, PieceType.QUEEN]:
+                                promotion_piece = Piece(piece_type, is_white)
+                                yield self._generate_move(origin_square, diagonal_sq, promotion_piece=promotion_piece)
+                        else:
+                            # capture
+                            yield self._generate_move(origin_square, diagonal_sq)
                 elif diagonal_sq == self._en_passant_target and self._white_to_move == is_white:
                     # en passant
                     capture_piece = self.get_piece_on_square(diagonal_sq.move(0, -rank_advancement))
@@ -597,23 +1137,156 @@ class BoardState:
         :param rook: the rook involved with the move
         :param square: the square that the rook was on
         """
-        if rook.is_white and square.file == BoardState.MIN_FILE:
-            if square.rank == BoardState.MIN_RANK:
+        castle_rank = BoardState.MIN_RANK if rook.is_white else BoardState.MAX_RANK
+        if square.rank != castle_rank:
+            return
+
+        if square.file == BoardState.MIN_FILE:
+            if rook.is_white:
                 self._w_castle_long = False
-            elif square.rank == BoardState.MAX_RANK:
-                self._w_castle_short = False
-        elif not rook.is_white and square.file == BoardState.MAX_FILE:
-            if square.rank == BoardState.MIN_RANK:
+            else:
                 self._b_castle_long = False
-            elif square.rank == BoardState.MAX_RANK:
+        elif square.file == BoardState.MAX_FILE:
+            if rook.is_white:
+                self._w_castle_short = False
+            else:
                 self._b_castle_short = False
 
+    def _calculate_hash(self) -> int:
+        """
+        Calculates the Zobrist hash of the position from scratch
+        :return: the 64-bit hash
+        """
+        hash = 0
+        for piece, square in self.get_all_pieces():
+            hash ^= zobrist.piece_key(piece, square)
+
+        hash ^= self._state_hash()
+        if self._white_to_move:
+            hash ^= zobrist.TURN_KEY
+
+        return hash
+
+    def _attackers_to(self, target: int, occupied: int) -> int:
+        """
+        Calculates the pieces of both colors that attack a square, with the given occupied squares
+        :param target: the square (8 * rank + file)
+        :param occupied: bitboard of the occupied squares
+        :return: bitboard of the squares of the attackers
+        """
+        pieces = self.bitboards
+        # a pawn attacks the target from the squares that a pawn of the other color on the target would attack
+        attackers = (bitboards.PAWN_ATTACKS[1][target] & pieces[0]) | (bitboards.PAWN_ATTACKS[0][target] & pieces[6])
+        attackers |= bitboards.KNIGHT_ATTACKS[target] & (pieces[1] | pieces[7])
+        attackers |= bitboards.KING_ATTACKS[target] & (pieces[5] | pieces[11])
+        diagonal_sliders = pieces[2] | pieces[8] | pieces[4] | pieces[10]
+        if diagonal_sliders:
+            attackers |= bitboards.slider_attacks(bitboards.DIAGONAL_RAYS[target], occupied) & diagonal_sliders
+        orthogonal_sliders = pieces[3] | pieces[9] | pieces[4] | pieces[10]
+        if orthogonal_sliders:
+            attackers |= bitboards.slider_attacks(bitboards.ORTHOGONAL_RAYS[target], occupied) & orthogonal_sliders
+        return attackers & occupied
+
+    def _see_start(self, move: Move) -> tuple[int, int, int, int]:
+        """
+        Calculates the state of the static exchange evaluation after a move
+        :param move: the move
+        :return: the destination square (8 * rank + file), the value captured by the move (including the gain of a promotion), the value of the piece left on the destination square and the bitboard of the occupied squares
+        """
+        target = 8 * move.dest_square.rank + move.dest_square.file
+        occupied = 0
+        for bitboard in self.bitboards:
+            occupied |= bitboard
+        occupied &= ~(1 << (8 * move.origin_square.rank + move.origin_square.file))
+
+        if move.en_passant:
+            captured_value = BoardState.SEE_VALUES[PieceType.PAWN]
+            captured_square = target - 8 if self._white_to_move else target + 8
+            occupied &= ~(1 << captured_square)
+        else:
+            captured_piece = self.get_piece_on_square(move.dest_square)
+            captured_value = BoardState.SEE_VALUES[captured_piece.type] if captured_piece else 0
+
+        if move.promotion_piece:
+            piece_value = BoardState.SEE_VALUES[move.promotion_piece.type]
+            captured_value += piece_value - BoardState.SEE_VALUES[PieceType.PAWN]
+        else:
+            piece_value = BoardState.SEE_VALUES[self.get_piece_on_square(move.origin_square).type]
+
+        return target, captured_value, piece_value, occupied
+
+    def _color_bitboards(self) -> dict[bool, int]:
+        """
+        :return: bitboards of the pieces of each color, by True for white and False for black
+        """
+        pieces = self.bitboards
+        return {True: pieces[0] | pieces[1] | pieces[2] | pieces[3] | pieces[4] | pieces[5],
+                False: pieces[6] | pieces[7] | pieces[8] | pieces[9] | pieces[10] | pieces[11]}
+
+    def _least_valuable_attacker(self, attackers: int, white: bool) -> tuple[PieceType, int, int]:
+        """
+        Finds the least valuable piece among some attackers of one color
+        :param attackers: bitboard of the attackers, all of them of the given color
+        :param white: the color
+        :return: the type of the piece, its value and the bit of its square
+        """
+        pieces = self.bitboards
+        offset = 0 if white else 6
+        for i, piece_type in BoardState._SEE_ORDER:
+            bitboard = pieces[offset + i] & attackers
+            if bitboard:
+                return piece_type, BoardState.SEE_VALUES[piece_type], bitboard & -bitboard
+
+    def _calculate_piece_square_scores(self):
+        """
+        Calculates the piece-square scores and the game phase of the position from scratch
+        """
+        self._midgame_score = 0
+        self._endgame_score = 0
+        self._phase = 0
+        for piece, square in self.get_all_pieces():
+            self._add_piece_square_score(piece, square)
+
+    def _add_piece_square_score(self, piece: Piece, square: Square):
+        index = 8 * square.rank + square.file
+        self._midgame_score += piece_square_tables.MIDGAME_TABLES[piece][index]
+        self._endgame_score += piece_square_tables.ENDGAME_TABLES[piece][index]
+        self._phase += piece_square_tables.PHASE_WEIGHTS[piece.type]
+
+    def _remove_piece_square_score(self, piece: Piece, square: Square):
+        index = 8 * square.rank + square.file
+        self._midgame_score -= piece_square_tables.MIDGAME_TABLES[piece][index]
+        self._endgame_score -= piece_square_tables.ENDGAME_TABLES[piece][index]
+        self._phase -= piece_square_tables.PHASE_WEIGHTS[piece.type]
+
+    def _state_hash(self) -> int:
+        """
+        Calculates the part of the Zobrist hash given by the castling flags and the en passant target.
+        Following the Polyglot format, the en passant target only counts if a pawn of the active player can capture on it.
+        :return: the partial hash
+        """
+        hash = 0
+        if self._w_castle_short:
+            hash ^= zobrist.W_CASTLE_SHORT_KEY
+        if self._w_castle_long:
+            hash ^= zobrist.W_CASTLE_LONG_KEY
+        if self._b_castle_short:
+            hash ^= zobrist.B_CASTLE_SHORT_KEY
+        if self._b_castle_long:
+            hash ^= zobrist.B_CASTLE_LONG_KEY
+
+        if self.can_capture_en_passant():
+            hash ^= zobrist.en_passant_key(self._en_passant_target.file)
+
+        return hash
+
     def _reset_calculations(self):
         """
         Resets all the stored calculations previously performed on the BoardState
         """
         self._is_check = None
         self._legal_moves = None
+        self._game_status = None
 
     @staticmethod
     def is_in_bounds(square: Square) -> bool:
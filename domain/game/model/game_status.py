@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class GameStatus(Enum):
+    PLAYING = 'playing'
+    CHECKMATE = 'checkmate'
+    STALEMATE = 'stalemate'
+    INSUFFICIENT_MATERIAL = 'draw by insufficient material'
+    REPETITION = 'draw by repetition'
+    FIFTY_MOVE_RULE = 'draw by the fifty-move rule'
+
+    @property
+    def is_draw(self) -> bool:
+        return self not in [GameStatus.PLAYING, GameStatus.CHECKMATE]
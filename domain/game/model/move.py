@@ -2,12 +2,19 @@ from __future__ import annotations
 
 from copy import deepcopy
 
-from domain.game.model.pieces import Piece
+from domain.game.model.pieces import Piece, PieceType
 from domain.game.model.square import Square
 
 
 class Move:
 
+    PROMOTION_CODES = {
+        PieceType.KNIGHT: 1,
+        PieceType.BISHOP: 2,
+        PieceType.ROOK: 3,
+        PieceType.QUEEN: 4,
+    }
+
     def __init__(self,
                  origin_square: Square,
                  dest_square: Square,
@@ -63,4 +70,16 @@ class Move:
 
     @property
     def castle_long(self) -> bool:
-        return self._castle_long
\ No newline at end of file
+        return self._castle_long
+
+    @property
+    def code(self) -> int:
+        """
+        Compact 16-bit encoding of the move: destination square in bits 0-5, origin square in bits 6-11 and promotion piece in bits 12-14 (the same layout as Polyglot moves).
+        The en passant and castling flags are not encoded, since they are determined by the position.
+        :return: the encoded move
+        """
+        code = (8 * self._dest_square.rank + self._dest_square.file) | (8 * self._origin_square.rank + self._origin_square.file) << 6
+        if self._promotion_piece:
+            code |= Move.PROMOTION_CODES[self._promotion_piece.type] << 12
+        return code
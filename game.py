@@ -103,14 +103,7 @@ def _print_board(board_state: BoardState, turn: float):
     else:
         score = '???'
 
-    if board_state.is_stalemate():
-        status = 'stalemate'
-    elif board_state.cant_checkmate():
-        status = 'draw'
-    elif board_state.is_checkmate():
-        status = 'checkmate'
-    else:
-        status = 'playing'
+    status = board_state.game_status().value
     print(board_mapper.board_state_to_string(board_state, border=True))
     print(f'check: {check}')
     print(f'status: {status}')
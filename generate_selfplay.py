@@ -0,0 +1,41 @@
+import argparse
+
+from domain.engine.alpha_beta_engine import AlphaBetaEngine
+from domain.evaluator.piece_square_table_evaluator import PieceSquareTableEvaluator
+from infrastructure.match.match_runner import PlayerConfig
+from infrastructure.notation.mapper.board_mapper import EDPBoardStateMapper, FENBoardStateMapper
+from infrastructure.training.self_play_generator import SelfPlayGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates training data by self-play of AlphaBetaEngine.')
+    parser.add_argument('-o', '--output', default='selfplay', help='directory of the shards')
+    parser.add_argument('--games', type=int, default=100, help='number of games')
+    parser.add_argument('--nodes', type=int, default=5000, help='nodes per move')
+    parser.add_argument('--tt-size', type=int, default=2 ** 16, help='entries of the transposition table')
+    parser.add_argument('--random-plies', type=int, default=8, help='random moves at the start of each game')
+    parser.add_argument('--openings', default=None, help='EPD file with the positions where the random moves start (defaults to the starting position)')
+    parser.add_argument('--shard-size', type=int, default=100_000, help='positions per shard')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (defaults to the number of cores)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random moves')
+    args = parser.parse_args()
+
+    openings = None
+    if args.openings:
+        with open(args.openings) as file:
+            openings = [FENBoardStateMapper.board_state_to_fen(EDPBoardStateMapper.epd_to_board_state(line))
+                        for line in file if line.strip()]
+
+    engine_options = {'max_depth': AlphaBetaEngine.MAX_PLY, 'node_limit': args.nodes, 'tt_size': args.tt_size}
+    player = PlayerConfig('AlphaBetaEngine', AlphaBetaEngine, PieceSquareTableEvaluator, engine_options=engine_options)
+    generator = SelfPlayGenerator(player, args.games, args.output,
+                                  processes=args.processes,
+                                  openings=openings,
+                                  random_plies=args.random_plies,
+                                  records_per_shard=args.shard_size,
+                                  seed=args.seed)
+    print(generator.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import argparse
+import os
+import time
+
+from infrastructure.tablebase.tablebase_generator import TablebaseGenerator
+from infrastructure.tablebase.tablebase_index import all_materials
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates endgame tablebases by retrograde analysis.')
+    parser.add_argument('materials', nargs='*', help='materials to generate (i.e.: KQvK KRvKP). Tables they depend on are generated too.')
+    parser.add_argument('-d', '--directory', default='tablebases', help='directory of the tables')
+    parser.add_argument('--max-pieces', type=int, default=None, help=f'generate all the materials with up to this number of pieces, kings included (at most {TablebaseGenerator.MAX_PIECES})')
+    args = parser.parse_args()
+
+    materials = list(args.materials)
+    if args.max_pieces:
+        materials += all_materials(args.max_pieces)
+    if not materials:
+        parser.error('no materials given')
+
+    os.makedirs(args.directory, exist_ok=True)
+    t_0 = time.time()
+    generator = TablebaseGenerator(args.directory, on_progress=lambda message: print(f'[{time.time() - t_0:.1f}s] {message}'))
+    for material in materials:
+        generator.generate(material)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import random
+import struct
+
+from domain.engine.port.opening_book import OpeningBook
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+from domain.game.model.pieces import PieceType
+from domain.game.model.square import Square
+from infrastructure.database.sorted_record_file import SortedRecordFile
+
+
+class PolyglotBook(OpeningBook):
+    """
+    Reader of opening books in the Polyglot format (http://hgm.nubati.net/book_format.html).
+    The file is a SortedRecordFile: it's memory-mapped and its entries, sorted by key, are found with a binary search,
+    so opening a book is instant regardless of its size and a lookup only touches a few pages.
+    """
+
+    ENTRY = struct.Struct('>QHHI')
+    KEY = struct.Struct('>Q')
+
+    TO_MASK = 0x3F
+    FROM_SHIFT = 6
+    PROMOTION_SHIFT = 12
+    SQUARE_MASK = 0x3F
+
+    def __init__(self, path: str, best_move: bool = False, seed: int = None):
+        """
+        Opens a book
+        :param path: path of the .bin file
+        :param best_move: if True, choose_move always returns the move with the highest weight. Otherwise moves are chosen randomly, proportionally to their weight.
+        :param seed: (optional) seed of the random choices
+        """
+        self._entries = SortedRecordFile(path, PolyglotBook.ENTRY, PolyglotBook.KEY)
+        self._best_move = best_move
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_moves(self, board_state: BoardState) -> list[tuple[Move, int]]:
+        moves = []
+        for raw_move, weight in self._get_entries(board_state.hash):
+            move = self._raw_move_to_move(board_state, raw_move)
+            if move is not None:
+                moves.append((move, weight))
+
+        moves.sort(key=lambda move_weight: move_weight[1], reverse=True)
+        return moves
+
+    def choose_move(self, board_state: BoardState) -> Move | None:
+        # the choice is made on the raw entries, so that only the chosen move needs to be decoded and checked for legality
+        entries = self._get_entries(board_state.hash)
+        while entries:
+            if self._best_move:
+                entry = max(entries, key=lambda raw_move_weight: raw_move_weight[1])
+            elif sum([weight for _, weight in entries]) == 0:
+                entry = self._random.choice(entries)
+            else:
+                entry = self._random.choices(entries, weights=[weight for _, weight in entries])[0]
+
+            move = self._raw_move_to_move(board_state, entry[0])
+            if move is not None:
+                return move
+            # illegal move (i.e.: key collision), try the other ones
+            entries.remove(entry)
+
+        return None
+
+    def _get_entries(self, key: int) -> list[tuple[int, int]]:
+        """
+        Returns the raw entries for a key
+        :param key: the Polyglot key of the position
+        :return: list of tuples with the Polyglot move and the weight of each entry
+        """
+        return [(raw_move, weight) for _, raw_move, weight, _ in self._entries.records(key)]
+
+    def close(self):
+        self._entries.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _raw_move_to_move(board_state: BoardState, raw_move: int) -> Move | None:
+        """
+        Maps a Polyglot move to the matching legal move. Castling moves are encoded by Polyglot as the king capturing its own rook.
+        :param board_state: the position
+        :param raw_move: the Polyglot move
+        :return: the legal move, or None if there is no matching legal move
+        """
+        dest_index = raw_move & PolyglotBook.TO_MASK
+        origin_index = (raw_move >> PolyglotBook.FROM_SHIFT) & PolyglotBook.SQUARE_MASK
+        code = raw_move
+
+        origin_file, origin_rank = origin_index % 8, origin_index // 8
+        dest_file, dest_rank = dest_index % 8, dest_index // 8
+        piece = board_state.get_piece_on_square(Square(origin_file, origin_rank))
+        if piece and piece.type == PieceType.KING and origin_rank == dest_rank and origin_file == 4 and dest_file in [0, 7]:
+            castle_dest_file = 6 if dest_file == 7 else 2
+            code = (origin_index << PolyglotBook.FROM_SHIFT) | (8 * dest_rank + castle_dest_file)
+
+        return board_state.get_legal_move_by_code(code)
+
+    @staticmethod
+    def move_to_raw_move(move: Move) -> int:
+        """
+        Maps a move to its Polyglot encoding, where castling moves are encoded as the king capturing its own rook
+        :param move: the move
+        :return: the Polyglot move
+        """
+        if move.castle_short or move.castle_long:
+            rook_file = 7 if move.castle_short else 0
+            return (move.code & ~PolyglotBook.TO_MASK) | (8 * move.dest_square.rank + rook_file)
+        return move.code
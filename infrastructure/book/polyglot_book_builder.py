@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+from itertools import groupby
+from multiprocessing import Pool
+from typing import Generator
+
+from domain.game.model.board import get_stating_board
+from infrastructure.book.polyglot_book import PolyglotBook
+from infrastructure.database.sorted_record_file import SortedRecordFile, merge_runs, write_run
+from infrastructure.notation.mapper.move_mapper import SANMoveMapper
+from infrastructure.pgn.pgn_reader import PGNReader
+
+
+class PolyglotBookBuilder:
+    """
+    Builds Polyglot opening books from PGN files.
+    The files are split in chunks at game boundaries and the chunks are replayed in parallel worker processes up to a
+    maximum ply. Each worker aggregates the games, wins and draws of every (position, move) pair in memory and writes
+    them to a sorted run file whenever the number of pairs reaches a limit, so memory stays bounded regardless of the
+    size of the input. The runs are then merged in a single streaming pass that writes the book.
+    """
+
+    RUN_RECORD = struct.Struct('<QHIII')
+    MAX_WEIGHT = 0xFFFF
+
+    def __init__(self,
+                 max_ply: int = 20,
+                 min_games: int = 1,
+                 processes: int = None,
+                 chunk_size: int = 64 * 1024 * 1024,
+                 max_records_in_memory: int = 1_000_000,
+                 tmp_dir: str = None):
+        """
+        Constructor
+        :param max_ply: number of plies of each game added to the book
+        :param min_games: minimum number of games in which a move was played to add it to the book
+        :param processes: number of worker processes. Defaults to the number of cores.
+        :param chunk_size: approximate size in bytes of the pieces in which the PGN files are split
+        :param max_records_in_memory: number of (position, move) pairs a worker keeps in memory before writing a run
+        :param tmp_dir: (optional) directory for the run files. Defaults to the system's temporary directory.
+        """
+        self._max_ply = max_ply
+        self._min_games = min_games
+        self._processes = processes or os.cpu_count()
+        self._chunk_size = chunk_size
+        self._max_records_in_memory = max_records_in_memory
+        self._tmp_dir = tmp_dir
+
+    def build(self, pgn_paths: list[str], book_path: str) -> int:
+        """
+        Builds a book
+        :param pgn_paths: paths of the PGN files
+        :param book_path: path of the resulting .bin file
+        :return: the number of entries in the book
+        """
+        with tempfile.TemporaryDirectory(dir=self._tmp_dir) as run_dir:
+            tasks = []
+            for path in pgn_paths:
+                with PGNReader(path) as reader:
+                    tasks += [(path, start, end, self._max_ply, run_dir, self._max_records_in_memory)
+                              for start, end in reader.split(self._chunk_size)]
+
+            if self._processes == 1:
+                run_paths = [run_path for task in tasks for run_path in _process_chunk(task)]
+            else:
+                with Pool(self._processes) as pool:
+                    run_paths = [run_path for run_paths in pool.imap_unordered(_process_chunk, tasks) for run_path in run_paths]
+
+            return SortedRecordFile.create(book_path, PolyglotBook.ENTRY, self._entries(run_paths))
+
+    def _entries(self, run_paths: list[str]) -> Generator[tuple[int, int, int, int]]:
+        """
+        Merges the sorted runs, combining the records of the same (position, move) pair into the entries of the book
+        :param run_paths: paths of the run files
+        :return: generator of (key, move, weight, learn) entries, sorted by key
+        """
+        records = merge_runs(run_paths, PolyglotBookBuilder.RUN_RECORD)
+        for key, key_records in groupby(records, key=lambda record: record[0]):
+            moves = []
+            for raw_move, move_records in groupby(key_records, key=lambda record: record[1]):
+                games = wins = draws = 0
+                for _, _, record_games, record_wins, record_draws in move_records:
+                    games += record_games
+                    wins += record_wins
+                    draws += record_draws
+                weight = 2 * wins + draws
+                if games >= self._min_games and weight > 0:
+                    moves.append((raw_move, weight))
+
+            if not moves:
+                continue
+
+            max_weight = max([weight for _, weight in moves])
+            scale = min(1.0, PolyglotBookBuilder.MAX_WEIGHT / max_weight)
+            moves.sort(key=lambda move_weight: move_weight[1], reverse=True)
+            for raw_move, weight in moves:
+                yield key, raw_move, max(1, int(weight * scale)), 0
+
+
+RESULTS = {
+    '1-0': (1, 0),
+    '0-1': (0, 1),
+    '1/2-1/2': (0, 0),
+}
+
+
+def _process_chunk(task: tuple[str, int, int, int, str, int]) -> list[str]:
+    """
+    Replays the games of a chunk of a PGN file, writing the aggregated (position, move) records to sorted runs
+    :param task: tuple with the path of the file, the start and end offsets of the chunk, the maximum ply, the directory of the runs and the maximum number of records in memory
+    :return: the paths of the written runs
+    """
+    path, start, end, max_ply, run_dir, max_records_in_memory = task
+    records: dict[tuple[int, int], list[int]] = {}
+    run_paths = []
+
+    with PGNReader(path) as reader:
+        for game in reader.games(start, end):
+            result = RESULTS.get(game.result)
+            if result is None or 'FEN' in game.headers:
+                # unfinished games or games that don't start from the initial position
+                continue
+
+            board_state = get_stating_board()
+            for san_move in game.moves[:max_ply]:
+                move = SANMoveMapper.san_to_move(san_move, board_state)
+                if move is None:
+                    break
+
+                record_key = (board_state.hash, PolyglotBook.move_to_raw_move(move))
+                record = records.get(record_key)
+                if record is None:
+                    record = records[record_key] = [0, 0, 0]
+                record[0] += 1
+                if result == (0, 0):
+                    record[2] += 1
+                elif result[0 if board_state.white_to_move else 1]:
+                    record[1] += 1
+
+                board_state.perform_move(move, update=True)
+
+            if len(records) >= max_records_in_memory:
+                run_paths.append(_write_run(records, run_dir))
+                records = {}
+
+    if records:
+        run_paths.append(_write_run(records, run_dir))
+    return run_paths
+
+
+def _write_run(records: dict[tuple[int, int], list[int]], run_dir: str) -> str:
+    """
+    Writes the aggregated records to a new run file
+    :param records: dictionary from (key, move) to [games, wins, draws]
+    :param run_dir: directory of the run
+    :return: the path of the run
+    """
+    return write_run([(key, raw_move, *record) for (key, raw_move), record in records.items()],
+                     PolyglotBookBuilder.RUN_RECORD, run_dir)
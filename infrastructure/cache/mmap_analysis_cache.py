@@ -0,0 +1,131 @@
+import mmap
+import os
+import struct
+
+from domain.engine.port.analysis_cache import AnalysisCache
+from domain.engine.transposition_table import Bound, TranspositionEntry
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+
+
+class MmapAnalysisCache(AnalysisCache):
+    """
+    Hash table of search results stored in a memory-mapped file, keyed by the Zobrist hash of the position.
+    The number of entries is fixed when the file is created. Entries are written without locks: each slot holds the
+    key XORed with the data, so an entry torn by a concurrent write from another process fails the check and is ignored.
+    Any number of processes can open the same file at once.
+    """
+
+    MAGIC = b'CHSCACHE'
+    VERSION = 1
+    HEADER = struct.Struct('<8sII')
+    ENTRY = struct.Struct('<QQ')
+    SCORE = struct.Struct('<f')
+
+    MOVE_SHIFT = 32
+    DEPTH_SHIFT = 48
+    BOUND_SHIFT = 56
+    NO_MOVE = 0
+    MAX_DEPTH = 255
+
+    def __init__(self, path: str, entries: int = 2 ** 20, read_only: bool = False):
+        """
+        Opens the cache file, creating it if it doesn't exist
+        :param path: path of the file
+        :param entries: number of entries of a new file, rounded down to a power of two. Ignored if the file exists.
+        :param read_only: if True, the file is opened read-only and store() does nothing
+        """
+        if not os.path.exists(path):
+            if read_only:
+                raise FileNotFoundError(f'Analysis cache {path} does not exist')
+            MmapAnalysisCache._create(path, entries)
+
+        self._read_only = read_only
+        self._file = open(path, 'rb' if read_only else 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ if read_only else mmap.ACCESS_WRITE)
+
+        magic, version, size_bits = MmapAnalysisCache.HEADER.unpack_from(self._mmap, 0)
+        if magic != MmapAnalysisCache.MAGIC or version != MmapAnalysisCache.VERSION:
+            self.close()
+            raise ValueError(f'{path} is not an analysis cache file')
+        self._size = 1 << size_bits
+        self._mask = self._size - 1
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def probe(self, board_state: BoardState) -> TranspositionEntry | None:
+        hash = board_state.hash
+        offset = MmapAnalysisCache.HEADER.size + (hash & self._mask) * MmapAnalysisCache.ENTRY.size
+        checksum, data = MmapAnalysisCache.ENTRY.unpack_from(self._mmap, offset)
+        if checksum ^ data != hash or data == 0:
+            return None
+
+        score = MmapAnalysisCache.SCORE.unpack(struct.pack('<I', data & 0xFFFFFFFF))[0]
+        move_code = (data >> MmapAnalysisCache.MOVE_SHIFT) & 0xFFFF
+        depth = (data >> MmapAnalysisCache.DEPTH_SHIFT) & 0xFF
+        bound = Bound((data >> MmapAnalysisCache.BOUND_SHIFT) & 0x3)
+
+        move = None
+        if move_code != MmapAnalysisCache.NO_MOVE:
+            move = board_state.get_legal_move_by_code(move_code)
+            if move is None:
+                # hash collision with a different position
+                return None
+
+        return TranspositionEntry(hash, depth, bound, score, move)
+
+    def store(self, board_state: BoardState, depth: int, bound: Bound, score: float, move: Move | None):
+        if self._read_only:
+            return
+
+        hash = board_state.hash
+        offset = MmapAnalysisCache.HEADER.size + (hash & self._mask) * MmapAnalysisCache.ENTRY.size
+        checksum, data = MmapAnalysisCache.ENTRY.unpack_from(self._mmap, offset)
+        if checksum ^ data == hash and (data >> MmapAnalysisCache.DEPTH_SHIFT) & 0xFF > depth:
+            # keep the deeper result for the same position
+            return
+
+        data = struct.unpack('<I', MmapAnalysisCache.SCORE.pack(score))[0]
+        data |= (move.code if move else MmapAnalysisCache.NO_MOVE) << MmapAnalysisCache.MOVE_SHIFT
+        data |= min(max(depth, 0), MmapAnalysisCache.MAX_DEPTH) << MmapAnalysisCache.DEPTH_SHIFT
+        data |= bound.value << MmapAnalysisCache.BOUND_SHIFT
+        MmapAnalysisCache.ENTRY.pack_into(self._mmap, offset, hash ^ data, data)
+
+    def flush(self):
+        """
+        Writes the changes to disk
+        """
+        if not self._read_only:
+            self._mmap.flush()
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _create(path: str, entries: int):
+        """
+        Creates an empty cache file. It's written to a temporary file and then linked to the final path, so that other
+        processes never see a partial file and a file created concurrently by another process is not replaced.
+        :param path: path of the file
+        :param entries: number of entries, rounded down to a power of two
+        """
+        size_bits = max(1, entries).bit_length() - 1
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(MmapAnalysisCache.HEADER.pack(MmapAnalysisCache.MAGIC, MmapAnalysisCache.VERSION, size_bits))
+            file.truncate(MmapAnalysisCache.HEADER.size + (1 << size_bits) * MmapAnalysisCache.ENTRY.size)
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import struct
+from typing import Generator, Iterable
+
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+from infrastructure.database.sorted_record_file import SortedRecordFile
+
+
+class Continuation:
+    """
+    Statistics of a move played from a position
+    """
+
+    __slots__ = ('move', 'white_wins', 'draws', 'black_wins', 'rating_sum', 'rated_players')
+
+    def __init__(self, move: Move, white_wins: int, draws: int, black_wins: int, rating_sum: int, rated_players: int):
+        self.move = move
+        self.white_wins = white_wins
+        self.draws = draws
+        self.black_wins = black_wins
+        # sum of the ratings of the players of the games, and number of players with a rating
+        self.rating_sum = rating_sum
+        self.rated_players = rated_players
+
+    @property
+    def games(self) -> int:
+        return self.white_wins + self.draws + self.black_wins
+
+    @property
+    def average_rating(self) -> float | None:
+        """
+        :return: the average rating of the players of the games, or None if none of them has a rating
+        """
+        return self.rating_sum / self.rated_players if self.rated_players else None
+
+
+class OpeningExplorer:
+    """
+    Reader of the opening explorer indexes written by OpeningExplorerBuilder: one record per (position, move) of a
+    position database, with the results of its games and the ratings of their players, sorted by the Zobrist hash of
+    the position. The file is a SortedRecordFile, so the continuations of a position are found with a binary search
+    over the mapped file and a query reads a few pages of it whatever its size.
+    """
+
+    MAGIC = b'CHSOPENX'
+    VERSION = 1
+    HEADER = struct.Struct('<8sI')
+    # key, move code, white wins, draws, black wins, sum of the ratings, rated players
+    RECORD = struct.Struct('<QHIIIQI')
+    KEY = struct.Struct('<Q')
+
+    def __init__(self, path: str):
+        """
+        Opens an index
+        :param path: path of the file
+        """
+        self._records = SortedRecordFile(path, OpeningExplorer.RECORD, OpeningExplorer.KEY, OpeningExplorer.HEADER)
+        if self._records.header() != (OpeningExplorer.MAGIC, OpeningExplorer.VERSION):
+            self.close()
+            raise ValueError(f'{path} is not an opening explorer file')
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get_continuations(self, board_state: BoardState) -> list[Continuation]:
+        """
+        Returns the moves played from a position
+        :param board_state: the position
+        :return: the statistics of each move, the most played first
+        """
+        continuations = []
+        for _, move_code, white_wins, draws, black_wins, rating_sum, rated_players in self.records(board_state.hash):
+            move = board_state.get_legal_move_by_code(move_code)
+            if move is not None:
+                # illegal moves come from key collisions with other positions
+                continuations.append(Continuation(move, white_wins, draws, black_wins, rating_sum, rated_players))
+        continuations.sort(key=lambda continuation: continuation.games, reverse=True)
+        return continuations
+
+    def records(self, key: int | None = None) -> Generator[tuple[int, int, int, int, int, int, int]]:
+        """
+        Streams the records of the index
+        :param key: (optional) Zobrist hash of a position, to stream only its records
+        :return: generator of (key, move code, white wins, draws, black wins, sum of the ratings, rated players) tuples
+        """
+        return self._records.records(key)
+
+    def close(self):
+        self._records.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def create(path: str, records: Iterable[tuple[int, int, int, int, int, int, int]]) -> int:
+        """
+        Writes an index
+        :param path: path of the file
+        :param records: (key, move code, white wins, draws, black wins, sum of the ratings, rated players) tuples, sorted
+        :return: the number of records written
+        """
+        return SortedRecordFile.create(path, OpeningExplorer.RECORD, records,
+                                       OpeningExplorer.HEADER.pack(OpeningExplorer.MAGIC, OpeningExplorer.VERSION))
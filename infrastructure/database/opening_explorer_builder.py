@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Generator
+
+from infrastructure.database.opening_explorer import OpeningExplorer
+from infrastructure.database.position_database import PositionDatabase
+
+
+class OpeningExplorerBuilder:
+    """
+    Builds an OpeningExplorer index from a PositionDatabase.
+    The records of the database, already sorted by position and move and carrying the ratings of the players of their
+    games, are aggregated in a single streaming pass, so the index is written sorted without any further sorting and
+    memory stays constant regardless of the size of the database.
+    """
+
+    def build(self, database_path: str, explorer_path: str) -> int:
+        """
+        Builds an index
+        :param database_path: path of the position database
+        :param explorer_path: path of the resulting index
+        :return: the number of records in the index
+        """
+        with PositionDatabase(database_path) as database:
+            return OpeningExplorer.create(explorer_path, _aggregate(database.records()))
+
+
+def _aggregate(records: Generator[tuple[int, int, int, int, int, int]]) -> Generator[tuple[int, int, int, int, int, int, int]]:
+    """
+    Aggregates the records of a position database by position and move, counting each game once
+    :param records: (key, move code, result, game id, sum of the ratings, rated players) tuples, sorted
+    :return: generator of (key, move code, white wins, draws, black wins, sum of the ratings, rated players) tuples
+    """
+    current = None
+    last_game_id = None
+    counts = [0, 0, 0]
+    rating_sum = rated_players = 0
+    for key, move_code, result, game_id, game_rating_sum, game_rated_players in records:
+        if (key, move_code) != current:
+            if current is not None:
+                yield current + (counts[0], counts[1], counts[2], rating_sum, rated_players)
+            current = (key, move_code)
+            last_game_id = None
+            counts = [0, 0, 0]
+            rating_sum = rated_players = 0
+
+        if game_id == last_game_id:
+            # the same position and move repeated in a game. The records of a game are consecutive, as they share
+            # the result and the records are sorted by it before the game id
+            continue
+        last_game_id = game_id
+
+        # white wins, draws and black wins, from results 1, 0 and -1
+        counts[1 - result] += 1
+        rating_sum += game_rating_sum
+        rated_players += game_rated_players
+
+    if current is not None:
+        yield current + (counts[0], counts[1], counts[2], rating_sum, rated_players)
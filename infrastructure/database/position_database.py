@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import struct
+from typing import Generator, Iterable
+
+from domain.game.model.board import BoardState
+from domain.game.model.move import Move
+from infrastructure.database.sorted_record_file import SortedRecordFile
+
+
+class PositionDatabase:
+    """
+    Reader of the position databases written by PositionDatabaseBuilder: one record per (position, move) of each
+    ingested game, with the result of the game, the id of the game and the ratings of its players, sorted by the
+    Zobrist hash of the position.
+    The file is a SortedRecordFile, so the records of a position are found with a binary search over the mapped file.
+    The id of a game is the index of its PGN file in the list given to the builder and the byte offset of the game in
+    that file, so the game can be read again with PGNReader.read_game.
+    """
+
+    MAGIC = b'CHSPOSDB'
+    VERSION = 2
+    HEADER = struct.Struct('<8sI')
+    # key, move code, result, game id, sum of the ratings of the players of the game, rated players
+    RECORD = struct.Struct('<QHbQHB')
+    KEY = struct.Struct('<Q')
+
+    # results, from the point of view of white
+    WHITE_WIN = 1
+    DRAW = 0
+    BLACK_WIN = -1
+
+    GAME_FILE_SHIFT = 48
+    GAME_OFFSET_MASK = (1 << GAME_FILE_SHIFT) - 1
+
+    def __init__(self, path: str):
+        """
+        Opens a database
+        :param path: path of the file
+        """
+        self._records = SortedRecordFile(path, PositionDatabase.RECORD, PositionDatabase.KEY, PositionDatabase.HEADER)
+        if self._records.header() != (PositionDatabase.MAGIC, PositionDatabase.VERSION):
+            self.close()
+            raise ValueError(f'{path} is not a position database file')
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def game_id(file_index: int, offset: int) -> int:
+        """
+        :param file_index: index of the PGN file of the game
+        :param offset: byte offset of the game in its file
+        :return: the id of the game
+        """
+        return (file_index << PositionDatabase.GAME_FILE_SHIFT) | offset
+
+    @staticmethod
+    def split_game_id(game_id: int) -> tuple[int, int]:
+        """
+        :param game_id: the id of a game
+        :return: the index of the PGN file of the game and the byte offset of the game in its file
+        """
+        return game_id >> PositionDatabase.GAME_FILE_SHIFT, game_id & PositionDatabase.GAME_OFFSET_MASK
+
+    def get_records(self, board_state: BoardState) -> list[tuple[Move, int, int]]:
+        """
+        Returns the records of a position
+        :param board_state: the position
+        :return: list of tuples with the move, the result and the id of the game of each record
+        """
+        records = []
+        for _, move_code, result, game_id, _, _ in self.records(board_state.hash):
+            move = board_state.get_legal_move_by_code(move_code)
+            if move is not None:
+                # illegal moves come from key collisions with other positions
+                records.append((move, result, game_id))
+        return records
+
+    def records(self, key: int | None = None) -> Generator[tuple[int, int, int, int, int, int]]:
+        """
+        Streams the records of the database
+        :param key: (optional) Zobrist hash of a position, to stream only its records
+        :return: generator of (key, move code, result, game id, sum of the ratings, rated players) tuples
+        """
+        return self._records.records(key)
+
+    def close(self):
+        self._records.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def create(path: str, records: Iterable[tuple[int, int, int, int, int, int]]) -> int:
+        """
+        Writes a database
+        :param path: path of the file
+        :param records: (key, move code, result, game id, sum of the ratings, rated players) tuples, sorted
+        :return: the number of records written
+        """
+        return SortedRecordFile.create(path, PositionDatabase.RECORD, records,
+                                       PositionDatabase.HEADER.pack(PositionDatabase.MAGIC, PositionDatabase.VERSION))
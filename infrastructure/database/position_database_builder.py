@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from multiprocessing import Pool
+
+from domain.game.model.board import get_stating_board
+from infrastructure.database.position_database import PositionDatabase
+from infrastructure.database.sorted_record_file import merge_runs, write_run
+from infrastructure.notation.mapper.board_mapper import FENBoardStateMapper
+from infrastructure.notation.mapper.move_mapper import SANMoveMapper
+from infrastructure.pgn.pgn_reader import PGNReader
+
+
+class PositionDatabaseBuilder:
+    """
+    Ingests PGN files into a PositionDatabase.
+    The files are split in chunks at game boundaries and the chunks are replayed in parallel worker processes. Each
+    worker writes a record for every (position, move) of its games, with the ratings of the players read from the
+    headers of the game, keeping them in memory and writing them to a sorted run file whenever their number reaches a
+    limit, so memory stays bounded regardless of the size of the input. The runs are then merged in a single streaming
+    pass that writes the database.
+    """
+
+    RATING_TAGS = ['WhiteElo', 'BlackElo']
+    # higher ratings are considered invalid
+    MAX_RATING = 4000
+
+    def __init__(self,
+                 max_ply: int | None = None,
+                 processes: int = None,
+                 chunk_size: int = 64 * 1024 * 1024,
+                 max_records_in_memory: int = 1_000_000,
+                 tmp_dir: str = None):
+        """
+        Constructor
+        :param max_ply: (optional) number of plies of each game added to the database. Defaults to the whole game.
+        :param processes: number of worker processes. Defaults to the number of cores.
+        :param chunk_size: approximate size in bytes of the pieces in which the PGN files are split
+        :param max_records_in_memory: number of records a worker keeps in memory before writing a run
+        :param tmp_dir: (optional) directory for the run files. Defaults to the system's temporary directory.
+        """
+        self._max_ply = max_ply
+        self._processes = processes or os.cpu_count()
+        self._chunk_size = chunk_size
+        self._max_records_in_memory = max_records_in_memory
+        self._tmp_dir = tmp_dir
+
+    def build(self, pgn_paths: list[str], database_path: str) -> int:
+        """
+        Builds a database
+        :param pgn_paths: paths of the PGN files. The index of each file in the list is part of the ids of its games.
+        :param database_path: path of the resulting database
+        :return: the number of records in the database
+        """
+        with tempfile.TemporaryDirectory(dir=self._tmp_dir) as run_dir:
+            tasks = []
+            for file_index, path in enumerate(pgn_paths):
+                with PGNReader(path) as reader:
+                    tasks += [(path, file_index, start, end, self._max_ply, run_dir, self._max_records_in_memory)
+                              for start, end in reader.split(self._chunk_size)]
+
+            if self._processes == 1:
+                run_paths = [run_path for task in tasks for run_path in _process_chunk(task)]
+            else:
+                with Pool(self._processes) as pool:
+                    run_paths = [run_path for run_paths in pool.imap_unordered(_process_chunk, tasks) for run_path in run_paths]
+
+            return PositionDatabase.create(database_path, merge_runs(run_paths, PositionDatabase.RECORD))
+
+
+RESULTS = {
+    '1-0': PositionDatabase.WHITE_WIN,
+    '0-1': PositionDatabase.BLACK_WIN,
+    '1/2-1/2': PositionDatabase.DRAW,
+}
+
+
+def _process_chunk(task: tuple[str, int, int, int, int | None, str, int]) -> list[str]:
+    """
+    Replays the games of a chunk of a PGN file, writing their (position, move) records to sorted runs
+    :param task: tuple with the path of the file, its index, the start and end offsets of the chunk, the maximum ply, the directory of the runs and the maximum number of records in memory
+    :return: the paths of the written runs
+    """
+    path, file_index, start, end, max_ply, run_dir, max_records_in_memory = task
+    records: list[tuple[int, int, int, int, int, int]] = []
+    run_paths = []
+
+    with PGNReader(path) as reader:
+        for game in reader.games(start, end):
+            result = RESULTS.get(game.result)
+            if result is None:
+                # unfinished games
+                continue
+
+            if 'FEN' in game.headers:
+                try:
+                    board_state = FENBoardStateMapper.fen_to_board_state(game.headers['FEN'])
+                except ValueError:
+                    continue
+            else:
+                board_state = get_stating_board()
+
+            game_id = PositionDatabase.game_id(file_index, game.start)
+            rating_sum, rated_players = _read_ratings(game.headers)
+            for san_move in game.moves[:max_ply]:
+                move = SANMoveMapper.san_to_move(san_move, board_state)
+                if move is None:
+                    break
+                records.append((board_state.hash, move.code, result, game_id, rating_sum, rated_players))
+                board_state.perform_move(move, update=True)
+
+            if len(records) >= max_records_in_memory:
+                run_paths.append(write_run(records, PositionDatabase.RECORD, run_dir))
+                records = []
+
+    if records:
+        run_paths.append(write_run(records, PositionDatabase.RECORD, run_dir))
+    return run_paths
+
+
+def _read_ratings(headers: dict[str, str]) -> tuple[int, int]:
+    """
+    Reads the ratings of the players of a game
+    :param headers: the headers of the game
+    :return: the sum of the valid ratings and the number of players with a valid rating
+    """
+    rating_sum = rated_players = 0
+    for tag in PositionDatabaseBuilder.RATING_TAGS:
+        try:
+            rating = int(headers.get(tag, ''))
+        except ValueError:
+            continue
+        if 0 < rating <= PositionDatabaseBuilder.MAX_RATING:
+            rating_sum += rating
+            rated_players += 1
+    return rating_sum, rated_players
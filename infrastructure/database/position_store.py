@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import Generator, Iterable
+
+from domain.game.model.board import BoardState
+
+
+class PositionStore:
+    """
+    File of positions packed with BoardState.to_bytes, one fixed-size record after another. The file is
+    memory-mapped, so opening it takes constant time whatever its size, and the records can be read one by one as
+    BoardState instances or all at once as a NumPy structured array that shares the memory of the file.
+    """
+
+    MAGIC = b'CHSPOSST'
+    VERSION = 1
+    # the records start at a multiple of 8 bytes, so that the fields of the NumPy views are aligned
+    HEADER = struct.Struct('<8sII')
+
+    # fields of the records in the NumPy views, matching BoardState.PACKED
+    DTYPE_FIELDS = [
+        ('occupied', '<u8'),
+        ('pieces', 'u1', (16,)),
+        ('flags', 'u1'),
+        ('en_passant', 'u1'),
+        ('halfmove_clock', '<u2'),
+        ('fullmove_number', '<u2'),
+        ('reserved', 'V2'),
+    ]
+
+    def __init__(self, path: str):
+        """
+        Opens a store
+        :param path: path of the file
+        """
+        self._file = open(path, 'rb')
+        self._mmap = None
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap is None or len(self._mmap) < PositionStore.HEADER.size:
+            self.close()
+            raise ValueError(f'{path} is not a position store file')
+
+        magic, version, record_size = PositionStore.HEADER.unpack_from(self._mmap, 0)
+        if magic != PositionStore.MAGIC or version != PositionStore.VERSION or record_size != BoardState.PACKED_SIZE:
+            self.close()
+            raise ValueError(f'{path} is not a position store file')
+        self._num_records = (len(self._mmap) - PositionStore.HEADER.size) // BoardState.PACKED_SIZE
+
+    def __len__(self) -> int:
+        return self._num_records
+
+    def __getitem__(self, index: int) -> BoardState:
+        """
+        :param index: index of the record
+        :return: the position of the record
+        """
+        return BoardState.from_bytes(self._mmap, self._offset(index))
+
+    def __iter__(self) -> Generator[BoardState]:
+        for index in range(self._num_records):
+            yield BoardState.from_bytes(self._mmap, PositionStore.HEADER.size + index * BoardState.PACKED_SIZE)
+
+    def get_bytes(self, index: int) -> memoryview:
+        """
+        :param index: index of the record
+        :return: the packed position of the record, without copying it
+        """
+        offset = self._offset(index)
+        return memoryview(self._mmap)[offset:offset + BoardState.PACKED_SIZE]
+
+    def array(self):
+        """
+        Views the records as a read-only NumPy structured array (with the fields of PositionStore.DTYPE_FIELDS) that
+        shares the memory of the file, so no record is copied or read from disk until it's used. The store can't be
+        closed while the array, or any view of it, is alive. Requires NumPy.
+        :return: the array of the records
+        """
+        import numpy as np
+
+        return np.frombuffer(self._mmap, dtype=np.dtype(PositionStore.DTYPE_FIELDS), count=self._num_records,
+                             offset=PositionStore.HEADER.size)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _offset(self, index: int) -> int:
+        if index < 0:
+            index += self._num_records
+        if not 0 <= index < self._num_records:
+            raise IndexError(f'Record {index} out of range')
+        return PositionStore.HEADER.size + index * BoardState.PACKED_SIZE
+
+    @staticmethod
+    def create(path: str, positions: Iterable[BoardState | bytes], append: bool = False) -> int:
+        """
+        Writes a store
+        :param path: path of the file
+        :param positions: positions, or positions already packed with BoardState.to_bytes
+        :param append: if True and the file exists, the positions are added after its records. Raises ValueError if the file isn't a position store.
+        :return: number of positions written
+        """
+        count = 0
+        append = append and os.path.exists(path) and os.path.getsize(path) > 0
+        if append:
+            with open(path, 'rb') as file:
+                header = file.read(PositionStore.HEADER.size)
+            if len(header) < PositionStore.HEADER.size or \
+                    PositionStore.HEADER.unpack(header) != (PositionStore.MAGIC, PositionStore.VERSION, BoardState.PACKED_SIZE) or \
+                    (os.path.getsize(path) - PositionStore.HEADER.size) % BoardState.PACKED_SIZE:
+                raise ValueError(f'{path} is not a position store file')
+        with open(path, 'ab' if append else 'wb') as file:
+            if not append:
+                file.write(PositionStore.HEADER.pack(PositionStore.MAGIC, PositionStore.VERSION, BoardState.PACKED_SIZE))
+            buffer = bytearray()
+            for position in positions:
+                buffer += position if isinstance(position, (bytes, bytearray, memoryview)) else position.to_bytes()
+                count += 1
+                if len(buffer) >= 1 << 20:
+                    file.write(buffer)
+                    buffer.clear()
+            file.write(buffer)
+        return count
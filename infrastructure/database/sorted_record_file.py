@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from typing import Generator, Iterable
+
+
+class SortedRecordFile:
+    """
+    File of fixed-size records sorted by a key at the start of each record, after an optional header. The file is
+    memory-mapped and the records of a key are found with a binary search, so opening it takes constant time and a
+    lookup only touches a few pages whatever its size. Used by the Polyglot books, the position databases and the
+    opening explorer indexes.
+    """
+
+    BLOCK_RECORDS = 4096
+
+    def __init__(self, path: str, record: struct.Struct, key: struct.Struct, header: struct.Struct | None = None):
+        """
+        Opens a file
+        :param path: path of the file
+        :param record: format of the records
+        :param key: format of the key at the start of each record, with the same byte order as the record
+        :param header: (optional) format of the header of the file
+        """
+        self._file = open(path, 'rb')
+        self._mmap = None
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._record = record
+        self._key = key
+        self._header = header
+        self._header_size = header.size if header else 0
+        size = len(self._mmap) if self._mmap is not None else 0
+        self._num_records = max(0, size - self._header_size) // record.size
+
+    def __len__(self) -> int:
+        return self._num_records
+
+    def header(self) -> tuple | None:
+        """
+        :return: the values of the header, or None if the file has no header or is too short to have one
+        """
+        if self._header is None or self._mmap is None or len(self._mmap) < self._header_size:
+            return None
+        return self._header.unpack_from(self._mmap, 0)
+
+    def records(self, key: int | None = None) -> Generator[tuple]:
+        """
+        Streams the records of the file
+        :param key: (optional) key of the records to stream. Defaults to all of them.
+        :return: generator of the unpacked records
+        """
+        record_size = self._record.size
+        index = 0 if key is None else self.lower_bound(key)
+        offset = self._header_size + index * record_size
+        end = self._header_size + self._num_records * record_size
+        while offset < end:
+            record = self._record.unpack_from(self._mmap, offset)
+            if key is not None and record[0] != key:
+                return
+            yield record
+            offset += record_size
+
+    def lower_bound(self, key: int) -> int:
+        """
+        Finds the first record with a key greater or equal than the given one
+        :param key: the key
+        :return: the index of the record, or the number of records if all the keys are lower
+        """
+        low = 0
+        high = self._num_records
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = self._key.unpack_from(self._mmap, self._header_size + middle * self._record.size)[0]
+            if middle_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def create(path: str, record: struct.Struct, records: Iterable[tuple], header: bytes = b'') -> int:
+        """
+        Writes a file
+        :param path: path of the file
+        :param record: format of the records
+        :param records: the records, sorted by key
+        :param header: (optional) packed header of the file
+        :return: the number of records written
+        """
+        num_records = 0
+        block = []
+        with open(path, 'wb') as file:
+            file.write(header)
+            for values in records:
+                block.append(record.pack(*values))
+                if len(block) == SortedRecordFile.BLOCK_RECORDS:
+                    file.write(b''.join(block))
+                    num_records += len(block)
+                    block = []
+            file.write(b''.join(block))
+            num_records += len(block)
+        return num_records
+
+
+def write_run(records: Iterable[tuple], record: struct.Struct, run_dir: str) -> str:
+    """
+    Writes records sorted to a new run file, to be merged later with merge_runs
+    :param records: the records
+    :param record: format of the records
+    :param run_dir: directory of the run
+    :return: the path of the run
+    """
+    file_descriptor, run_path = tempfile.mkstemp(suffix='.run', dir=run_dir)
+    with os.fdopen(file_descriptor, 'wb') as run_file:
+        run_file.write(b''.join([record.pack(*values) for values in sorted(records)]))
+    return run_path
+
+
+def merge_runs(run_paths: list[str], record: struct.Struct) -> Generator[tuple]:
+    """
+    Merges run files written by write_run in a single streaming pass
+    :param run_paths: paths of the runs
+    :param record: format of the records
+    :return: generator of the records of all the runs, sorted
+    """
+    return heapq.merge(*[_read_run(run_path, record) for run_path in run_paths])
+
+
+def _read_run(run_path: str, record: struct.Struct) -> Generator[tuple]:
+    """
+    Streams the records of a run file
+    :param run_path: the path of the run
+    :param record: format of the records
+    :return: generator of the unpacked records
+    """
+    with open(run_path, 'rb') as run_file:
+        while block := run_file.read(record.size * SortedRecordFile.BLOCK_RECORDS):
+            yield from record.iter_unpack(block)
@@ -0,0 +1,106 @@
+import math
+from enum import Enum
+from statistics import NormalDist
+
+
+def expected_score(elo: float) -> float:
+    """
+    :param elo: Elo difference between two players
+    :return: expected score per game of the first player, between 0 and 1
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_from_score(score: float) -> float:
+    """
+    :param score: score per game of a player, between 0 and 1
+    :return: the Elo difference that gives that expected score (infinite for a score of 0 or 1)
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_statistics(wins: int, draws: int, losses: int) -> tuple[float, float]:
+    """
+    :return: the mean and the variance of the score per game
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.5, 0.0
+    mean = (wins + draws / 2) / games
+    variance = (wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2) / games
+    return mean, variance
+
+
+def elo_interval(wins: int, draws: int, losses: int, confidence: float = 0.95) -> tuple[float, float]:
+    """
+    Estimates the Elo difference between two players from the results of their games
+    :param wins: games won by the first player
+    :param draws: games drawn
+    :param losses: games lost by the first player
+    :param confidence: confidence of the interval
+    :return: the estimated Elo difference and the half width of its confidence interval
+    """
+    games = wins + draws + losses
+    mean, variance = score_statistics(wins, draws, losses)
+    elo = elo_from_score(mean)
+    if games == 0 or math.isinf(elo):
+        # no games, or all of them won or lost by the same player
+        return elo, math.inf
+
+    deviation = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(variance / games)
+    return elo, (elo_from_score(mean + deviation) - elo_from_score(mean - deviation)) / 2
+
+
+class SPRTDecision(Enum):
+    CONTINUE = 0
+    # the first player isn't stronger by elo1
+    ACCEPT_H0 = 1
+    # the first player is stronger by elo1 rather than elo0
+    ACCEPT_H1 = 2
+
+
+class SPRT:
+    """
+    Sequential probability ratio test of the hypotheses 'the Elo difference is elo0' (H0) against 'the Elo difference
+    is elo1' (H1), with the normal approximation of the log-likelihood ratio used by Fishtest. A match can stop as soon
+    as the ratio crosses one of the bounds given by the error rates.
+    """
+
+    def __init__(self, elo0: float = 0, elo1: float = 10, alpha: float = 0.05, beta: float = 0.05):
+        """
+        Constructor
+        :param elo0: Elo difference of the null hypothesis
+        :param elo1: Elo difference of the alternative hypothesis
+        :param alpha: probability of accepting H1 when H0 is true
+        :param beta: probability of accepting H0 when H1 is true
+        """
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+
+    def llr(self, wins: int, draws: int, losses: int) -> float:
+        """
+        :return: the log-likelihood ratio of H1 against H0 given the results of the games
+        """
+        games = wins + draws + losses
+        mean, variance = score_statistics(wins, draws, losses)
+        if variance == 0:
+            return 0.0
+        score0, score1 = expected_score(self.elo0), expected_score(self.elo1)
+        return games * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+    def decide(self, wins: int, draws: int, losses: int) -> SPRTDecision:
+        """
+        :return: the decision of the test given the results of the games
+        """
+        llr = self.llr(wins, draws, losses)
+        if llr >= self.upper_bound:
+            return SPRTDecision.ACCEPT_H1
+        if llr <= self.lower_bound:
+            return SPRTDecision.ACCEPT_H0
+        return SPRTDecision.CONTINUE
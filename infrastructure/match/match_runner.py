@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import os
+from multiprocessing import Pool
+from typing import Callable
+
+from domain.engine.engine import Engine
+from domain.evaluator.evaluator import Evaluator
+from domain.game.model.game_status import GameStatus
+from infrastructure.match.elo import SPRT, SPRTDecision, elo_interval
+from infrastructure.notation.mapper.board_mapper import FENBoardStateMapper
+from infrastructure.pgn.pgn_writer import PGNWriter
+
+
+class PlayerConfig:
+    """
+    Configuration of a player of a match: an engine class with its options and an evaluator class with its options.
+    The engines are created in the worker processes, so the configuration only holds picklable values.
+    """
+
+    __slots__ = ('name', 'engine_class', 'engine_options', 'evaluator_class', 'evaluator_options')
+
+    def __init__(self,
+                 name: str,
+                 engine_class: type[Engine],
+                 evaluator_class: type[Evaluator],
+                 engine_options: dict | None = None,
+                 evaluator_options: dict | None = None):
+        """
+        Constructor
+        :param name: name of the player in the reports and the PGN
+        :param engine_class: class of the engine
+        :param evaluator_class: class of the evaluator
+        :param engine_options: (optional) keyword arguments of the engine, i.e.: its time or node budget per move
+        :param evaluator_options: (optional) keyword arguments of the evaluator
+        """
+        self.name = name
+        self.engine_class = engine_class
+        self.engine_options = engine_options or {}
+        self.evaluator_class = evaluator_class
+        self.evaluator_options = evaluator_options or {}
+
+    def create_engine(self) -> Engine:
+        return self.engine_class(evaluator=self.evaluator_class(**self.evaluator_options), **self.engine_options)
+
+
+class GameRecord:
+    """
+    Result and statistics of a game of a match. The statistics are indexed by player: 0 for the first player of the
+    match and 1 for the second one.
+    """
+
+    __slots__ = ('index', 'first_player_white', 'score', 'result', 'termination', 'plies', 'pgn',
+                 'nodes', 'time', 'depth', 'searches')
+
+    def __init__(self, index: int, first_player_white: bool):
+        self.index = index
+        self.first_player_white = first_player_white
+        # score of the first player: 1, 0.5 or 0
+        self.score = 0.5
+        self.result = '1/2-1/2'
+        self.termination = ''
+        self.plies = 0
+        self.pgn = ''
+        self.nodes = [0, 0]
+        self.time = [0.0, 0.0]
+        # sum of the depths of the searches
+        self.depth = [0, 0]
+        self.searches = [0, 0]
+
+
+class MatchResult:
+    """
+    Results of a match, from the point of view of the first player
+    """
+
+    def __init__(self, names: tuple[str, str]):
+        self.names = names
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.games: list[GameRecord] = []
+        self.sprt_decision = SPRTDecision.CONTINUE
+        self.llr = 0.0
+
+    def add(self, game: GameRecord):
+        self.games.append(game)
+        if game.score == 1:
+            self.wins += 1
+        elif game.score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    @property
+    def elo(self) -> tuple[float, float]:
+        """
+        :return: the estimated Elo difference of the first player over the second one and the half width of its 95% confidence interval
+        """
+        return elo_interval(self.wins, self.draws, self.losses)
+
+    def nps(self, player: int) -> float:
+        """
+        :param player: 0 for the first player, 1 for the second one
+        :return: average nodes per second of the searches of the player
+        """
+        time = sum([game.time[player] for game in self.games])
+        return sum([game.nodes[player] for game in self.games]) / time if time > 0 else 0.0
+
+    def average_depth(self, player: int) -> float:
+        """
+        :param player: 0 for the first player, 1 for the second one
+        :return: average depth of the searches of the player
+        """
+        searches = sum([game.searches[player] for game in self.games])
+        return sum([game.depth[player] for game in self.games]) / searches if searches else 0.0
+
+    def __str__(self):
+        elo, margin = self.elo
+        games = self.wins + self.draws + self.losses
+        text = (f'{self.names[0]} vs {self.names[1]}: {games} games, +{self.wins} ={self.draws} -{self.losses}, '
+                f'elo {elo:+.1f} +/- {margin:.1f}, '
+                f'nps {self.nps(0):.0f} / {self.nps(1):.0f}, depth {self.average_depth(0):.1f} / {self.average_depth(1):.1f}')
+        if self.sprt_decision != SPRTDecision.CONTINUE:
+            text += f', SPRT {self.sprt_decision.name} (llr {self.llr:.2f})'
+        return text
+
+
+class MatchRunner:
+    """
+    Plays matches between two player configurations. Each opening is played twice, swapping the colors, and the games
+    are played concurrently in a pool of worker processes. Games are adjudicated as draws when both players agree that
+    the position is balanced for some moves, and as wins when both agree that one side is winning. The match stops
+    early once an SPRT reaches a decision.
+    """
+
+    def __init__(self,
+                 first_player: PlayerConfig,
+                 second_player: PlayerConfig,
+                 openings: list[str] | None = None,
+                 games: int = 100,
+                 processes: int = None,
+                 sprt: SPRT | None = None,
+                 max_plies: int = 400,
+                 draw_move_number: int = 40,
+                 draw_move_count: int = 8,
+                 draw_score: float = 0.1,
+                 resign_move_count: int = 3,
+                 resign_score: float = 6.0,
+                 on_game: Callable[[GameRecord, MatchResult], None] = None):
+        """
+        Constructor
+        :param first_player: configuration of the first player
+        :param second_player: configuration of the second player
+        :param openings: (optional) FEN strings of the initial positions of the games. Defaults to the starting position.
+        :param games: maximum number of games, rounded up to an even number so that each opening is played with both colors
+        :param processes: number of worker processes. Defaults to the number of cores.
+        :param sprt: (optional) test that stops the match early
+        :param max_plies: number of plies after which a game is adjudicated as a draw
+        :param draw_move_number: first move number at which draws are adjudicated
+        :param draw_move_count: number of consecutive moves of each player with scores within draw_score to adjudicate a draw
+        :param draw_score: maximum absolute score, in pawns, of a balanced position
+        :param resign_move_count: number of consecutive moves of each player with scores beyond resign_score for the same side to adjudicate a win
+        :param resign_score: minimum absolute score, in pawns, of a won position
+        :param on_game: (optional) callback invoked with each finished game and the results so far
+        """
+        self._players = (first_player, second_player)
+        self._openings = openings or [FENBoardStateMapper.STARTING_FEN]
+        self._games = games + games % 2
+        self._processes = processes or os.cpu_count()
+        self._sprt = sprt
+        self._adjudication = (max_plies, draw_move_number, draw_move_count, draw_score, resign_move_count, resign_score)
+        self._on_game = on_game
+
+    def run(self) -> MatchResult:
+        """
+        Plays the match
+        :return: the results
+        """
+        tasks = [(index, self._openings[(index // 2) % len(self._openings)], self._players, index % 2 == 0, self._adjudication)
+                 for index in range(self._games)]
+        result = MatchResult((self._players[0].name, self._players[1].name))
+
+        if self._processes == 1:
+            for task in tasks:
+                if self._add_game(result, _play_game(task)):
+                    break
+        else:
+            with Pool(self._processes) as pool:
+                for game in pool.imap_unordered(_play_game, tasks):
+                    if self._add_game(result, game):
+                        # the games in progress are discarded when the pool is terminated
+                        break
+
+        result.games.sort(key=lambda game: game.index)
+        return result
+
+    def _add_game(self, result: MatchResult, game: GameRecord) -> bool:
+        """
+        Adds a finished game to the results
+        :return: True if the match must stop
+        """
+        result.add(game)
+        if self._sprt is not None:
+            result.llr = self._sprt.llr(result.wins, result.draws, result.losses)
+            result.sprt_decision = self._sprt.decide(result.wins, result.draws, result.losses)
+        if self._on_game:
+            self._on_game(game, result)
+        return result.sprt_decision != SPRTDecision.CONTINUE
+
+
+def _play_game(task: tuple[int, str, tuple[PlayerConfig, PlayerConfig], bool, tuple]) -> GameRecord:
+    """
+    Plays a game of a match
+    :param task: tuple with the index of the game, the FEN of the opening, the configurations of the players, whether the first player is white and the adjudication parameters
+    :return: the record of the game
+    """
+    index, fen, players, first_player_white, adjudication = task
+    max_plies, draw_move_number, draw_move_count, draw_score, resign_move_count, resign_score = adjudication
+    record = GameRecord(index, first_player_white)
+
+    board_state = FENBoardStateMapper.fen_to_board_state(fen)
+    # player index of white and of black
+    colors = (0, 1) if first_player_white else (1, 0)
+    engines = [players[0].create_engine(), players[1].create_engine()]
+    moves = []
+    # scores for white reported by the player of each move
+    scores = []
+
+    while True:
+        if board_state.is_game_over():
+            if board_state.is_checkmate():
+                record.result = '0-1' if board_state.white_to_move else '1-0'
+            record.termination = board_state.game_status().value
+            break
+        if len(moves) >= max_plies:
+            record.termination = 'adjudication: maximum length'
+            break
+
+        player = colors[0 if board_state.white_to_move else 1]
+        move, score, _, stats = engines[player].calculate_move(board_state)
+        if move is None:
+            record.termination = GameStatus.STALEMATE.value
+            break
+        record.nodes[player] += stats.total_nodes
+        record.time[player] += stats.elapsed
+        record.depth[player] += stats.depth
+        record.searches[player] += 1
+
+        scores.append(score if board_state.white_to_move else -score)
+        board_state.perform_move(move, update=True)
+        moves.append(move)
+
+        recent_scores = scores[-2 * resign_move_count:]
+        if len(recent_scores) == 2 * resign_move_count:
+            if all([recent_score >= resign_score for recent_score in recent_scores]):
+                record.result = '1-0'
+                record.termination = 'adjudication: resign'
+                break
+            if all([recent_score <= -resign_score for recent_score in recent_scores]):
+                record.result = '0-1'
+                record.termination = 'adjudication: resign'
+                break
+        recent_scores = scores[-2 * draw_move_count:]
+        if board_state.fullmove_number >= draw_move_number and len(recent_scores) == 2 * draw_move_count and \
+                all([abs(recent_score) <= draw_score for recent_score in recent_scores]):
+            record.termination = 'adjudication: draw'
+            break
+
+    if record.result != '1/2-1/2':
+        record.score = 1.0 if (record.result == '1-0') == first_player_white else 0.0
+    record.plies = len(moves)
+    white, black = players[colors[0]], players[colors[1]]
+    record.pgn = PGNWriter.game_to_pgn(moves,
+                                       {'Event': f'{players[0].name} vs {players[1].name}',
+                                        'Round': str(index + 1),
+                                        'White': white.name,
+                                        'Black': black.name,
+                                        'Result': record.result,
+                                        'Termination': record.termination},
+                                       FENBoardStateMapper.fen_to_board_state(fen))
+    return record
@@ -1,87 +1,281 @@
 from domain.game.model.board import BoardState
-from domain.game.model.pieces import Piece
+from domain.game.model.pieces import Piece, PieceType
 from domain.game.model.square import Square
-from infrastructure.notation.mapper.piece_mapper import NotationPieceMapper
-from infrastructure.notation.mapper.square_mapper import NotationSquareMapper
 
 
-class EDPBoardStateMapper:
+class FENBoardStateMapper:
+    """
+    Maps Forsyth-Edwards Notation (https://www.chessprogramming.org/Forsyth-Edwards_Notation) to BoardState instances
+    and back. Parsing is a single pass over each field driven by lookup tables, and writing a parsed FEN gives back
+    the same text.
+    """
+
+    STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+    # pieces are immutable, so the same instances are shared by all the parsed positions
+    _PIECES = {piece_type.value if is_white else piece_type.value.lower(): Piece(piece_type, is_white)
+               for piece_type in PieceType for is_white in [True, False]}
+    _PIECE_CHARS = {piece: char for char, piece in _PIECES.items()}
+    _EMPTY_SQUARES = {str(count): count for count in range(1, 9)}
+    _SQUARES = {f'{chr(ord("a") + file)}{rank + 1}': Square(file, rank) for file in range(8) for rank in range(8)}
+    _SQUARE_NAMES = {(square.file, square.rank): name for name, square in _SQUARES.items()}
+    _SIDES = {'w': True, 'b': False}
+    _CASTLING_CHARS = 'KQkq'
 
     @staticmethod
-    def epd_to_board_state(epd_string: str) -> BoardState:
+    def fen_to_board_state(fen: str) -> BoardState:
         """
-        Maps an Extended Position Description (https://www.chessprogramming.org/Extended_Position_Description) to a BoardState instance.
-        The EPD is assumed to be valid and is not verified.
-        :param epd_string: the Extended Position Description
+        Maps a FEN string to a BoardState instance. The halfmove clock and the fullmove number are optional.
+        :param fen: the FEN string
         :return: the resulting BoardState
+        :raises ValueError: if the FEN string is malformed
+        """
+        fields = fen.split()
+        if len(fields) not in [4, 6]:
+            raise ValueError(f'Invalid FEN, expected 4 or 6 fields: {fen}')
+
+        halfmove_clock, fullmove_number = 0, 1
+        if len(fields) == 6:
+            halfmove_clock = FENBoardStateMapper._parse_number(fields[4], fen)
+            fullmove_number = FENBoardStateMapper._parse_number(fields[5], fen)
+        return FENBoardStateMapper._fields_to_board_state(fields, halfmove_clock, fullmove_number, fen)
+
+    @staticmethod
+    def board_state_to_fen(board_state: BoardState) -> str:
+        """
+        Maps a BoardState instance to a FEN string
+        :param board_state: the BoardState
+        :return: the FEN string
+        """
+        return f'{FENBoardStateMapper._board_state_to_fields(board_state)} {board_state.halfmove_clock} {board_state.fullmove_number}'
+
+    @staticmethod
+    def _fields_to_board_state(fields: list[str], halfmove_clock: int, fullmove_number: int, text: str) -> BoardState:
         """
-        pieces, side_to_move, castling, en_passant, *operations = epd_string.split(' ')
+        Creates a BoardState from the first four fields of a FEN or EPD string: placement of the pieces, side to move,
+        castling rights and en passant target
+        """
+        squares = FENBoardStateMapper._placement_to_squares(fields[0], text)
+
+        white_to_move = FENBoardStateMapper._SIDES.get(fields[1])
+        if white_to_move is None:
+            raise ValueError(f'Invalid side to move {fields[1]}: {text}')
 
-        squares = EDPBoardStateMapper._pieces_to_squares(pieces)
-        white_to_move = EDPBoardStateMapper._side_to_move_to_white_to_move(side_to_move)
-        w_castle_short, w_castle_long, b_castle_short, b_castle_long = EDPBoardStateMapper._castling_to_flags(castling)
-        en_passant_target = EDPBoardStateMapper._en_passant_to_target(en_passant)
+        castling = fields[2]
+        if castling != '-' and (not castling or any(char not in FENBoardStateMapper._CASTLING_CHARS for char in castling)):
+            raise ValueError(f'Invalid castling rights {castling}: {text}')
+
+        en_passant_target = None
+        if fields[3] != '-':
+            en_passant_target = FENBoardStateMapper._SQUARES.get(fields[3])
+            if en_passant_target is None:
+                raise ValueError(f'Invalid en passant target {fields[3]}: {text}')
 
         return BoardState(squares,
                           white_to_move,
-                          w_castle_short,
-                          w_castle_long,
-                          b_castle_short,
-                          b_castle_long,
-                          en_passant_target)
+                          'K' in castling,
+                          'Q' in castling,
+                          'k' in castling,
+                          'q' in castling,
+                          en_passant_target,
+                          halfmove_clock,
+                          fullmove_number)
 
     @staticmethod
-    def _pieces_to_squares(pieces: str) -> dict:
+    def _placement_to_squares(placement: str, text: str) -> dict[int, dict[int, Piece]]:
+        """
+        Parses the placement of the pieces, from rank 8 to rank 1 and from file a to file h
+        """
+        pieces = FENBoardStateMapper._PIECES
+        empty_squares = FENBoardStateMapper._EMPTY_SQUARES
         squares = {}
+        file, rank = 0, 7
+        for char in placement:
+            piece = pieces.get(char)
+            if piece is not None:
+                if file > 7:
+                    raise ValueError(f'Invalid FEN, too many squares in rank {rank + 1}: {text}')
+                file_squares = squares.get(file)
+                if file_squares is None:
+                    file_squares = squares[file] = {}
+                file_squares[rank] = piece
+                file += 1
+            elif char in empty_squares:
+                file += empty_squares[char]
+            elif char == '/':
+                if file != 8:
+                    raise ValueError(f'Invalid FEN, wrong number of squares in rank {rank + 1}: {text}')
+                file, rank = 0, rank - 1
+            else:
+                raise ValueError(f'Invalid piece {char}: {text}')
+            if file > 8 or rank < 0:
+                raise ValueError(f'Invalid FEN, too many squares: {text}')
 
-        ranks = pieces.split('/')
-        rank = 8 + 1
-        for rank_str in ranks:
-            rank -= 1
-            if rank_str == '8':
-                # empty rank
-                continue
+        if file != 8 or rank != 0:
+            raise ValueError(f'Invalid FEN, wrong number of squares: {text}')
+        return squares
 
-            file = 1
-            for char in rank_str:
-                if char.isdigit():
-                    # skip empty files
-                    file += int(char)
-                else:
-                    # add square with piece
-                    if not squares.get(file):
-                        squares[file] = {}
-                    squares[file][rank] = char
+    @staticmethod
+    def _board_state_to_fields(board_state: BoardState) -> str:
+        """
+        Writes the first four fields of a FEN or EPD string: placement of the pieces, side to move, castling rights
+        and en passant target
+        """
+        board = [[None] * 8 for _ in range(8)]
+        for piece, square in board_state.get_all_pieces():
+            board[square.rank][square.file] = FENBoardStateMapper._PIECE_CHARS[piece]
 
-        return squares
+        ranks = []
+        for rank in reversed(range(8)):
+            rank_chars = []
+            empty = 0
+            for char in board[rank]:
+                if char is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank_chars.append(str(empty))
+                    empty = 0
+                rank_chars.append(char)
+            if empty:
+                rank_chars.append(str(empty))
+            ranks.append(''.join(rank_chars))
+
+        castling = ''.join(char for char, flag in zip(FENBoardStateMapper._CASTLING_CHARS,
+                                                      [board_state.w_castle_short, board_state.w_castle_long,
+                                                       board_state.b_castle_short, board_state.b_castle_long])
+                           if flag)
+        en_passant_target = board_state.en_passant_target
+        en_passant = FENBoardStateMapper._SQUARE_NAMES[(en_passant_target.file, en_passant_target.rank)] if en_passant_target else '-'
+
+        return f'{"/".join(ranks)} {"w" if board_state.white_to_move else "b"} {castling or "-"} {en_passant}'
 
     @staticmethod
-    def _char_to_piece(piece_char: str) -> Piece:
-        piece_type = NotationPieceMapper.string_to_piece_type(piece_char)
-        if not piece_type:
-            raise ValueError(f"Invalid piece {piece_char}")
-        is_white = not piece_char.islower()
-        return Piece(piece_type, is_white)
+    def _parse_number(field: str, text: str) -> int:
+        if not field.isdigit():
+            raise ValueError(f'Invalid number {field}: {text}')
+        return int(field)
+
+
+class EDPBoardStateMapper:
+    """
+    Maps Extended Position Descriptions (https://www.chessprogramming.org/Extended_Position_Description) to BoardState
+    instances and back. The operations follow the four fields of the position as 'opcode operand ...;', and the
+    operands can be strings in double quotes. The halfmove clock and the fullmove number are given by the hmvc and
+    fmvn opcodes, or, as in many test suites, by two numbers after the position like in FEN.
+    """
+
+    HALFMOVE_CLOCK_OPCODE = 'hmvc'
+    FULLMOVE_NUMBER_OPCODE = 'fmvn'
+    # opcodes whose operands are always written as strings
+    STRING_OPCODES = {'id'} | {f'c{i}' for i in range(10)}
 
     @staticmethod
-    def _side_to_move_to_white_to_move(side_to_move: str) -> bool:
-        return side_to_move == 'w'
+    def epd_to_board_state(epd_string: str) -> BoardState:
+        """
+        Maps an Extended Position Description to a BoardState instance, ignoring its operations
+        :param epd_string: the Extended Position Description
+        :return: the resulting BoardState
+        :raises ValueError: if the EPD string is malformed
+        """
+        return EDPBoardStateMapper.parse_epd(epd_string)[0]
+
+    @staticmethod
+    def parse_epd(epd_string: str) -> tuple[BoardState, dict[str, list[str]]]:
+        """
+        Maps an Extended Position Description to a BoardState instance and its operations
+        :param epd_string: the Extended Position Description
+        :return: the resulting BoardState, and the operands of each opcode (i.e.: {'bm': ['Nf3'], 'id': ['test 1']})
+        :raises ValueError: if the EPD string is malformed
+        """
+        fields = epd_string.split(maxsplit=4)
+        if len(fields) < 4:
+            raise ValueError(f'Invalid EPD, expected at least 4 fields: {epd_string}')
+        operations_text = fields[4] if len(fields) > 4 else ''
+
+        halfmove_clock, fullmove_number = 0, 1
+        clocks = operations_text.split(maxsplit=2)
+        if len(clocks) >= 2 and clocks[0].isdigit() and clocks[1].isdigit():
+            halfmove_clock, fullmove_number = int(clocks[0]), int(clocks[1])
+            operations_text = clocks[2] if len(clocks) > 2 else ''
+
+        operations = EDPBoardStateMapper._parse_operations(operations_text, epd_string)
+        if EDPBoardStateMapper.HALFMOVE_CLOCK_OPCODE in operations:
+            halfmove_clock = FENBoardStateMapper._parse_number(''.join(operations[EDPBoardStateMapper.HALFMOVE_CLOCK_OPCODE]), epd_string)
+        if EDPBoardStateMapper.FULLMOVE_NUMBER_OPCODE in operations:
+            fullmove_number = FENBoardStateMapper._parse_number(''.join(operations[EDPBoardStateMapper.FULLMOVE_NUMBER_OPCODE]), epd_string)
+
+        board_state = FENBoardStateMapper._fields_to_board_state(fields, halfmove_clock, fullmove_number, epd_string)
+        return board_state, operations
 
     @staticmethod
-    def _castling_to_flags(castling: str) -> tuple[bool, bool, bool, bool]:
-        w_castle_short = 'K' in castling
-        w_castle_long = 'Q' in castling
-        b_castle_short = 'k' in castling
-        b_castle_long = 'q' in castling
+    def board_state_to_epd(board_state: BoardState, operations: dict[str, list[str] | str] | None = None) -> str:
+        """
+        Maps a BoardState instance to an Extended Position Description. The clocks are written as the hmvc and fmvn
+        opcodes if they aren't the initial ones and the operations don't include them already.
+        :param board_state: the BoardState
+        :param operations: (optional) operands of each opcode, a single string for opcodes with one operand
+        :return: the Extended Position Description
+        """
+        operations = dict(operations) if operations else {}
+        if board_state.halfmove_clock != 0:
+            operations.setdefault(EDPBoardStateMapper.HALFMOVE_CLOCK_OPCODE, [str(board_state.halfmove_clock)])
+        if board_state.fullmove_number != 1:
+            operations.setdefault(EDPBoardStateMapper.FULLMOVE_NUMBER_OPCODE, [str(board_state.fullmove_number)])
 
-        return w_castle_short, w_castle_long, b_castle_short, b_castle_long
+        parts = [FENBoardStateMapper._board_state_to_fields(board_state)]
+        for opcode, operands in operations.items():
+            if isinstance(operands, str):
+                operands = [operands]
+            parts.append(' '.join([opcode] + [EDPBoardStateMapper._operand_to_string(opcode, operand) for operand in operands]) + ';')
+        return ' '.join(parts)
 
     @staticmethod
-    def _en_passant_to_target(en_passant: str) -> Square | None:
-        if en_passant == '-':
-            return None
+    def _parse_operations(text: str, epd_string: str) -> dict[str, list[str]]:
+        """
+        Parses the operations of an EPD, in a single pass over the characters
+        """
+        operations = {}
+        opcode = None
+        operands = []
+        i, length = 0, len(text)
+        while i < length:
+            char = text[i]
+            if char.isspace():
+                i += 1
+                continue
+            if char == ';':
+                if opcode is not None:
+                    operations[opcode] = operands
+                opcode, operands = None, []
+                i += 1
+                continue
 
-        file = NotationSquareMapper.string_to_file(en_passant[0])
-        rank = NotationSquareMapper.string_to_rank(en_passant[1])
+            if char == '"':
+                end = text.find('"', i + 1)
+                if end < 0:
+                    raise ValueError(f'Invalid EPD, unterminated string: {epd_string}')
+                token = text[i + 1:end]
+                i = end + 1
+            else:
+                end = i
+                while end < length and not text[end].isspace() and text[end] != ';':
+                    end += 1
+                token = text[i:end]
+                i = end
 
-        return Square(file, rank)
\ No newline at end of file
+            if opcode is None:
+                opcode = token
+            else:
+                operands.append(token)
+
+        # the last operation may lack its semicolon
+        if opcode is not None:
+            operations[opcode] = operands
+        return operations
+
+    @staticmethod
+    def _operand_to_string(opcode: str, operand: str) -> str:
+        if opcode in EDPBoardStateMapper.STRING_OPCODES or not operand or any(char.isspace() or char in ';"' for char in operand):
+            return f'"{operand}"'
+        return operand
@@ -1,132 +1,237 @@
 import re
 
+from domain.game.model import bitboards
 from domain.game.model.board import BoardState
 from domain.game.model.move import Move
 from domain.game.model.pieces import PieceType, Piece
 from domain.game.model.square import Square
-from infrastructure.notation.mapper.piece_mapper import NotationPieceMapper
-from infrastructure.notation.mapper.square_mapper import NotationSquareMapper
 
 
 class SANMoveMapper:
+    """
+    Maps Standard Algebraic Notation (https://www.chessprogramming.org/Algebraic_Chess_Notation) to Move instances and
+    back. SAN strings are tokenized by a single precompiled regular expression, and the pieces of a type that can move
+    to a square are looked up in the attack bitboards of the position, so neither direction generates all the legal
+    moves: only the moves of the candidate pieces are generated to check their legality.
+    """
+
+    _SAN_REGEX = re.compile(r'(?:(?P<castle>[O0]-[O0](?P<long>-[O0])?)'
+                            r'|(?P<piece>[NBRQK])?(?P<file>[a-h])?(?P<rank>[1-8])?[x:]?(?P<dest>[a-h][1-8])(?:=?(?P<promotion>[NBRQ]))?)'
+                            r'[+#]?[!?]*')
+
+    _FILES = 'abcdefgh'
+    _RANKS = '12345678'
+    _PIECE_TYPES = {piece_type.value: piece_type for piece_type in PieceType}
+    _BITBOARD_INDEXES = {piece: index for index, piece in enumerate(BoardState.BITBOARD_PIECES)}
+    _FILE_MASKS = [0x0101010101010101 << file for file in range(8)]
+    _RANK_MASKS = [0xFF << (8 * rank) for rank in range(8)]
 
     @staticmethod
     def san_to_move(san_string: str, board_state: BoardState) -> Move | None:
         """
-        Maps a Standard Algebraic Notation (https://www.chessprogramming.org/Algebraic_Chess_Notation) to a Move instance given a BoardState.
-        The ACN is assumed to be valid and is not verified.
+        Maps a Standard Algebraic Notation to a Move instance given a BoardState.
         :param san_string: the Standard Algebraic Notation
         :param board_state: the BoardState
-        :return: the resulting Move
+        :return: the resulting legal Move, or None if the SAN can't be parsed or the move isn't legal in the position
         """
-        piece_move_regex = r'(N|B|R|Q|K)([a-h]|[1-8]|[a-h][1-8])?x?([a-h][1-8])'
-        pawn_capture_regex = r'([a-h])([1-8])?x([a-h][1-8])(N|B|R|Q)?'
-        pawn_push_regex = r'([a-h][1-8])(N|B|R|Q)?'
-        short_castle_str = 'O-O'
-        long_castle_str = 'O-O-O'
-
-        if san_string == short_castle_str:
-            return SANMoveMapper._generate_short_castle_move(board_state)
-        elif san_string == long_castle_str:
-            return SANMoveMapper._generate_long_castle_move(board_state)
-
-        try:
-            match = re.match(piece_move_regex, san_string)
-            if match:
-                piece = match.group(1)
-                from_square = match.group(2)
-                to_square = match.group(3)
-                return SANMoveMapper._generate_piece_move(board_state, piece, from_square, to_square)
-
-            match = re.match(pawn_push_regex, san_string)
-            if match:
-                to_square = match.group(1)
-                promotion = match.group(2)
-                return SANMoveMapper._generate_pawn_push_move(board_state, to_square, promotion)
-
-            match = re.match(pawn_capture_regex, san_string)
-            if match:
-                from_file = match.group(1)
-                from_rank = match.group(2)
-                to_square = match.group(3)
-                promotion = match.group(4)
-                return SANMoveMapper._generate_pawn_capture_move(board_state, from_file, from_rank, to_square, promotion)
-        except Exception as ex:
-            print(ex)
+        match = SANMoveMapper._SAN_REGEX.fullmatch(san_string)
+        if match is None:
             return None
 
-    @staticmethod
-    def _generate_short_castle_move(board_state: BoardState) -> Move:
-        return Move(origin_square=Square(4, 0 if board_state.white_to_move else 7), dest_square=Square(6, 0 if board_state.white_to_move else 7))
+        white = board_state.white_to_move
+        if match.group('castle'):
+            king = 4 if white else 60
+            return board_state.get_legal_move_by_code((king << 6) | (king - 2 if match.group('long') else king + 2))
+
+        dest_string = match.group('dest')
+        dest = 8 * SANMoveMapper._RANKS.index(dest_string[1]) + SANMoveMapper._FILES.index(dest_string[0])
+        piece_string = match.group('piece')
+        piece_type = SANMoveMapper._PIECE_TYPES[piece_string] if piece_string else PieceType.PAWN
+        promotion_string = match.group('promotion')
+        promotion_code = Move.PROMOTION_CODES[SANMoveMapper._PIECE_TYPES[promotion_string]] << 12 if promotion_string else 0
+
+        capture = piece_type == PieceType.PAWN and match.group('file') is not None
+        origins = SANMoveMapper._origins(board_state, Piece(piece_type, is_white=white), dest, capture)
+        if match.group('file'):
+            origins &= SANMoveMapper._FILE_MASKS[SANMoveMapper._FILES.index(match.group('file'))]
+        if match.group('rank'):
+            origins &= SANMoveMapper._RANK_MASKS[SANMoveMapper._RANKS.index(match.group('rank'))]
+
+        while origins:
+            origin = (origins & -origins).bit_length() - 1
+            origins &= origins - 1
+            # the first legal candidate: there may be several when the others are pinned
+            move = board_state.get_legal_move_by_code(promotion_code | (origin << 6) | dest)
+            if move is not None:
+                return move
+        return None
 
     @staticmethod
-    def _generate_long_castle_move(board_state: BoardState) -> Move:
-        return Move(origin_square=Square(4, 0 if board_state.white_to_move else 7), dest_square=Square(2, 0 if board_state.white_to_move else 7))
-
-    @staticmethod
-    def _generate_piece_move(board_state: BoardState, piece_str: str, from_square_str: str|None, to_square_str: str):
-        dest_square = SANMoveMapper._san_to_square(to_square_str)
-
-        if from_square_str:
-            if len(from_square_str) == 2:
-                origin_square = SANMoveMapper._san_to_square(from_square_str)
-            else:
-                moves = board_state.get_legal_moves()
-                if re.match(r'a-h', from_square_str):
-                    file = NotationSquareMapper.string_to_file(from_square_str)
-                    origin_square = [move.origin_square for move in moves if move.dest_square == dest_square and move.origin_square.file == file][0]
-                else:
-                    rank = NotationSquareMapper.string_to_rank(from_square_str)
-                    origin_square = [move.origin_square for move in moves if move.dest_square == dest_square and move.origin_square.rank == rank][0]
+    def move_to_san(move: Move, board_state: BoardState) -> str:
+        """
+        Maps a Move instance to its Standard Algebraic Notation given the BoardState before the move, disambiguating
+        the origin square and adding the check and checkmate suffixes
+        :param move: the move, legal in the position
+        :param board_state: the BoardState
+        :return: the Standard Algebraic Notation
+        """
+        if move.castle_short:
+            san_string = 'O-O'
+        elif move.castle_long:
+            san_string = 'O-O-O'
         else:
-            piece_type = NotationPieceMapper.string_to_piece_type(piece_str)
-            moves = board_state.get_legal_moves()
-            origin_square = [move.origin_square for move in moves if move.dest_square == dest_square and board_state.get_piece_on_square(move.origin_square).type == piece_type][0]
+            piece = board_state.get_piece_on_square(move.origin_square)
+            capture = move.en_passant or board_state.get_piece_on_square(move.dest_square) is not None
+            dest_string = SANMoveMapper._FILES[move.dest_square.file] + SANMoveMapper._RANKS[move.dest_square.rank]
+
+            if piece.type == PieceType.PAWN:
+                san_string = f'{SANMoveMapper._FILES[move.origin_square.file]}x{dest_string}' if capture else dest_string
+                if move.promotion_piece:
+                    san_string += f'={move.promotion_piece.type.value}'
+            else:
+                san_string = piece.type.value + SANMoveMapper._disambiguation(board_state, piece, move)
+                san_string += f'x{dest_string}' if capture else dest_string
 
-        return Move(origin_square=origin_square, dest_square=dest_square)
+        new_board_state = board_state.perform_move(move, update=False)
+        if new_board_state.is_in_check():
+            san_string += '#' if new_board_state.is_checkmate() else '+'
+        return san_string
 
     @staticmethod
-    def _generate_pawn_push_move(board_state: BoardState, to_square_str: str, promotion_str: str|None) -> Move:
-        dest_square = SANMoveMapper._san_to_square(to_square_str)
-
-        promotion_type = NotationPieceMapper.string_to_piece_type(promotion_str)
-        promotion_piece = None
-        if promotion_type:
-            promotion_piece = Piece(type=promotion_type, is_white=board_state.white_to_move)
-
-        moves = board_state.get_legal_moves()
-        origin_square = [move.origin_square for move in moves if move.dest_square == dest_square and board_state.get_piece_on_square(move.origin_square).type == PieceType.PAWN][0]
-
-        return Move(origin_square=origin_square, dest_square=dest_square, promotion_piece=promotion_piece)
+    def moves_to_san(moves: list[Move], board_state: BoardState) -> list[str]:
+        """
+        Maps a sequence of moves (i.e.: a principal variation) to their Standard Algebraic Notations
+        :param moves: the moves, played one after another from the BoardState
+        :param board_state: the BoardState before the first move. It isn't modified.
+        :return: the Standard Algebraic Notations
+        """
+        san_strings = []
+        for move in moves:
+            san_strings.append(SANMoveMapper.move_to_san(move, board_state))
+            board_state = board_state.perform_move(move, update=False)
+        return san_strings
 
     @staticmethod
-    def _generate_pawn_capture_move(board_state: BoardState, from_file_str: str, from_rank_str: str|None, to_square_str: str, promotion_str: str) -> Move:
-        dest_square = SANMoveMapper._san_to_square(to_square_str)
-
-        promotion_type = NotationPieceMapper.string_to_piece_type(promotion_str)
-        promotion_piece = None
-        if promotion_type:
-            promotion_piece = Piece(type=promotion_type, is_white=board_state.white_to_move)
-
-        if from_rank_str:
-            file = NotationSquareMapper.string_to_file(from_file_str)
-            rank = NotationSquareMapper.string_to_rank(from_rank_str)
-            origin_square = Square(file=file, rank=rank)
-        else:
-            moves = board_state.get_legal_moves()
-            file = NotationSquareMapper.string_to_file(from_file_str)
-            origin_square = [move.origin_square for move in moves if move.dest_square == dest_square and move.origin_square.file == file][0]
-
-        en_passant = not board_state.get_piece_on_square(dest_square)
+    def _origins(board_state: BoardState, piece: Piece, dest: int, capture: bool) -> int:
+        """
+        Finds the pieces that can move to a square
+        :param board_state: the position
+        :param piece: the type and color of the pieces
+        :param dest: the square (8 * rank + file)
+        :param capture: for pawns, whether the move is a capture
+        :return: bitboard of the squares of the pieces
+        """
+        pieces = board_state.bitboards
+        own_pieces = pieces[SANMoveMapper._BITBOARD_INDEXES[piece]]
+        if not own_pieces:
+            return 0
+
+        if piece.type == PieceType.PAWN:
+            if capture:
+                # a pawn attacks the square from the squares that a pawn of the other color on it would attack
+                return bitboards.PAWN_ATTACKS[1 if piece.is_white else 0][dest] & own_pieces
+            step = -8 if piece.is_white else 8
+            origin = dest + step
+            if not 0 <= origin < 64:
+                return 0
+            if (own_pieces >> origin) & 1:
+                return 1 << origin
+            # double push from the initial rank through an empty square
+            double_push_rank = 3 if piece.is_white else 4
+            if dest // 8 == double_push_rank and board_state.get_piece_on_square(Square(origin % 8, origin // 8)) is None:
+                return own_pieces & (1 << (origin + step))
+            return 0
+
+        if piece.type == PieceType.KNIGHT:
+            return bitboards.KNIGHT_ATTACKS[dest] & own_pieces
+        if piece.type == PieceType.KING:
+            return bitboards.KING_ATTACKS[dest] & own_pieces
+
+        occupied = 0
+        for bitboard in pieces:
+            occupied |= bitboard
+        attacks = 0
+        if piece.type != PieceType.ROOK:
+            attacks |= bitboards.slider_attacks(bitboards.DIAGONAL_RAYS[dest], occupied)
+        if piece.type != PieceType.BISHOP:
+            attacks |= bitboards.slider_attacks(bitboards.ORTHOGONAL_RAYS[dest], occupied)
+        return attacks & own_pieces
 
-        return Move(origin_square=origin_square, dest_square=dest_square, promotion_piece=promotion_piece, en_passant=en_passant)
+    @staticmethod
+    def _disambiguation(board_state: BoardState, piece: Piece, move: Move) -> str:
+        """
+        Calculates the part of the SAN that tells the origin square of a piece move apart from the other legal moves
+        of the same piece type to the same square: the file, if it's enough, the rank otherwise, or both
+        """
+        origin = 8 * move.origin_square.rank + move.origin_square.file
+        dest = 8 * move.dest_square.rank + move.dest_square.file
+        others = SANMoveMapper._origins(board_state, piece, dest, capture=True) & ~(1 << origin)
+
+        same_file = same_rank = ambiguous = False
+        while others:
+            other = (others & -others).bit_length() - 1
+            others &= others - 1
+            if board_state.get_legal_move_by_code((other << 6) | dest) is None:
+                continue
+            ambiguous = True
+            same_file |= other % 8 == origin % 8
+            same_rank |= other // 8 == origin // 8
+
+        if not ambiguous:
+            return ''
+        if not same_file:
+            return SANMoveMapper._FILES[origin % 8]
+        if not same_rank:
+            return SANMoveMapper._RANKS[origin // 8]
+        return SANMoveMapper._FILES[origin % 8] + SANMoveMapper._RANKS[origin // 8]
+
+
+class UCIMoveMapper:
+    """
+    Maps the long algebraic notation of the Universal Chess Interface (i.e.: e2e4, e1g1 for castling, e7e8q for
+    promotions) to Move instances and back
+    """
+
+    _FILES = 'abcdefgh'
+    _RANKS = '12345678'
+    _PROMOTION_CODES = {piece_type.value.lower(): code for piece_type, code in Move.PROMOTION_CODES.items()}
+    NULL_MOVE = '0000'
 
     @staticmethod
-    def _san_to_square(san_string: str) -> Square:
-        file_str = san_string[0]
-        rank_str = san_string[1]
+    def uci_to_move(uci_string: str, board_state: BoardState) -> Move | None:
+        """
+        Maps a UCI move to the matching legal move of a position
+        :param uci_string: the UCI move
+        :param board_state: the BoardState
+        :return: the legal move, or None if the string is malformed or the move isn't legal
+        """
+        if len(uci_string) not in [4, 5]:
+            return None
+        try:
+            origin = 8 * UCIMoveMapper._RANKS.index(uci_string[1]) + UCIMoveMapper._FILES.index(uci_string[0])
+            dest = 8 * UCIMoveMapper._RANKS.index(uci_string[3]) + UCIMoveMapper._FILES.index(uci_string[2])
+        except ValueError:
+            return None
 
-        file = NotationSquareMapper.string_to_file(file_str)
-        rank = NotationSquareMapper.string_to_rank(rank_str)
+        code = (origin << 6) | dest
+        if len(uci_string) == 5:
+            promotion_code = UCIMoveMapper._PROMOTION_CODES.get(uci_string[4])
+            if promotion_code is None:
+                return None
+            code |= promotion_code << 12
+        return board_state.get_legal_move_by_code(code)
 
-        return Square(file, rank)
\ No newline at end of file
+    @staticmethod
+    def move_to_uci(move: Move | None) -> str:
+        """
+        Maps a Move instance to a UCI move
+        :param move: the move, or None for the null move
+        :return: the UCI move
+        """
+        if move is None:
+            return UCIMoveMapper.NULL_MOVE
+        uci_string = (UCIMoveMapper._FILES[move.origin_square.file] + UCIMoveMapper._RANKS[move.origin_square.rank] +
+                      UCIMoveMapper._FILES[move.dest_square.file] + UCIMoveMapper._RANKS[move.dest_square.rank])
+        if move.promotion_piece:
+            uci_string += move.promotion_piece.type.value.lower()
+        return uci_string
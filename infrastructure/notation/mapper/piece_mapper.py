@@ -4,7 +4,9 @@ from domain.game.model.pieces import PieceType
 class NotationPieceMapper:
 
     @staticmethod
-    def string_to_piece_type(string: str) -> PieceType | None:
+    def string_to_piece_type(string: str | None) -> PieceType | None:
+        if not string:
+            return None
         try:
             return PieceType(string.upper())
         except ValueError:
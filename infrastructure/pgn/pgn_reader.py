@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import mmap
+import os
+import re
+from typing import Generator
+
+
+class PGNGame:
+    """
+    A game read from a PGN file: its tags, the SAN moves of its main line and its byte offsets in the file
+    """
+
+    __slots__ = ('headers', 'moves', 'start', 'end')
+
+    def __init__(self, headers: dict[str, str], moves: list[str], start: int, end: int):
+        """
+        Constructor
+        :param headers: value of each tag (i.e.: {'White': 'Carlsen, Magnus', 'Result': '1-0'})
+        :param moves: SAN moves of the main line
+        :param start: offset of the first byte of the game in the file
+        :param end: offset after the last byte of the game in the file
+        """
+        self.headers = headers
+        self.moves = moves
+        self.start = start
+        self.end = end
+
+    @property
+    def result(self) -> str | None:
+        return self.headers.get('Result')
+
+
+class PGNReader:
+    """
+    Streaming reader of PGN files. The file is memory-mapped and games are located and parsed with regular
+    expressions that run over the mapped bytes, so they are yielded one at a time and memory stays constant regardless
+    of the size of the file. Comments, NAGs and variations are removed from the movetext of each game in bulk before
+    extracting its moves. Each game keeps its byte offsets so it can be read again later.
+    """
+
+    _TAG_REGEX = re.compile(rb'\s*\[\s*(\w+)\s+"((?:[^"\\\n]|\\.)*)"\s*\]')
+    # the tags of the next game start a line, after the movetext of the current one. Comments are matched whole so
+    # that lines inside them that look like tags (i.e.: a wrapped '[%clk 0:10:00]') don't end the movetext.
+    _NEXT_GAME_REGEX = re.compile(rb'\{[^}]*\}?|;[^\n]*|(\n[ \t\r]*)(?=\[\s*\w+\s+")')
+    # blank lines followed by a tag: the start of the tags of a game
+    _GAME_START_REGEX = re.compile(rb'\r?\n(?:[ \t]*\r?\n)+(?=\[\s*\w+\s+")')
+    _COMMENT_REGEX = re.compile(rb'\{[^}]*\}|;[^\n]*')
+    # variations without nested variations inside
+    _VARIATION_REGEX = re.compile(rb'\([^()]*\)')
+    # SAN moves start with a letter, unlike move numbers, NAGs and termination markers, except castling written with
+    # zeros, which never matches the termination markers '1-0' and '0-1'
+    _SAN_REGEX = re.compile(r'(?:[A-Za-z]|(?<![0-9])0-0(?:-0)?)[^\s$()]*')
+    _WHITESPACE_REGEX = re.compile(rb'\s*')
+
+    def __init__(self, path: str):
+        """
+        Constructor
+        :param path: path of the PGN file
+        """
+        self._path = path
+        self._file = open(path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        # empty files can't be mapped
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+
+    @property
+    def size(self) -> int:
+        """
+        :return: size of the file in bytes
+        """
+        return self._size
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> Generator[PGNGame]:
+        return self.games()
+
+    def games(self, start: int = 0, end: int | None = None, parse_moves: bool = True) -> Generator[PGNGame]:
+        """
+        Streams the games of the file, or of a part of it
+        :param start: offset of the start of a game, where reading begins
+        :param end: (optional) offset where reading ends: games starting at or after it are not read. Defaults to the end of the file.
+        :param parse_moves: if False, the movetext is skipped and the games are read with their headers only
+        :return: generator of the games
+        """
+        if self._mmap is None:
+            return
+        data = self._mmap
+        size = self._size
+        end = size if end is None else end
+        whitespace_match = PGNReader._WHITESPACE_REGEX.match
+        tag_match = PGNReader._TAG_REGEX.match
+        next_game_search = PGNReader._NEXT_GAME_REGEX.search
+
+        position = start
+        while position < end:
+            # skip the whitespace between games
+            position = whitespace_match(data, position).end()
+            if position >= end:
+                return
+            game_start = position
+
+            headers = {}
+            while match := tag_match(data, position):
+                headers[match.group(1).decode('utf-8', errors='replace')] = \
+                    match.group(2).replace(b'\\"', b'"').replace(b'\\\\', b'\\').decode('utf-8', errors='replace')
+                position = match.end()
+
+            match = next_game_search(data, position)
+            while match and match.group(1) is None:
+                # skip a comment
+                match = next_game_search(data, match.end())
+            movetext_end = match.start() if match else size
+            movetext = data[position:movetext_end]
+            game_end = position + len(movetext.rstrip())
+            yield PGNGame(headers, PGNReader._movetext_to_moves(movetext) if parse_moves else [], game_start, max(game_end, position))
+            position = match.end() if match else size
+
+    @staticmethod
+    def _movetext_to_moves(movetext: bytes) -> list[str]:
+        """
+        Extracts the SAN moves of the main line from PGN movetext, skipping comments, NAGs, move numbers and variations
+        :param movetext: the movetext
+        :return: the SAN moves
+        """
+        if b'{' in movetext or b';' in movetext:
+            movetext = PGNReader._COMMENT_REGEX.sub(b' ', movetext)
+        if b'(' in movetext:
+            # remove the innermost variations until there are none left
+            count = 1
+            while count:
+                movetext, count = PGNReader._VARIATION_REGEX.subn(b' ', movetext)
+        return PGNReader._SAN_REGEX.findall(movetext.decode('ascii', errors='replace'))
+
+    def read_game(self, offset: int) -> PGNGame | None:
+        """
+        Reads a single game
+        :param offset: offset of the start of the game, i.e.: PGNGame.start of a game read before
+        :return: the game, or None if there is no game at the offset
+        """
+        return next(self.games(offset), None)
+
+    def split(self, chunk_size: int) -> list[tuple[int, int]]:
+        """
+        Splits the file in parts of approximately the given size that start at the beginning of a game, i.e.: to read
+        them in parallel
+        :param chunk_size: the approximate size of the parts in bytes
+        :return: list of tuples with the start and end offsets of each part
+        """
+        if self._mmap is None:
+            return []
+
+        offsets = [0]
+        for position in range(chunk_size, self._size, chunk_size):
+            if position <= offsets[-1]:
+                continue
+            while True:
+                match = PGNReader._GAME_START_REGEX.search(self._mmap, position)
+                if match is None or not self._in_comment(offsets[-1], match.end()):
+                    break
+                # the blank line is inside a comment, look after its end
+                position = self._mmap.find(b'}', match.end())
+                if position < 0:
+                    match = None
+                    break
+            if match is None:
+                break
+            offsets.append(match.end())
+        offsets.append(self._size)
+        return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+    def _in_comment(self, start: int, position: int) -> bool:
+        """
+        Checks if a position is inside a brace comment, looking back for an opening brace without its closing one
+        :param start: an offset before the position that isn't inside a comment, i.e.: the start of a game
+        :param position: the position
+        :return: True if the position is inside a comment
+        """
+        data = self._mmap
+        open_brace = data.rfind(b'{', start, position)
+        while open_brace >= 0:
+            line_start = max(start, data.rfind(b'\n', start, open_brace) + 1)
+            if data.find(b';', line_start, open_brace) < 0:
+                break
+            # the brace is inside a line comment
+            open_brace = data.rfind(b'{', start, line_start)
+        return open_brace >= 0 and data.find(b'}', open_brace, position) < 0
@@ -0,0 +1,78 @@
+from domain.game.model.board import BoardState, get_stating_board
+from domain.game.model.move import Move
+from infrastructure.notation.mapper.board_mapper import FENBoardStateMapper
+from infrastructure.notation.mapper.move_mapper import SANMoveMapper
+
+
+class PGNWriter:
+    """
+    Writes games in Portable Game Notation (https://www.chessprogramming.org/Portable_Game_Notation), with the moves
+    in Standard Algebraic Notation
+    """
+
+    SEVEN_TAG_ROSTER = ['Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result']
+    LINE_LENGTH = 80
+
+    @staticmethod
+    def game_to_pgn(moves: list[Move], headers: dict[str, str] | None = None, board_state: BoardState | None = None) -> str:
+        """
+        Writes a game
+        :param moves: the moves of the game
+        :param headers: (optional) value of each tag. The tags of the Seven Tag Roster that are missing are written as unknown ('?', or '*' for the result).
+        :param board_state: (optional) initial position of the game, written in the FEN tag. Defaults to the starting position.
+        :return: the PGN of the game
+        """
+        headers = dict(headers) if headers else {}
+        for tag in PGNWriter.SEVEN_TAG_ROSTER:
+            headers.setdefault(tag, '*' if tag == 'Result' else '?')
+        if board_state is None:
+            board_state = get_stating_board()
+        else:
+            fen = FENBoardStateMapper.board_state_to_fen(board_state)
+            if fen != FENBoardStateMapper.STARTING_FEN:
+                headers.setdefault('SetUp', '1')
+                headers.setdefault('FEN', fen)
+
+        tags = PGNWriter.SEVEN_TAG_ROSTER + [tag for tag in headers if tag not in PGNWriter.SEVEN_TAG_ROSTER]
+        lines = [f'[{tag} "{PGNWriter._escape(headers[tag])}"]' for tag in tags]
+        lines.append('')
+
+        tokens = []
+        fullmove_number = board_state.fullmove_number
+        white_to_move = board_state.white_to_move
+        for i, san_string in enumerate(SANMoveMapper.moves_to_san(moves, board_state)):
+            if white_to_move:
+                tokens.append(f'{fullmove_number}.')
+            elif i == 0:
+                tokens.append(f'{fullmove_number}...')
+            tokens.append(san_string)
+            if not white_to_move:
+                fullmove_number += 1
+            white_to_move = not white_to_move
+        tokens.append(headers['Result'])
+
+        line = ''
+        for token in tokens:
+            if line and len(line) + 1 + len(token) > PGNWriter.LINE_LENGTH:
+                lines.append(line)
+                line = token
+            else:
+                line = f'{line} {token}' if line else token
+        lines.append(line)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def result(board_state: BoardState) -> str:
+        """
+        :param board_state: the final position of a game
+        :return: the result of the game for the Result tag: '1-0' or '0-1' if it's checkmate, '1/2-1/2' if it's a draw and '*' if it isn't over
+        """
+        if board_state.is_checkmate():
+            return '0-1' if board_state.white_to_move else '1-0'
+        if board_state.is_game_over():
+            return '1/2-1/2'
+        return '*'
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"')
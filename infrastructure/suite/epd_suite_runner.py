@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import os
+from multiprocessing import Pool
+from typing import Callable
+
+from infrastructure.match.match_runner import PlayerConfig
+from infrastructure.notation.mapper.board_mapper import EDPBoardStateMapper
+from infrastructure.notation.mapper.move_mapper import SANMoveMapper
+
+
+class PositionResult:
+    """
+    Result of the search of a position of a test suite. The iterations are tuples (depth, seconds since the start of
+    the search, nodes, whether the best move was right).
+    """
+
+    __slots__ = ('index', 'id', 'epd', 'best_moves', 'avoid_moves', 'move', 'solved', 'elapsed', 'nodes', 'iterations')
+
+    def __init__(self, index: int, id: str, epd: str, best_moves: list[str], avoid_moves: list[str]):
+        self.index = index
+        self.id = id
+        self.epd = epd
+        self.best_moves = best_moves
+        self.avoid_moves = avoid_moves
+        # SAN of the move played
+        self.move = ''
+        self.solved = False
+        self.elapsed = 0.0
+        self.nodes = 0
+        self.iterations: list[tuple[int, float, int, bool]] = []
+
+    @property
+    def first_found_depth(self) -> int | None:
+        """
+        :return: depth of the first iteration whose best move was right, or None if none was
+        """
+        for depth, _, _, correct in self.iterations:
+            if correct:
+                return depth
+        return None
+
+    @property
+    def solution_iteration(self) -> tuple[int, float, int, bool] | None:
+        """
+        :return: the iteration since which the best move was right until the end of the search, or None if the position wasn't solved
+        """
+        if not self.solved:
+            return None
+        solution = None
+        for iteration in reversed(self.iterations):
+            if not iteration[3]:
+                break
+            solution = iteration
+        return solution
+
+    @property
+    def solution_time(self) -> float:
+        """
+        :return: seconds until the right move was found for good, or the whole search for unsolved positions
+        """
+        solution = self.solution_iteration
+        if solution is None:
+            return self.elapsed
+        return solution[1]
+
+
+class SuiteResult:
+    """
+    Results of a test suite
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.positions: list[PositionResult] = []
+
+    @property
+    def solved(self) -> int:
+        return len([position for position in self.positions if position.solved])
+
+    @property
+    def total_time(self) -> float:
+        return sum([position.elapsed for position in self.positions])
+
+    @property
+    def score(self) -> float:
+        """
+        Single figure to compare runs of the same suite under the same budget, lower is better: the time to the
+        solution of the solved positions plus the whole search time (the budget, for time limits) of the unsolved ones
+        :return: the figure, in seconds
+        """
+        return sum([position.solution_time for position in self.positions])
+
+    def __str__(self):
+        return (f'{self.name}: solved {self.solved}/{len(self.positions)}, time {self.total_time:.2f}s, '
+                f'score {self.score:.2f}s')
+
+
+class EPDSuiteRunner:
+    """
+    Runs test suites of EPD positions with 'bm' (best move) and 'am' (avoid move) operations. The positions are
+    searched in parallel in a pool of worker processes, each one by a new engine under the budget of its
+    configuration. A position is solved if the move played is one of the best moves and none of the moves to avoid,
+    and the iterations of the search record when the right move first appeared.
+    """
+
+    BEST_MOVE_OPCODE = 'bm'
+    AVOID_MOVE_OPCODE = 'am'
+    ID_OPCODE = 'id'
+
+    def __init__(self, player: PlayerConfig, processes: int = None, on_position: Callable[[PositionResult], None] = None):
+        """
+        Constructor
+        :param player: configuration of the engine, with its budget per position
+        :param processes: number of worker processes. Defaults to the number of cores.
+        :param on_position: (optional) callback invoked with each solved or failed position
+        """
+        self._player = player
+        self._processes = processes or os.cpu_count()
+        self._on_position = on_position
+
+    def run_file(self, path: str) -> SuiteResult:
+        """
+        Runs the test suite of an EPD file, one position per line
+        :param path: the path of the file
+        :return: the results
+        :raises ValueError: if a position is malformed or one of its moves isn't valid
+        """
+        with open(path) as file:
+            return self.run(file.readlines(), name=os.path.basename(path))
+
+    def run(self, epd_strings: list[str], name: str = 'suite') -> SuiteResult:
+        """
+        Runs a test suite
+        :param epd_strings: the EPD positions. Empty lines and lines starting with '#' are skipped.
+        :param name: name of the suite in the results
+        :return: the results, in the order of the positions
+        :raises ValueError: if a position is malformed or one of its moves isn't valid
+        """
+        tasks = []
+        for epd_string in epd_strings:
+            epd_string = epd_string.strip()
+            if epd_string and not epd_string.startswith('#'):
+                tasks.append((len(tasks), epd_string, self._player))
+        # fail before starting the searches
+        for task in tasks:
+            EPDSuiteRunner._parse_position(task[0], task[1])
+
+        result = SuiteResult(name)
+        if self._processes == 1:
+            for task in tasks:
+                self._add_position(result, _solve_position(task))
+        else:
+            with Pool(min(self._processes, max(1, len(tasks)))) as pool:
+                for position in pool.imap_unordered(_solve_position, tasks):
+                    self._add_position(result, position)
+
+        result.positions.sort(key=lambda position: position.index)
+        return result
+
+    def _add_position(self, result: SuiteResult, position: PositionResult):
+        result.positions.append(position)
+        if self._on_position:
+            self._on_position(position)
+
+    @staticmethod
+    def _parse_position(index: int, epd_string: str) -> tuple:
+        """
+        Parses a position of a test suite
+        :return: the BoardState, the empty result of the position and the codes of its best moves and its moves to avoid
+        :raises ValueError: if the position is malformed or one of its moves isn't valid
+        """
+        board_state, operations = EDPBoardStateMapper.parse_epd(epd_string)
+        best_moves = operations.get(EPDSuiteRunner.BEST_MOVE_OPCODE, [])
+        avoid_moves = operations.get(EPDSuiteRunner.AVOID_MOVE_OPCODE, [])
+        if not best_moves and not avoid_moves:
+            raise ValueError(f'Invalid test position, expected a bm or am operation: {epd_string}')
+
+        codes = []
+        for san_strings in [best_moves, avoid_moves]:
+            codes.append(set())
+            for san_string in san_strings:
+                move = SANMoveMapper.san_to_move(san_string, board_state)
+                if move is None:
+                    raise ValueError(f'Invalid test position, illegal move {san_string}: {epd_string}')
+                codes[-1].add(move.code)
+
+        position_id = ' '.join(operations.get(EPDSuiteRunner.ID_OPCODE, [])) or str(index + 1)
+        position = PositionResult(index, position_id, epd_string, best_moves, avoid_moves)
+        return board_state, position, codes[0], codes[1]
+
+
+def _solve_position(task: tuple[int, str, PlayerConfig]) -> PositionResult:
+    """
+    Searches a position of a test suite
+    :param task: tuple with the index of the position, its EPD and the configuration of the engine
+    :return: the result of the position
+    """
+    index, epd_string, player = task
+    board_state, position, best_codes, avoid_codes = EPDSuiteRunner._parse_position(index, epd_string)
+
+    def is_correct(code: int) -> bool:
+        return (not best_codes or code in best_codes) and code not in avoid_codes
+
+    move, _, _, stats = player.create_engine().calculate_move(board_state)
+    time = 0.0
+    for iteration in stats.iterations:
+        time += iteration.time
+        position.iterations.append((iteration.depth, time, iteration.nodes, bool(iteration.pv) and is_correct(iteration.pv[0].code)))
+
+    position.elapsed = stats.elapsed
+    position.nodes = stats.total_nodes
+    if move is not None:
+        position.move = SANMoveMapper.move_to_san(move, board_state)
+        position.solved = is_correct(move.code)
+    return position
@@ -0,0 +1,128 @@
+import mmap
+import os
+import struct
+
+from domain.engine.port.tablebase import Tablebase
+from domain.game.model.board import BoardState
+from infrastructure.tablebase.tablebase_index import MaterialIndex, locate
+
+
+class MmapTablebase(Tablebase):
+    """
+    Reader of the tables written by TablebaseGenerator, one file per material (i.e.: KQvKR.tb) in a directory.
+    Each file has a header, the results of all the positions packed in 2 bits each and the distances to mate in 1 byte
+    each, so probing the results only touches the first, smaller section. Files are memory-mapped when first needed.
+    Positions where castling or an en passant capture is possible are not probed.
+    """
+
+    EXTENSION = '.tb'
+    MAGIC = b'CHSTBASE'
+    VERSION = 1
+    HEADER = struct.Struct('<8sIQ')
+
+    DRAW_CODE = 0
+    WIN_CODE = 1
+    LOSS_CODE = 2
+    ILLEGAL_CODE = 3
+    CODE_TO_WDL = [Tablebase.DRAW, Tablebase.WIN, Tablebase.LOSS, None]
+
+    def __init__(self, directory: str):
+        """
+        Constructor
+        :param directory: directory of the tables
+        """
+        self._directory = directory
+        self._tables: dict[str, tuple[MaterialIndex, mmap.mmap] | None] = {}
+        self._files = []
+        materials = [name[:-len(MmapTablebase.EXTENSION)] for name in os.listdir(directory) if name.endswith(MmapTablebase.EXTENSION)]
+        self._max_pieces = max([len(material) - 1 for material in materials], default=0)
+
+    @property
+    def max_pieces(self) -> int:
+        return self._max_pieces
+
+    def probe_wdl(self, board_state: BoardState) -> int | None:
+        result = self._probe(board_state)
+        return result[0] if result else None
+
+    def probe_dtm(self, board_state: BoardState) -> int | None:
+        result = self._probe(board_state)
+        if result is None or result[0] == Tablebase.DRAW:
+            return None
+        return result[1]
+
+    def probe_pieces(self, pieces: list[tuple[str, int]], white_to_move: bool) -> tuple[int, int] | None:
+        """
+        Probes a position given by its pieces
+        :param pieces: list of tuples with each piece (uppercase for white, lowercase for black, as in FEN) and its square (8 * rank + file)
+        :param white_to_move: True if it's white's turn
+        :return: tuple with the result for the active player and the distance to mate in plies (0 for draws), or None if the position is not in the tablebase
+        """
+        if len(pieces) == 2:
+            # bare kings
+            return Tablebase.DRAW, 0
+
+        material, squares, white_to_move = locate(pieces, white_to_move)
+        table = self._get_table(material)
+        if table is None:
+            return None
+
+        material_index, table_mmap = table
+        index = material_index.index(material_index.canonical_squares(squares), white_to_move)
+        code = (table_mmap[MmapTablebase.HEADER.size + (index >> 2)] >> (2 * (index & 3))) & 3
+        wdl = MmapTablebase.CODE_TO_WDL[code]
+        if wdl is None:
+            return None
+        if wdl == Tablebase.DRAW:
+            return wdl, 0
+        return wdl, table_mmap[MmapTablebase.HEADER.size + (material_index.size + 3) // 4 + index]
+
+    def close(self):
+        for table in self._tables.values():
+            if table is not None:
+                table[1].close()
+        for file in self._files:
+            file.close()
+        self._tables = {}
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _probe(self, board_state: BoardState) -> tuple[int, int] | None:
+        if board_state.piece_count > self._max_pieces or board_state.has_castling_rights() or board_state.can_capture_en_passant():
+            return None
+
+        pieces = []
+        for piece, square in board_state.get_all_pieces():
+            letter = piece.type.value if piece.is_white else piece.type.value.lower()
+            pieces.append((letter, 8 * square.rank + square.file))
+        return self.probe_pieces(pieces, board_state.white_to_move)
+
+    def _get_table(self, material: str) -> tuple[MaterialIndex, mmap.mmap] | None:
+        """
+        Returns the index and the mapped file of a material, opening it if needed
+        :param material: canonical name of the material
+        :return: tuple with the index and the mapped file, or None if there is no table for the material
+        """
+        if material in self._tables:
+            return self._tables[material]
+
+        table = None
+        path = os.path.join(self._directory, material + MmapTablebase.EXTENSION)
+        if os.path.exists(path):
+            file = open(path, 'rb')
+            self._files.append(file)
+            table_mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, size = MmapTablebase.HEADER.unpack_from(table_mmap, 0)
+            material_index = MaterialIndex(material)
+            if magic != MmapTablebase.MAGIC or version != MmapTablebase.VERSION or size != material_index.size:
+                table_mmap.close()
+                raise ValueError(f'{path} is not a valid table for {material}')
+            table = material_index, table_mmap
+
+        self._tables[material] = table
+        return table
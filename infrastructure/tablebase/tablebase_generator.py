@@ -0,0 +1,351 @@
+import os
+from array import array
+from typing import Callable
+
+from domain.engine.port.tablebase import Tablebase
+from domain.game.model import bitboards
+from infrastructure.tablebase.mmap_tablebase import MmapTablebase
+from infrastructure.tablebase.tablebase_index import MaterialIndex, canonical_material, sub_materials
+
+
+def _squares(bitboard: int) -> tuple[int, ...]:
+    # squares of a bitboard, in increasing order
+    return tuple([square for square in range(64) if (bitboard >> square) & 1])
+
+
+def _lines(rays: list[tuple[tuple[int, ...], ...]]) -> list[tuple[int, ...] | None]:
+    # squares between each pair of squares joined by a ray, None if they aren't
+    lines = [None] * (64 * 64)
+    for square in range(64):
+        for ray in rays[square]:
+            for distance, target in enumerate(ray):
+                lines[64 * square + target] = ray[:distance]
+    return lines
+
+
+# the geometry of domain.game.model.bitboards, as tuples and sets of squares
+KING_JUMPS = [_squares(attacks) for attacks in bitboards.KING_ATTACKS]
+KNIGHT_JUMPS = [_squares(attacks) for attacks in bitboards.KNIGHT_ATTACKS]
+KING_SETS = [set(jumps) for jumps in KING_JUMPS]
+KNIGHT_SETS = [set(jumps) for jumps in KNIGHT_JUMPS]
+PAWN_CAPTURES = {
+    'P': [_squares(attacks) for attacks in bitboards.PAWN_ATTACKS[0]],
+    'p': [_squares(attacks) for attacks in bitboards.PAWN_ATTACKS[1]],
+}
+PAWN_CAPTURE_SETS = {piece: [set(jumps) for jumps in captures] for piece, captures in PAWN_CAPTURES.items()}
+RAYS = {
+    'B': [tuple([tuple(ray) for ray in rays]) for rays in bitboards.DIAGONAL_RAYS],
+    'R': [tuple([tuple(ray) for ray in rays]) for rays in bitboards.ORTHOGONAL_RAYS],
+}
+RAYS['Q'] = [bishop_rays + rook_rays for bishop_rays, rook_rays in zip(RAYS['B'], RAYS['R'])]
+LINES = {piece: _lines(rays) for piece, rays in RAYS.items()}
+
+
+def _attacks(piece: str, square: int, target: int, occupied: set[int]) -> bool:
+    """
+    Calculates if a piece attacks a square
+    :param piece: the piece, uppercase for white and lowercase for black
+    :param square: the square of the piece
+    :param target: the attacked square
+    :param occupied: the occupied squares
+    """
+    kind = piece.upper()
+    if kind == 'K':
+        return target in KING_SETS[square]
+    if kind == 'N':
+        return target in KNIGHT_SETS[square]
+    if kind == 'P':
+        return target in PAWN_CAPTURE_SETS[piece][square]
+    line = LINES[kind][64 * square + target]
+    if line is None:
+        return False
+    for between_square in line:
+        if between_square in occupied:
+            return False
+    return True
+
+
+def _targets(piece: str, square: int, occupied: set[int]) -> list[int]:
+    """
+    Calculates the destination squares of the pseudo-legal moves of a piece. Squares occupied by pieces of the same color are included.
+    """
+    kind = piece.upper()
+    if kind == 'K':
+        return KING_JUMPS[square]
+    if kind == 'N':
+        return KNIGHT_JUMPS[square]
+    if kind == 'P':
+        targets = [target for target in PAWN_CAPTURES[piece][square] if target in occupied]
+        step = 8 if piece == 'P' else -8
+        if square + step not in occupied:
+            targets.append(square + step)
+            start_rank = 1 if piece == 'P' else 6
+            if square >> 3 == start_rank and square + 2 * step not in occupied:
+                targets.append(square + 2 * step)
+        return targets
+
+    targets = []
+    for ray in RAYS[kind][square]:
+        for target in ray:
+            targets.append(target)
+            if target in occupied:
+                break
+    return targets
+
+
+def _origins(piece: str, square: int, occupied: set[int]) -> list[int]:
+    """
+    Calculates the squares from which a piece could have moved to its square without capturing
+    """
+    kind = piece.upper()
+    if kind == 'K':
+        return [origin for origin in KING_JUMPS[square] if origin not in occupied]
+    if kind == 'N':
+        return [origin for origin in KNIGHT_JUMPS[square] if origin not in occupied]
+    if kind == 'P':
+        origins = []
+        step = 8 if piece == 'P' else -8
+        rank = square >> 3 if piece == 'P' else 7 - (square >> 3)
+        if rank >= 2 and square - step not in occupied:
+            origins.append(square - step)
+            if rank == 3 and square - 2 * step not in occupied:
+                origins.append(square - 2 * step)
+        return origins
+
+    origins = []
+    for ray in RAYS[kind][square]:
+        for origin in ray:
+            if origin in occupied:
+                break
+            origins.append(origin)
+    return origins
+
+
+class TablebaseGenerator:
+    """
+    Generates endgame tablebases by retrograde analysis.
+    Every position of a material is visited once to count its moves and to score the moves that leave the material
+    (captures and promotions) with the tables of the resulting materials, which are generated first. Then the results
+    are propagated backwards from the checkmates in order of distance to mate: the predecessors (positions one move
+    back) of a lost position are won, and a position is lost when all its moves lead to won positions. The positions
+    left unresolved are draws.
+    Positions are handled as indexes and lists of squares only (see MaterialIndex). En passant captures are not
+    considered, so tables with pawns for both sides might be inexact in positions right after a double pawn push.
+    """
+
+    UNKNOWN = 0
+    WIN = 1
+    LOSS = 2
+    DRAW = 3
+    ILLEGAL = 4
+
+    MAX_PIECES = 4
+    MAX_DTM = 254
+    NO_COUNTER = 255
+    PROMOTIONS = 'QRBN'
+
+    # status -> 2-bit code of the file
+    STATUS_TO_WDL_CODE = bytes([MmapTablebase.DRAW_CODE, MmapTablebase.WIN_CODE, MmapTablebase.LOSS_CODE,
+                                MmapTablebase.DRAW_CODE, MmapTablebase.ILLEGAL_CODE]) + bytes(251)
+
+    def __init__(self, directory: str, on_progress: Callable[[str], None] = None):
+        """
+        Constructor
+        :param directory: directory of the tables. Existing tables are reused and new ones are written to it.
+        :param on_progress: (optional) callback invoked with a description of each step
+        """
+        self._directory = directory
+        self._on_progress = on_progress
+
+    def generate(self, material: str) -> str:
+        """
+        Generates the table of a material, if it doesn't exist yet, and the tables of the materials it depends on
+        :param material: name of the material (i.e.: KQvKR)
+        :return: the path of the table
+        """
+        material = canonical_material(material)
+        if len(material) - 1 > TablebaseGenerator.MAX_PIECES:
+            raise ValueError(f'{material} has more than {TablebaseGenerator.MAX_PIECES} pieces')
+
+        path = os.path.join(self._directory, material + MmapTablebase.EXTENSION)
+        if os.path.exists(path):
+            return path
+
+        for sub_material in sub_materials(material):
+            self.generate(sub_material)
+
+        self._report(f'{material}: generating')
+        with MmapTablebase(self._directory) as sub_tables:
+            status, dtm = self._generate_table(MaterialIndex(material), sub_tables)
+        self._write_table(path, status, dtm)
+        self._report(f'{material}: written to {path}')
+        return path
+
+    def _generate_table(self, material_index: MaterialIndex, sub_tables: MmapTablebase) -> tuple[bytearray, bytearray]:
+        """
+        Solves all the positions of a material
+        :param material_index: the index of the material
+        :param sub_tables: tablebase with the tables of the materials reachable with captures and promotions
+        :return: tuple with the status and the distance to mate (in plies) of each position
+        """
+        size = material_index.size
+        status = bytearray(size)
+        dtm = bytearray(size)
+        # number of different positions of the material reachable with a move that are not known to be won for the opponent
+        counters = bytearray(size)
+        # longest distance to mate of the captures and promotions that are won for the opponent
+        exit_dtm = bytearray(size)
+        # positions pending to be propagated, by distance to mate
+        pending = [array('I') for _ in range(TablebaseGenerator.MAX_DTM + 1)]
+
+        for index in range(size):
+            self._initialize_position(material_index, sub_tables, index, status, dtm, counters, exit_dtm, pending)
+        self._report(f'{material_index.material}: {size} positions initialized')
+
+        for distance in range(TablebaseGenerator.MAX_DTM + 1):
+            for index in pending[distance]:
+                if dtm[index] == distance:
+                    self._propagate(material_index, index, status, dtm, counters, exit_dtm, pending)
+            pending[distance] = array('I')
+
+        return status, dtm
+
+    def _initialize_position(self, material_index: MaterialIndex, sub_tables: MmapTablebase, index: int,
+                             status: bytearray, dtm: bytearray, counters: bytearray, exit_dtm: bytearray, pending: list[array]):
+        """
+        Checks the legality of a position, solves it if it's a checkmate or a stalemate and scores its captures and promotions
+        """
+        pieces = material_index.pieces
+        squares, white_to_move = material_index.position(index)
+        occupied = set(squares)
+        if len(occupied) < len(squares) \
+                or squares[1] in KING_SETS[squares[0]] \
+                or any([piece in 'Pp' and (square < 8 or square >= 56) for piece, square in zip(pieces, squares)]) \
+                or material_index.canonical_squares(squares) != squares:
+            status[index] = TablebaseGenerator.ILLEGAL
+            return
+
+        own_king, other_king = (0, 1) if white_to_move else (1, 0)
+        own = [i for i, piece in enumerate(pieces) if piece.isupper() == white_to_move]
+        others = [i for i, piece in enumerate(pieces) if piece.isupper() != white_to_move]
+        if any([_attacks(pieces[i], squares[i], squares[other_king], occupied) for i in own]):
+            # the player that just moved is in check
+            status[index] = TablebaseGenerator.ILLEGAL
+            return
+
+        owner = {square: i for i, square in enumerate(squares)}
+        children = set()
+        num_moves = 0
+        can_lose = True
+        best_exit_win = TablebaseGenerator.MAX_DTM + 1
+        longest_exit_loss = 0
+        for i in own:
+            piece, origin = pieces[i], squares[i]
+            for target in _targets(piece, origin, occupied):
+                captured = owner.get(target)
+                if captured is not None and pieces[captured].isupper() == white_to_move:
+                    continue
+
+                new_squares = list(squares)
+                new_squares[i] = target
+                new_occupied = occupied - {origin} | {target}
+                king_square = new_squares[own_king]
+                if any([_attacks(pieces[j], new_squares[j], king_square, new_occupied) for j in others if j != captured]):
+                    continue
+
+                num_moves += 1
+                promotions = TablebaseGenerator.PROMOTIONS if piece in 'Pp' and (target < 8 or target >= 56) else None
+                if captured is None and promotions is None:
+                    children.add(material_index.index(material_index.canonical_squares(new_squares), not white_to_move))
+                    continue
+
+                for promotion in (promotions or [piece]):
+                    promoted_piece = promotion if piece.isupper() else promotion.lower()
+                    child_pieces = [(promoted_piece if j == i else pieces[j], new_squares[j]) for j in range(len(pieces)) if j != captured]
+                    result = sub_tables.probe_pieces(child_pieces, not white_to_move)
+                    if result is None:
+                        raise ValueError(f'Missing table for {child_pieces}')
+                    wdl, child_dtm = result
+                    if wdl == Tablebase.LOSS:
+                        best_exit_win = min(best_exit_win, child_dtm + 1)
+                    elif wdl == Tablebase.DRAW:
+                        can_lose = False
+                    else:
+                        longest_exit_loss = max(longest_exit_loss, child_dtm)
+
+        if num_moves == 0:
+            in_check = any([_attacks(pieces[j], squares[j], squares[own_king], occupied) for j in others])
+            if in_check:
+                self._set_result(index, TablebaseGenerator.LOSS, 0, status, dtm, pending)
+            else:
+                status[index] = TablebaseGenerator.DRAW
+            return
+
+        counters[index] = len(children) if can_lose else TablebaseGenerator.NO_COUNTER
+        exit_dtm[index] = longest_exit_loss
+        if best_exit_win <= TablebaseGenerator.MAX_DTM:
+            self._set_result(index, TablebaseGenerator.WIN, best_exit_win, status, dtm, pending)
+        elif can_lose and not children:
+            self._set_result(index, TablebaseGenerator.LOSS, longest_exit_loss + 1, status, dtm, pending)
+
+    def _propagate(self, material_index: MaterialIndex, index: int,
+                   status: bytearray, dtm: bytearray, counters: bytearray, exit_dtm: bytearray, pending: list[array]):
+        """
+        Updates the predecessors of a solved position
+        """
+        pieces = material_index.pieces
+        squares, white_to_move = material_index.position(index)
+        occupied = set(squares)
+        distance = dtm[index]
+        is_loss = status[index] == TablebaseGenerator.LOSS
+
+        predecessors = set()
+        for i, piece in enumerate(pieces):
+            if piece.isupper() == white_to_move:
+                continue
+            for origin in _origins(piece, squares[i], occupied):
+                new_squares = list(squares)
+                new_squares[i] = origin
+                predecessors.add(material_index.index(material_index.canonical_squares(new_squares), not white_to_move))
+
+        for predecessor in predecessors:
+            predecessor_status = status[predecessor]
+            if is_loss:
+                if predecessor_status == TablebaseGenerator.UNKNOWN \
+                        or (predecessor_status == TablebaseGenerator.WIN and dtm[predecessor] > distance + 1):
+                    self._set_result(predecessor, TablebaseGenerator.WIN, distance + 1, status, dtm, pending)
+            elif predecessor_status == TablebaseGenerator.UNKNOWN and counters[predecessor] != TablebaseGenerator.NO_COUNTER:
+                counters[predecessor] -= 1
+                if counters[predecessor] == 0:
+                    self._set_result(predecessor, TablebaseGenerator.LOSS, max(distance, exit_dtm[predecessor]) + 1, status, dtm, pending)
+
+    @staticmethod
+    def _set_result(index: int, result: int, distance: int, status: bytearray, dtm: bytearray, pending: list[array]):
+        if distance > TablebaseGenerator.MAX_DTM:
+            raise ValueError(f'Distance to mate {distance} does not fit in the table')
+        status[index] = result
+        dtm[index] = distance
+        pending[distance].append(index)
+
+    @staticmethod
+    def _write_table(path: str, status: bytearray, dtm: bytearray):
+        """
+        Writes a table: the header, the results packed in 2 bits per position and the distances to mate in 1 byte per position
+        """
+        size = len(status)
+        codes = status.translate(TablebaseGenerator.STATUS_TO_WDL_CODE) + bytes(-size % 4)
+        packed = 0
+        for shift in range(4):
+            packed |= int.from_bytes(codes[shift::4], 'little') << (2 * shift)
+        wdl = packed.to_bytes(len(codes) // 4, 'little')
+
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(MmapTablebase.HEADER.pack(MmapTablebase.MAGIC, MmapTablebase.VERSION, size))
+            file.write(wdl)
+            file.write(dtm)
+        os.replace(tmp_path, path)
+
+    def _report(self, message: str):
+        if self._on_progress is not None:
+            self._on_progress(message)
@@ -0,0 +1,213 @@
+from itertools import combinations_with_replacement
+
+# pieces other than kings, from most to least valuable
+PIECE_ORDER = 'QRBNP'
+
+
+def _transform(square: int, flip_file: bool, flip_rank: bool, transpose: bool) -> int:
+    file, rank = square & 7, square >> 3
+    if transpose:
+        file, rank = rank, file
+    if flip_file:
+        file = 7 - file
+    if flip_rank:
+        rank = 7 - rank
+    return 8 * rank + file
+
+
+# the 8 symmetries of the board, as square -> square mappings. The first two (identity and left-right reflection) are the only ones valid with pawns.
+TRANSFORMS = [tuple([_transform(square, flip_file, flip_rank, transpose) for square in range(64)])
+              for transpose in [False, True] for flip_rank in [False, True] for flip_file in [False, True]]
+TRANSPOSE = tuple([_transform(square, False, False, True) for square in range(64)])
+
+# squares of the white king in canonical positions: the a1-d1-d4 triangle without pawns, the a-d files with pawns
+TRIANGLE = [square for square in range(64) if (square & 7) <= 3 and (square >> 3) <= (square & 7)]
+HALF_BOARD = [square for square in range(64) if (square & 7) <= 3]
+
+
+class MaterialIndex:
+    """
+    Maps the positions of a material (i.e.: KQvKR) to consecutive integers, used as positions in the tables.
+    Pieces are ordered as: white king, black king, white pieces, black pieces, and each one takes a base-64 digit of the
+    index, except the white king, which is restricted to the squares left after applying the symmetries of the board:
+    the 8 rotations and reflections without pawns, the left-right reflection with pawns. The side to move is the most
+    significant digit, so the two halves of the table are contiguous.
+    """
+
+    def __init__(self, material: str):
+        """
+        Constructor
+        :param material: canonical name of the material (see canonical_material)
+        """
+        self.material = material
+        self.pieces = material_pieces(material)
+        self.has_pawns = 'P' in material
+        self._king_squares = HALF_BOARD if self.has_pawns else TRIANGLE
+        self._king_indexes = [-1] * 64
+        for king_index, square in enumerate(self._king_squares):
+            self._king_indexes[square] = king_index
+
+        self._num_other_pieces = len(self.pieces) - 2
+        self.kings_size = len(self._king_squares) * 64
+        self.size = 2 * self.kings_size * 64 ** self._num_other_pieces
+        # transform (and whether the other pieces are needed to choose it) for every pair of king squares
+        self._king_transforms = [self._find_transform(white_king, black_king) for white_king in range(64) for black_king in range(64)]
+
+    def canonical_squares(self, squares: list[int]) -> list[int]:
+        """
+        Applies the symmetry that takes the position to its canonical form
+        :param squares: squares of the pieces, in the order of the material
+        :return: the transformed squares
+        """
+        transform_index, ambiguous = self._king_transforms[64 * squares[0] + squares[1]]
+        transform = TRANSFORMS[transform_index]
+        squares = [transform[square] for square in squares]
+        if ambiguous:
+            # both kings on the a1-h8 diagonal: the first piece outside it must be below it
+            for square in squares[2:]:
+                file, rank = square & 7, square >> 3
+                if rank != file:
+                    if rank > file:
+                        squares = [TRANSPOSE[square] for square in squares]
+                    break
+        return squares
+
+    def index(self, squares: list[int], white_to_move: bool) -> int:
+        """
+        Calculates the index of a position
+        :param squares: canonical squares of the pieces, in the order of the material
+        :param white_to_move: True if it's white's turn
+        :return: the index
+        """
+        index = (0 if white_to_move else self.kings_size) + 64 * self._king_indexes[squares[0]] + squares[1]
+        for square in squares[2:]:
+            index = 64 * index + square
+        return index
+
+    def position(self, index: int) -> tuple[list[int], bool]:
+        """
+        Calculates the position of an index
+        :param index: the index
+        :return: tuple with the squares of the pieces, in the order of the material, and True if it's white's turn
+        """
+        other_squares = []
+        for _ in range(self._num_other_pieces):
+            index, square = divmod(index, 64)
+            other_squares.append(square)
+        index, black_king = divmod(index, 64)
+        side, king_index = divmod(index, len(self._king_squares))
+        other_squares.reverse()
+        return [self._king_squares[king_index], black_king] + other_squares, side == 0
+
+    def _find_transform(self, white_king: int, black_king: int) -> tuple[int, bool]:
+        """
+        Finds the symmetry that takes the white king to the canonical squares. If the white king is on the a1-h8
+        diagonal, the black king is taken below the diagonal too.
+        :return: tuple with the index of the transform in TRANSFORMS and True if the other pieces are needed to choose it
+        """
+        if self.has_pawns:
+            return (0 if (white_king & 7) <= 3 else 1), False
+
+        candidates = [transform_index for transform_index, transform in enumerate(TRANSFORMS)
+                      if self._king_indexes[transform[white_king]] != -1]
+        for transform_index in candidates:
+            square = TRANSFORMS[transform_index][black_king]
+            if (square >> 3) < (square & 7):
+                return transform_index, False
+        for transform_index in candidates:
+            square = TRANSFORMS[transform_index][black_king]
+            if (square >> 3) == (square & 7):
+                king_square = TRANSFORMS[transform_index][white_king]
+                return transform_index, (king_square >> 3) == (king_square & 7)
+        return candidates[0], False
+
+
+def material_pieces(material: str) -> list[str]:
+    """
+    :param material: name of a material (i.e.: KQvKR)
+    :return: the pieces of the material in index order, uppercase for white and lowercase for black (i.e.: ['K', 'k', 'Q', 'r'])
+    """
+    white, black = material.split('v')
+    return ['K', 'k'] + list(white[1:]) + list(black[1:].lower())
+
+
+def _side_strength(pieces: str) -> tuple:
+    return len(pieces), tuple([-PIECE_ORDER.index(piece) for piece in pieces])
+
+
+def _sort_pieces(pieces: str) -> str:
+    return ''.join(sorted(pieces, key=PIECE_ORDER.index))
+
+
+def canonical_material(material: str) -> str:
+    """
+    Normalizes the name of a material: pieces sorted by value and the stronger side as white, which is the only one of
+    the two color-swapped materials that is stored
+    :param material: name of the material, with the pieces of each side in any order (i.e.: KRvKQ)
+    :return: the canonical name (i.e.: KQvKR)
+    """
+    white, black = material.upper().split('V')
+    white = _sort_pieces(white.replace('K', ''))
+    black = _sort_pieces(black.replace('K', ''))
+    if _side_strength(black) > _side_strength(white):
+        white, black = black, white
+    return f'K{white}vK{black}'
+
+
+def locate(pieces: list[tuple[str, int]], white_to_move: bool) -> tuple[str, list[int], bool]:
+    """
+    Finds the material of a position, swapping the colors (and mirroring the ranks) if it's stored with the other side as white
+    :param pieces: list of tuples with each piece (uppercase for white, lowercase for black) and its square (8 * rank + file)
+    :param white_to_move: True if it's white's turn
+    :return: tuple with the canonical material, the squares of the pieces in the order of the material and the side to move in the material
+    """
+    white = _sort_pieces(''.join([piece for piece, _ in pieces if piece.isupper() and piece != 'K']))
+    black = _sort_pieces(''.join([piece for piece, _ in pieces if piece.islower() and piece != 'k']).upper())
+    if _side_strength(black) > _side_strength(white):
+        pieces = [(piece.swapcase(), square ^ 56) for piece, square in pieces]
+        white_to_move = not white_to_move
+        white, black = black, white
+    material = f'K{white}vK{black}'
+
+    squares_by_piece: dict[str, list[int]] = {}
+    for piece, square in pieces:
+        squares_by_piece.setdefault(piece, []).append(square)
+    squares = [squares_by_piece[piece].pop() for piece in material_pieces(material)]
+    return material, squares, white_to_move
+
+
+def all_materials(max_pieces: int) -> list[str]:
+    """
+    :param max_pieces: maximum number of pieces, kings included
+    :return: the canonical names of all the materials with at least one piece besides the kings, smaller ones first
+    """
+    materials = []
+    for num_pieces in range(1, max_pieces - 1):
+        for pieces in combinations_with_replacement(PIECE_ORDER, num_pieces):
+            for white_count in range(num_pieces, -1, -1):
+                material = canonical_material(f'K{"".join(pieces[:white_count])}vK{"".join(pieces[white_count:])}')
+                if material not in materials:
+                    materials.append(material)
+    return materials
+
+
+def sub_materials(material: str) -> list[str]:
+    """
+    :param material: canonical name of a material
+    :return: the canonical names of the materials reachable with a capture or a promotion, excluding bare kings
+    """
+    white, black = material.split('v')
+    sides = [white[1:], black[1:]]
+    materials = []
+    for side_index, side in enumerate(sides):
+        for piece_index, piece in enumerate(side):
+            replacements = [''] + (list(PIECE_ORDER[:-1]) if piece == 'P' else [])
+            for replacement in replacements:
+                new_sides = list(sides)
+                new_sides[side_index] = side[:piece_index] + replacement + side[piece_index + 1:]
+                if not new_sides[0] and not new_sides[1]:
+                    continue
+                sub_material = canonical_material(f'K{new_sides[0]}vK{new_sides[1]}')
+                if sub_material not in materials:
+                    materials.append(sub_material)
+    return materials
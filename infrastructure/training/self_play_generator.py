@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from domain.engine.engine import Engine
+from domain.game.model.board import BoardState
+from infrastructure.match.match_runner import PlayerConfig
+from infrastructure.notation.mapper.board_mapper import FENBoardStateMapper
+from infrastructure.training.training_shard import TrainingShard, TrainingShardWriter
+
+
+class SelfPlayStats:
+    """
+    Totals of a self-play run
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.positions = 0
+        # CPU seconds spent by the workers, added up
+        self.worker_time = 0.0
+        self.elapsed = 0.0
+        self.paths: list[str] = []
+
+    @property
+    def positions_per_second(self) -> float:
+        return self.positions / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def positions_per_second_per_core(self) -> float:
+        return self.positions / self.worker_time if self.worker_time > 0 else 0.0
+
+    def __str__(self):
+        return (f'{self.games} games, {self.positions} positions in {len(self.paths)} shards, {self.elapsed:.1f}s, '
+                f'{self.positions_per_second:.1f} positions/s, {self.positions_per_second_per_core:.1f} positions/s/core')
+
+
+class SelfPlayGenerator:
+    """
+    Generates training data by self-play: worker processes play games of an engine against itself from randomized
+    openings and record every quiet position with the score of its search and the result of the game. Each worker
+    writes its own sequence of TrainingShard files and reports its totals when it finishes, so nothing is printed or
+    sent between processes while the games are played.
+    """
+
+    def __init__(self,
+                 player: PlayerConfig,
+                 games: int,
+                 output_dir: str,
+                 processes: int = None,
+                 openings: list[str] | None = None,
+                 random_plies: int = 8,
+                 max_plies: int = 400,
+                 resign_score: float = 10.0,
+                 resign_move_count: int = 4,
+                 skip_noisy: bool = True,
+                 records_per_shard: int = 100_000,
+                 seed: int = 0):
+        """
+        Constructor
+        :param player: configuration of the engine, with its budget per move (i.e.: node_limit for AlphaBetaEngine)
+        :param games: number of games
+        :param output_dir: directory of the shards
+        :param processes: number of worker processes. Defaults to the number of cores.
+        :param openings: (optional) FEN strings of the positions where the random moves start. Defaults to the starting position.
+        :param random_plies: number of random moves played before the engine takes over
+        :param max_plies: number of plies after which a game is adjudicated as a draw
+        :param resign_score: minimum absolute score, in pawns, of a won position
+        :param resign_move_count: number of consecutive moves with scores beyond resign_score for the same side to adjudicate a win
+        :param skip_noisy: if True, positions in check and positions whose best move is a capture or a promotion are not recorded
+        :param records_per_shard: number of records of each shard
+        :param seed: seed of the random moves, for reproducible runs
+        """
+        self._player = player
+        self._games = games
+        self._output_dir = output_dir
+        self._processes = processes or os.cpu_count()
+        self._openings = openings or [FENBoardStateMapper.STARTING_FEN]
+        self._options = (random_plies, max_plies, resign_score, resign_move_count, skip_noisy, records_per_shard)
+        self._seed = seed
+
+    def run(self) -> SelfPlayStats:
+        """
+        Plays the games
+        :return: the totals of the run
+        """
+        processes = max(1, min(self._processes, self._games))
+        tasks = [(worker, self._games // processes + (1 if worker < self._games % processes else 0), self._player,
+                  self._openings, self._output_dir, self._seed, self._options)
+                 for worker in range(processes)]
+
+        stats = SelfPlayStats()
+        t_0 = time.perf_counter()
+        if processes == 1:
+            results = [_generate(task) for task in tasks]
+        else:
+            with Pool(processes) as pool:
+                results = pool.map(_generate, tasks)
+        for games, positions, worker_time, paths in results:
+            stats.games += games
+            stats.positions += positions
+            stats.worker_time += worker_time
+            stats.paths += paths
+        stats.elapsed = time.perf_counter() - t_0
+        stats.paths.sort()
+        return stats
+
+
+def _generate(task: tuple[int, int, PlayerConfig, list[str], str, int, tuple]) -> tuple[int, int, float, list[str]]:
+    """
+    Plays the games of a worker
+    :param task: tuple with the index of the worker, its number of games, the configuration of the engine, the openings, the directory of the shards, the seed and the options of the generator
+    :return: the number of games and positions, the CPU seconds spent and the paths of the shards
+    """
+    worker, games, player, openings, output_dir, seed, options = task
+    random_plies, max_plies, resign_score, resign_move_count, skip_noisy, records_per_shard = options
+    rng = random.Random(seed * 1_000_003 + worker)
+    t_0 = time.process_time()
+    positions = 0
+
+    with TrainingShardWriter(output_dir, f'selfplay-{seed}-{worker:03d}', records_per_shard) as writer:
+        for _ in range(games):
+            records = _play_game(player.create_engine(), _random_opening(rng, openings, random_plies),
+                                 max_plies, resign_score, resign_move_count, skip_noisy)
+            writer.add(records)
+            positions += len(records)
+    return games, positions, time.process_time() - t_0, writer.paths
+
+
+def _random_opening(rng: random.Random, openings: list[str], random_plies: int) -> BoardState:
+    """
+    Plays random moves from one of the openings, starting over if the game ends before the last one
+    """
+    while True:
+        board_state = FENBoardStateMapper.fen_to_board_state(rng.choice(openings))
+        for _ in range(random_plies):
+            moves = board_state.get_legal_moves()
+            if not moves:
+                break
+            board_state.perform_move(rng.choice(moves), update=True)
+        if not board_state.is_game_over():
+            return board_state
+
+
+def _play_game(engine: Engine, board_state: BoardState, max_plies: int, resign_score: float, resign_move_count: int,
+               skip_noisy: bool) -> list[bytes]:
+    """
+    Plays a game of the engine against itself
+    :return: the records of the game
+    """
+    # packed positions with their scores for the side to move, and whether white was to move
+    positions: list[tuple[bytes, float, bool]] = []
+    # consecutive moves with a winning score for the same side, and that side
+    resign_count, resign_white = 0, True
+    result_white = TrainingShard.DRAW
+
+    for _ in range(max_plies):
+        if board_state.is_game_over():
+            if board_state.is_checkmate():
+                result_white = TrainingShard.LOSS if board_state.white_to_move else TrainingShard.WIN
+            break
+
+        move, score, _, _ = engine.calculate_move(board_state)
+        if move is None:
+            break
+        white = board_state.white_to_move
+        noisy = move.promotion_piece is not None or move.en_passant or \
+            board_state.get_piece_on_square(move.dest_square) is not None or board_state.is_in_check()
+        if not (skip_noisy and noisy):
+            positions.append((board_state.to_bytes(), score, white))
+
+        white_score = score if white else -score
+        if abs(white_score) >= resign_score:
+            winner_white = white_score > 0
+            resign_count = resign_count + 1 if winner_white == resign_white else 1
+            resign_white = winner_white
+            if resign_count >= 2 * resign_move_count:
+                result_white = TrainingShard.WIN if winner_white else TrainingShard.LOSS
+                break
+        else:
+            resign_count = 0
+        board_state.perform_move(move, update=True)
+
+    return [TrainingShard.pack_record(position, score, result_white if white else -result_white)
+            for position, score, white in positions]
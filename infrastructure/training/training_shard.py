@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import Generator
+
+from domain.game.model.board import BoardState
+from infrastructure.database.position_store import PositionStore
+
+
+class TrainingShard:
+    """
+    File of labelled positions for the tuning and training of evaluators: each record is a position packed with
+    BoardState.to_bytes, the score of a search in centipawns and the result of the game, both from the point of view
+    of the side to move. The file is memory-mapped, and the records can be read one by one or all at once as a NumPy
+    structured array that shares the memory of the file.
+    """
+
+    MAGIC = b'CHSTRAIN'
+    VERSION = 1
+    HEADER = struct.Struct('<8sII')
+    # packed position, score, result
+    RECORD = struct.Struct(f'<{BoardState.PACKED_SIZE}shbx')
+
+    # results, from the point of view of the side to move
+    WIN = 1
+    DRAW = 0
+    LOSS = -1
+
+    MAX_SCORE = 32_000
+
+    DTYPE_FIELDS = PositionStore.DTYPE_FIELDS + [
+        ('score', '<i2'),
+        ('result', 'i1'),
+        ('padding', 'V1'),
+    ]
+
+    def __init__(self, path: str):
+        """
+        Opens a shard
+        :param path: path of the file
+        """
+        self._file = open(path, 'rb')
+        self._mmap = None
+        if os.fstat(self._file.fileno()).st_size >= TrainingShard.HEADER.size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap is None or TrainingShard.HEADER.unpack_from(self._mmap, 0) != (TrainingShard.MAGIC, TrainingShard.VERSION, TrainingShard.RECORD.size):
+            self.close()
+            raise ValueError(f'{path} is not a training shard file')
+        self._num_records = (len(self._mmap) - TrainingShard.HEADER.size) // TrainingShard.RECORD.size
+
+    def __len__(self) -> int:
+        return self._num_records
+
+    def __getitem__(self, index: int) -> tuple[BoardState, int, int]:
+        """
+        :param index: index of the record
+        :return: the position, the score in centipawns and the result of the record
+        """
+        if index < 0:
+            index += self._num_records
+        if not 0 <= index < self._num_records:
+            raise IndexError(f'Record {index} out of range')
+        return self._read(TrainingShard.HEADER.size + index * TrainingShard.RECORD.size)
+
+    def __iter__(self) -> Generator[tuple[BoardState, int, int]]:
+        for index in range(self._num_records):
+            yield self._read(TrainingShard.HEADER.size + index * TrainingShard.RECORD.size)
+
+    def array(self):
+        """
+        Views the records as a read-only NumPy structured array (with the fields of TrainingShard.DTYPE_FIELDS) that
+        shares the memory of the file. The shard can't be closed while the array, or any view of it, is alive.
+        Requires NumPy.
+        :return: the array of the records
+        """
+        import numpy as np
+
+        return np.frombuffer(self._mmap, dtype=np.dtype(TrainingShard.DTYPE_FIELDS), count=self._num_records,
+                             offset=TrainingShard.HEADER.size)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _read(self, offset: int) -> tuple[BoardState, int, int]:
+        _, score, result = TrainingShard.RECORD.unpack_from(self._mmap, offset)
+        return BoardState.from_bytes(self._mmap, offset), score, result
+
+    @staticmethod
+    def pack_record(position: bytes, score: float, result: int) -> bytes:
+        """
+        :param position: the position, packed with BoardState.to_bytes
+        :param score: the score of the position for the side to move, in pawns (infinite for checkmate)
+        :param result: the result of the game for the side to move
+        :return: the record
+        """
+        score = round(max(-TrainingShard.MAX_SCORE, min(TrainingShard.MAX_SCORE, score * 100)))
+        return TrainingShard.RECORD.pack(position, score, result)
+
+
+class TrainingShardWriter:
+    """
+    Writes records to a sequence of training shards in a directory, starting a new shard every time one is full.
+    Records are kept in memory until their shard is complete, and each shard is written to a temporary file that is
+    renamed when finished, so readers only ever see complete shards.
+    """
+
+    def __init__(self, directory: str, prefix: str, records_per_shard: int = 100_000):
+        """
+        Constructor
+        :param directory: directory of the shards, created if it doesn't exist
+        :param prefix: start of the names of the shards, followed by their number
+        :param records_per_shard: number of records of each shard
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._prefix = prefix
+        self._records_per_shard = records_per_shard
+        self._buffer = bytearray()
+        self._num_buffered = 0
+        self.paths: list[str] = []
+
+    def add(self, records: list[bytes]):
+        """
+        Adds records, i.e.: the positions of a game
+        :param records: records packed with TrainingShard.pack_record
+        """
+        for record in records:
+            self._buffer += record
+            self._num_buffered += 1
+            if self._num_buffered == self._records_per_shard:
+                self._write_shard()
+
+    def close(self):
+        """
+        Writes the last shard, which may not be full
+        """
+        if self._num_buffered:
+            self._write_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_shard(self):
+        path = os.path.join(self._directory, f'{self._prefix}-{len(self.paths):05d}.bin')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(TrainingShard.HEADER.pack(TrainingShard.MAGIC, TrainingShard.VERSION, TrainingShard.RECORD.size))
+            file.write(self._buffer)
+        os.replace(tmp_path, path)
+        self.paths.append(path)
+        self._buffer = bytearray()
+        self._num_buffered = 0
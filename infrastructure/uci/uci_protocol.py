@@ -0,0 +1,240 @@
+import sys
+import threading
+from typing import TextIO
+
+from domain.engine.alpha_beta_engine import AlphaBetaEngine
+from domain.engine.search_stats import SearchStats
+from domain.evaluator.evaluator import Evaluator
+from domain.game.model.board import BoardState, get_stating_board
+from infrastructure.notation.mapper.board_mapper import FENBoardStateMapper
+from infrastructure.notation.mapper.move_mapper import UCIMoveMapper
+
+
+class UCIProtocol:
+    """
+    Universal Chess Interface (https://www.chessprogramming.org/UCI) front-end for AlphaBetaEngine, to play under
+    GUIs and tournament managers. Commands are read on the calling thread while searches run on a worker thread, so
+    'stop', 'isready' and 'quit' are answered during a search. Every completed iteration is reported as an info line.
+    """
+
+    NAME = 'chess'
+    AUTHOR = 'David Perez Gomez'
+
+    DEFAULT_HASH_MB = 16
+    MAX_HASH_MB = 4096
+    # approximate memory of an entry of the transposition table, including the move it references
+    TT_ENTRY_BYTES = 256
+
+    # time management: the remaining time is split among this number of moves if the GUI doesn't tell it, no search
+    # takes more than a fraction of the remaining time, and some time is kept for the communication with the GUI
+    DEFAULT_MOVES_TO_GO = 30
+    INCREMENT_FRACTION = 0.75
+    MAX_TIME_FRACTION = 0.5
+    MOVE_OVERHEAD = 0.05
+    MIN_TIME_LIMIT = 0.01
+
+    GO_INTEGER_PARAMETERS = {'wtime', 'btime', 'winc', 'binc', 'movestogo', 'depth', 'nodes', 'mate', 'movetime'}
+
+    def __init__(self, evaluator: Evaluator, input: TextIO = sys.stdin, output: TextIO = sys.stdout):
+        """
+        Constructor
+        :param evaluator: the evaluator used by the engine
+        :param input: (optional) stream of the commands. Defaults to the standard input.
+        :param output: (optional) stream of the responses. Defaults to the standard output.
+        """
+        self._evaluator = evaluator
+        self._input = input
+        self._output = output
+        self._output_lock = threading.Lock()
+
+        self._hash_mb = UCIProtocol.DEFAULT_HASH_MB
+        self._engine = self._create_engine()
+        self._board_state = get_stating_board()
+
+        self._search_thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """
+        Answers commands until 'quit' or the end of the input
+        """
+        for line in self._input:
+            if not self.handle(line):
+                break
+        self._stop_search()
+
+    def handle(self, line: str) -> bool:
+        """
+        Answers a command
+        :param line: the command
+        :return: False if the command is 'quit', True otherwise
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == 'uci':
+            self._send(f'id name {UCIProtocol.NAME}')
+            self._send(f'id author {UCIProtocol.AUTHOR}')
+            self._send(f'option name Hash type spin default {UCIProtocol.DEFAULT_HASH_MB} min 1 max {UCIProtocol.MAX_HASH_MB}')
+            self._send('uciok')
+        elif command == 'isready':
+            self._send('readyok')
+        elif command == 'setoption':
+            self._stop_search()
+            self._set_option(arguments)
+        elif command == 'ucinewgame':
+            self._stop_search()
+            self._engine.clear()
+            self._board_state = get_stating_board()
+        elif command == 'position':
+            self._stop_search()
+            self._set_position(arguments)
+        elif command == 'go':
+            self._stop_search()
+            self._go(arguments)
+        elif command == 'stop':
+            self._stop_search()
+        elif command == 'quit':
+            return False
+        elif command not in ['debug', 'ponderhit', 'register']:
+            self._send(f'info string unknown command {command}')
+        return True
+
+    def _create_engine(self) -> AlphaBetaEngine:
+        tt_size = self._hash_mb * 1024 * 1024 // UCIProtocol.TT_ENTRY_BYTES
+        return AlphaBetaEngine(self._evaluator, tt_size=tt_size, on_iteration=self._report_iteration)
+
+    def _set_option(self, arguments: list[str]):
+        """
+        Parses 'name <name> value <value>' and applies the option
+        """
+        if 'name' not in arguments:
+            return
+        value_index = arguments.index('value') if 'value' in arguments else len(arguments)
+        name = ' '.join(arguments[arguments.index('name') + 1:value_index]).lower()
+        value = ' '.join(arguments[value_index + 1:])
+
+        try:
+            if name == 'hash':
+                hash_mb = min(max(1, int(value)), UCIProtocol.MAX_HASH_MB)
+                if hash_mb != self._hash_mb:
+                    self._hash_mb = hash_mb
+                    self._engine = self._create_engine()
+            else:
+                self._send(f'info string unknown option {name}')
+        except ValueError:
+            self._send(f'info string invalid value {value} for option {name}')
+
+    def _set_position(self, arguments: list[str]):
+        """
+        Parses 'startpos [moves ...]' or 'fen <fen> [moves ...]' and sets up the position
+        """
+        moves_index = arguments.index('moves') if 'moves' in arguments else len(arguments)
+        try:
+            if arguments and arguments[0] == 'startpos':
+                board_state = get_stating_board()
+            elif arguments and arguments[0] == 'fen':
+                board_state = FENBoardStateMapper.fen_to_board_state(' '.join(arguments[1:moves_index]))
+            else:
+                raise ValueError('expected startpos or fen')
+        except ValueError as ex:
+            self._send(f'info string invalid position: {ex}')
+            return
+
+        for uci_string in arguments[moves_index + 1:]:
+            move = UCIMoveMapper.uci_to_move(uci_string, board_state)
+            if move is None:
+                self._send(f'info string illegal move {uci_string}')
+                return
+            board_state.perform_move(move, update=True)
+        self._board_state = board_state
+
+    def _go(self, arguments: list[str]):
+        """
+        Parses the limits of the search and starts it on the worker thread
+        """
+        parameters = {}
+        for i, argument in enumerate(arguments):
+            if argument in UCIProtocol.GO_INTEGER_PARAMETERS and i + 1 < len(arguments):
+                try:
+                    parameters[argument] = int(arguments[i + 1])
+                except ValueError:
+                    pass
+        infinite = 'infinite' in arguments or 'ponder' in arguments
+
+        max_depth = AlphaBetaEngine.MAX_PLY
+        if 'depth' in parameters:
+            max_depth = max(1, parameters['depth'])
+        elif 'mate' in parameters:
+            max_depth = max(1, 2 * parameters['mate'] - 1)
+        time_limit = None if infinite else self._time_limit(parameters, self._board_state.white_to_move)
+        self._engine.set_limits(max_depth, time_limit, parameters.get('nodes'))
+
+        self._stop_event.clear()
+        self._search_thread = threading.Thread(target=self._search, args=(self._board_state, infinite), daemon=True)
+        self._search_thread.start()
+
+    def _time_limit(self, parameters: dict[str, int], white: bool) -> float | None:
+        """
+        Calculates the time for the move from the clock of the active player
+        :param parameters: the integer parameters of the go command
+        :param white: whether the active player is white
+        :return: the time in seconds, or None if the search isn't limited by time
+        """
+        if 'movetime' in parameters:
+            return max(UCIProtocol.MIN_TIME_LIMIT, parameters['movetime'] / 1000 - UCIProtocol.MOVE_OVERHEAD)
+
+        time_left = parameters.get('wtime' if white else 'btime')
+        if time_left is None:
+            return None
+        increment = parameters.get('winc' if white else 'binc', 0)
+        moves_to_go = max(1, parameters.get('movestogo', UCIProtocol.DEFAULT_MOVES_TO_GO))
+        time_limit = min(time_left / moves_to_go + increment * UCIProtocol.INCREMENT_FRACTION, time_left * UCIProtocol.MAX_TIME_FRACTION)
+        return max(UCIProtocol.MIN_TIME_LIMIT, time_limit / 1000 - UCIProtocol.MOVE_OVERHEAD)
+
+    def _search(self, board_state: BoardState, infinite: bool):
+        """
+        Runs a search on the worker thread and sends the best move
+        :param board_state: the position
+        :param infinite: if True, the best move is only sent after 'stop', even if the search ends before
+        """
+        move, _, sequence, _ = self._engine.calculate_move(board_state)
+        if infinite:
+            self._stop_event.wait()
+
+        response = f'bestmove {UCIMoveMapper.move_to_uci(move)}'
+        if len(sequence) > 1:
+            response += f' ponder {UCIMoveMapper.move_to_uci(sequence[1])}'
+        self._send(response)
+
+    def _stop_search(self):
+        """
+        Stops the search in progress, if any, and waits for its best move to be sent
+        """
+        if self._search_thread is None:
+            return
+        self._stop_event.set()
+        self._engine.stop()
+        self._search_thread.join()
+        self._search_thread = None
+
+    def _report_iteration(self, stats: SearchStats):
+        """
+        Sends the info line of a completed iteration. Called on the worker thread.
+        """
+        if self._stop_event.is_set():
+            # 'stop' arrived before the search started, which discarded the request
+            self._engine.stop()
+
+        iteration = stats.iterations[-1]
+        score = f'mate {iteration.mate}' if iteration.mate is not None else f'cp {round(iteration.score * 100)}'
+        self._send(f'info depth {iteration.depth} seldepth {max(stats.seldepth, iteration.depth)} score {score} '
+                   f'nodes {stats.total_nodes} nps {int(stats.nps)} hashfull {self._engine.hashfull()} '
+                   f'time {int(stats.elapsed * 1000)} pv {" ".join([UCIMoveMapper.move_to_uci(move) for move in iteration.pv])}')
+
+    def _send(self, response: str):
+        with self._output_lock:
+            self._output.write(response + '\n')
+            self._output.flush()
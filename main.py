@@ -1,39 +1,35 @@
+import os
 import time
 from cProfile import Profile
 from pstats import Stats, SortKey
 
-from domain.engine.engine import Engine
-from domain.evaluator.evaluator import Evaluator
+from domain.engine.alpha_beta_engine import AlphaBetaEngine
+from domain.evaluator.piece_square_table_evaluator import PieceSquareTableEvaluator
 from domain.game.model.board import get_stating_board
 from infrastructure.console.mapper.board_mapper import ConsoleBoardStateMapper
-from infrastructure.console.mapper.move_mapper import ConsoleMoveMapper
+from infrastructure.notation.mapper.move_mapper import SANMoveMapper
+from infrastructure.pgn.pgn_writer import PGNWriter
 
 board_mapper = ConsoleBoardStateMapper()
-move_mapper = ConsoleMoveMapper()
 
-evaluator = Evaluator()
-engine = Engine(evaluator=evaluator)
+evaluator = PieceSquareTableEvaluator()
+engine = AlphaBetaEngine(evaluator=evaluator)
 
 
 def main():
     board_state = get_stating_board()
 
+    moves = []
     move = None
     t_0 = time.time()
     with Profile() as profile:
         while True:
             if move:
                 board_state.perform_move(move, update=True)
+                moves.append(move)
 
             print(board_mapper.board_state_to_string(board_state, border=True))
-            if board_state.is_stalemate():
-                status = 'stalemate'
-            elif board_state.cant_checkmate():
-                status = 'draw'
-            elif board_state.is_checkmate():
-                status = 'checkmate'
-            else:
-                status = 'playing'
+            status = board_state.game_status().value
             print(f'status: {status}')
             print(f'{'WHITE' if board_state.white_to_move else 'BLACK'} TO MOVE')
 
@@ -42,13 +38,15 @@ def main():
                 break
 
             t_0_0 = time.time()
-            move, score, sequence = engine.calculate_move(board_state)
+            move, score, sequence, stats = engine.calculate_move(board_state)
             print(f'Score {score if board_state.white_to_move else -score}')
-            print(f'Move: {move_mapper.move_to_string(move)}')
-            print(f'Sequence: {', '.join([move_mapper.move_to_string(move) for move in sequence])}')
+            print(f'Move: {SANMoveMapper.move_to_san(move, board_state)}')
+            print(f'Sequence: {', '.join(SANMoveMapper.moves_to_san(sequence, board_state))}')
             print(f'Time: {time.time() - t_0_0}s')
+            print(f'Stats: {stats}')
             # input()
 
+        os.makedirs('./out', exist_ok=True)
         (Stats(profile)
             .strip_dirs()
             .sort_stats(SortKey.CUMULATIVE)
@@ -58,6 +56,7 @@ def main():
 
     t_1 = time.time()
     print(f'{t_1 - t_0}s')
+    print(PGNWriter.game_to_pgn(moves, {'Result': PGNWriter.result(board_state)}))
 
 
 
@@ -0,0 +1,73 @@
+import argparse
+import time
+
+from domain.engine.alpha_beta_engine import AlphaBetaEngine
+from domain.evaluator.evaluator import Evaluator
+from domain.evaluator.piece_square_table_evaluator import PieceSquareTableEvaluator
+from infrastructure.match.elo import SPRT
+from infrastructure.match.match_runner import MatchRunner, PlayerConfig, GameRecord, MatchResult
+from infrastructure.notation.mapper.board_mapper import EDPBoardStateMapper, FENBoardStateMapper
+
+
+def evaluator_class(name: str) -> type[Evaluator]:
+    if name == 'pst':
+        return PieceSquareTableEvaluator
+    # requires numpy
+    from domain.evaluator.vectorized_evaluator import VectorizedEvaluator
+    return VectorizedEvaluator
+
+
+def read_openings(path: str) -> list[str]:
+    with open(path) as file:
+        return [FENBoardStateMapper.board_state_to_fen(EDPBoardStateMapper.epd_to_board_state(line))
+                for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays a match between two configurations of AlphaBetaEngine.')
+    parser.add_argument('--evaluators', nargs=2, default=['pst', 'pst'], choices=['pst', 'vectorized'], help='evaluators of the first and the second player')
+    parser.add_argument('--depth', type=int, nargs=2, default=[AlphaBetaEngine.MAX_PLY] * 2, help='maximum depth of each player')
+    parser.add_argument('--time', type=float, nargs=2, default=None, help='time per move of each player, in seconds')
+    parser.add_argument('--nodes', type=int, nargs=2, default=None, help='nodes per move of each player')
+    parser.add_argument('--tt-size', type=int, default=2 ** 16, help='entries of the transposition table of each engine')
+    parser.add_argument('--games', type=int, default=100, help='maximum number of games')
+    parser.add_argument('--openings', default=None, help='EPD file with the initial positions of the games (defaults to the starting position)')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (defaults to the number of cores)')
+    parser.add_argument('--sprt', type=float, nargs=2, default=None, metavar=('ELO0', 'ELO1'), help='stop the match with an SPRT of these hypotheses')
+    parser.add_argument('--pgn', default=None, help='path of the PGN file of the games')
+    args = parser.parse_args()
+
+    if args.time is None and args.nodes is None and args.depth == [AlphaBetaEngine.MAX_PLY] * 2:
+        parser.error('at least one of --depth, --time and --nodes is required')
+
+    players = []
+    for i in range(2):
+        options = {'max_depth': args.depth[i], 'tt_size': args.tt_size}
+        if args.time:
+            options['time_limit'] = args.time[i]
+        if args.nodes:
+            options['node_limit'] = args.nodes[i]
+        name = f'{args.evaluators[i]}-{i + 1}'
+        players.append(PlayerConfig(name, AlphaBetaEngine, evaluator_class(args.evaluators[i]), engine_options=options))
+
+    def on_game(game: GameRecord, result: MatchResult):
+        white, black = result.names if game.first_player_white else reversed(result.names)
+        print(f'game {game.index + 1}: {white} - {black} {game.result} ({game.termination}, {game.plies} plies) | {result}')
+
+    runner = MatchRunner(players[0], players[1],
+                         openings=read_openings(args.openings) if args.openings else None,
+                         games=args.games,
+                         processes=args.processes,
+                         sprt=SPRT(*args.sprt) if args.sprt else None,
+                         on_game=on_game)
+    t_0 = time.time()
+    result = runner.run()
+    print(f'{result} in {time.time() - t_0:.1f}s')
+
+    if args.pgn:
+        with open(args.pgn, 'w') as file:
+            file.write('\n'.join([game.pgn for game in result.games]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import argparse
+
+from domain.engine.alpha_beta_engine import AlphaBetaEngine
+from domain.evaluator.piece_square_table_evaluator import PieceSquareTableEvaluator
+from infrastructure.match.match_runner import PlayerConfig
+from infrastructure.suite.epd_suite_runner import EPDSuiteRunner, PositionResult
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs EPD test suites with AlphaBetaEngine.')
+    parser.add_argument('epd_paths', nargs='+', help='EPD files with bm or am operations')
+    parser.add_argument('--time', type=float, default=1.0, help='time per position, in seconds')
+    parser.add_argument('--nodes', type=int, default=None, help='nodes per position')
+    parser.add_argument('--depth', type=int, default=AlphaBetaEngine.MAX_PLY, help='maximum depth per position')
+    parser.add_argument('--tt-size', type=int, default=2 ** 18, help='entries of the transposition table')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes (defaults to the number of cores)')
+    args = parser.parse_args()
+
+    engine_options = {'max_depth': args.depth, 'time_limit': args.time, 'node_limit': args.nodes, 'tt_size': args.tt_size}
+    player = PlayerConfig('AlphaBetaEngine', AlphaBetaEngine, PieceSquareTableEvaluator, engine_options=engine_options)
+
+    def on_position(position: PositionResult):
+        expected = ' '.join(position.best_moves) if position.best_moves else 'not ' + ' '.join(position.avoid_moves)
+        solution = position.solution_iteration
+        found = f'depth {solution[0]}, {solution[1]:.2f}s' if solution else 'unsolved'
+        print(f'{position.id}: {position.move} ({expected}) {found}')
+
+    runner = EPDSuiteRunner(player, processes=args.processes, on_position=on_position)
+    results = [runner.run_file(path) for path in args.epd_paths]
+    for result in results:
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
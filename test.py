@@ -1,19 +1,21 @@
+import os
+import tempfile
 from cProfile import Profile
 from pstats import SortKey, Stats
 
-from domain.engine.engine import Engine
-from domain.evaluator.evaluator import Evaluator
+from domain.engine.alpha_beta_engine import AlphaBetaEngine
+from domain.evaluator.piece_square_table_evaluator import PieceSquareTableEvaluator
 from domain.game.model.board import BoardState, get_stating_board
 from domain.game.model.pieces import Piece, PieceType
 from infrastructure.console.mapper.board_mapper import ConsoleBoardStateMapper
-from infrastructure.console.mapper.move_mapper import ConsoleMoveMapper
+from infrastructure.notation.mapper.move_mapper import SANMoveMapper
+from infrastructure.pgn.pgn_reader import PGNReader
 
 
 board_mapper = ConsoleBoardStateMapper()
-move_mapper = ConsoleMoveMapper()
 
-evaluator = Evaluator()
-engine = Engine(evaluator=evaluator)
+evaluator = PieceSquareTableEvaluator()
+engine = AlphaBetaEngine(evaluator=evaluator)
 
 
 def get_test_board_endgame() -> BoardState:
@@ -340,13 +342,50 @@ def test():
     print(board_mapper.board_state_to_string(board_state, border=True))
 
     with Profile() as profile:
-        move, score, sequence = engine.calculate_move(board_state)
-        stats = Stats(profile)
-        stats.strip_dirs()
-        stats.sort_stats(SortKey.CUMULATIVE)
-        stats.print_stats()
-        stats.dump_stats('./out/stats_test')
+        move, score, sequence, stats = engine.calculate_move(board_state)
+        profile_stats = Stats(profile)
+        profile_stats.strip_dirs()
+        profile_stats.sort_stats(SortKey.CUMULATIVE)
+        profile_stats.print_stats()
+        os.makedirs('./out', exist_ok=True)
+        profile_stats.dump_stats('./out/stats_test')
+
+    print(f'Move: {SANMoveMapper.move_to_san(move, board_state)}')
+    print(f'Score: {score}')
+    print(f'Sequence: {", ".join(SANMoveMapper.moves_to_san(sequence, board_state))}')
+    for iteration in stats.iterations:
+        print(f'depth {iteration.depth}: score {iteration.score} nodes {iteration.nodes} qnodes {iteration.quiescence_nodes} time {iteration.time:.3f}s')
+    print(f'Stats: {stats}')
+
+
+def test_pgn_wrapped_comment():
+    # a comment wrapped so that a line starts like a tag, even after a blank line, mustn't split the game
+    pgn = ('[Event "A"]\n[Result "1-0"]\n\n'
+           '1. e4 { a long comment that wraps\n[%clk 0:10:00] } e5 2. Nf3 ; line comment {\n'
+           'Nc6 { blank line inside\n\n[%eval 0.3] } 3. Bb5 1-0\n\n'
+           '[Event "B"]\n[Result "0-1"]\n\n1. d4 d5 0-1\n')
+    file, path = tempfile.mkstemp(suffix='.pgn')
+    with os.fdopen(file, 'w') as f:
+        f.write(pgn)
+    try:
+        with PGNReader(path) as reader:
+            games = list(reader)
+            assert [game.headers['Event'] for game in games] == ['A', 'B']
+            assert games[0].moves == ['e4', 'e5', 'Nf3', 'Nc6', 'Bb5']
+            assert games[1].moves == ['d4', 'd5']
+            for chunk_size in range(1, len(pgn)):
+                assert all(start in (0, games[1].start) for start, _ in reader.split(chunk_size))
+    finally:
+        os.remove(path)
+
+
+def test_pgn_zero_castling():
+    # castling written with zeros is a move, the termination markers aren't
+    moves = PGNReader._movetext_to_moves(b'1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4.0-0 0-0-0 5. O-O-O 0-0+ 1-0 0-1')
+    assert moves == ['e4', 'e5', 'Nf3', 'Nc6', 'Bc4', 'Bc5', '0-0', '0-0-0', 'O-O-O', '0-0+']
 
 
 if __name__ == '__main__':
-    test()
\ No newline at end of file
+    test_pgn_wrapped_comment()
+    test_pgn_zero_castling()
+    test()
@@ -0,0 +1,10 @@
+from domain.evaluator.piece_square_table_evaluator import PieceSquareTableEvaluator
+from infrastructure.uci.uci_protocol import UCIProtocol
+
+
+def main():
+    UCIProtocol(PieceSquareTableEvaluator()).run()
+
+
+if __name__ == '__main__':
+    main()